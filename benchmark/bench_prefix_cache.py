@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+# ⚡ 고정 프롬프트 앞부분(PROMPT_PREFIX) KV 캐시 재사용 전/후 prefill 시간 비교
+# max_new_tokens=1로 generate → 토크나이즈 + prefill + 첫 토큰 시간만 측정
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [os.path.join(ROOT_DIR, "vectorDB"), os.path.join(ROOT_DIR, "io")]
+
+from synthetic import make_articles, make_queries
+
+TINY_LLM = "sshleifer/tiny-gpt2"
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)] if values else 0.0
+
+def make_prompts(bot, n, context_chars, seed):
+    articles = make_articles(n, seed=seed)
+    queries = make_queries(articles, n, seed=seed + 1)
+    return [bot.build_prompt(f"[1] {a['title']}\n{a['content'][:context_chars]}", q) for a, q in zip(articles, queries)]
+
+def run(scheduler, prompts, batch_size, repeat):
+    """배치마다 걸린 시간(초) 목록 + 첫 생성 토큰"""
+    seconds, first_tokens = [], []
+    for _ in range(repeat):
+        first_tokens = []
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start:start + batch_size]
+            begin = time.perf_counter()
+            first_tokens += scheduler._generate_batch(batch)
+            seconds.append(time.perf_counter() - begin)
+    return seconds, first_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 앞부분 KV 캐시 재사용 전/후 prefill 시간 비교")
+    parser.add_argument("--llm-model", default=TINY_LLM, help=f"측정할 LLM (기본: {TINY_LLM})")
+    parser.add_argument("--prompts", type=int, default=16, help="프롬프트 수")
+    parser.add_argument("--batch-size", type=int, default=1, help="generate 한 번에 묶을 프롬프트 수")
+    parser.add_argument("--context-chars", type=int, default=400, help="프롬프트에 넣을 참고 문서 길이(글자)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    os.environ["LLM_MODEL_NAME"] = args.llm_model
+    try:
+        import TelegramLlmBot as bot
+        from generation_scheduler import GenerationScheduler
+    except ImportError as e:
+        print(f"⚠️ 벤치마크 건너뜀 (패키지 없음: {e})")
+        return
+    tokenizer = bot.llm_tokenizer.get()
+    model = bot.llm_model.get()
+    prompts = make_prompts(bot, args.prompts, args.context_chars, args.seed)
+
+    report = {"llm_model": args.llm_model, "prompts": len(prompts), "batch_size": args.batch_size}
+    outputs = {}
+    for name, prefix in (("no_cache", None), ("prefix_cache", bot.PROMPT_PREFIX)):
+        scheduler = GenerationScheduler(
+            model, tokenizer, max_batch_size=args.batch_size, prefix=prefix,
+            max_new_tokens=1, do_sample=False, pad_token_id=tokenizer.pad_token_id,
+        )
+        if prefix:
+            scheduler.build_prefix_cache()
+            report["prefix_tokens"] = scheduler.stats()["prefix_cache_tokens"]
+        run(scheduler, prompts[:args.batch_size], args.batch_size, 1)  # 첫 실행(메모리 할당 등) 제외
+        seconds, outputs[name] = run(scheduler, prompts, args.batch_size, args.repeat)
+        per_prompt = [s * 1000 / args.batch_size for s in seconds]
+        report[f"{name}_p50_ms"] = percentile(per_prompt, 50)
+        report[f"{name}_p95_ms"] = percentile(per_prompt, 95)
+        report[f"{name}_mean_ms"] = sum(per_prompt) / len(per_prompt)
+    report["speedup"] = report["no_cache_mean_ms"] / report["prefix_cache_mean_ms"] if report["prefix_cache_mean_ms"] else 0.0
+    # 탐욕 디코딩이므로 캐시를 써도 첫 토큰은 (수치 오차를 빼면) 같아야 함
+    same = sum(a == b for a, b in zip(outputs["no_cache"], outputs["prefix_cache"]))
+    report["same_first_token_ratio"] = same / len(prompts)
+
+    print("\n⚡ 프롬프트 앞부분 KV 캐시 벤치마크 (프롬프트당, 토크나이즈 + prefill + 첫 토큰)")
+    for key, value in report.items():
+        print(f"  - {key}: {value:.3f}" if isinstance(value, float) else f"  - {key}: {value}")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import io as _io
+from types import SimpleNamespace
+
+# 📈 업로드 → 검색 → 봇 답변까지 한 번에 측정하는 벤치마크
+# convert_and_upload.py는 설정 파일을 상대 경로로 읽으므로 vectorDB 폴더에서 import
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+VECTORDB_DIR = os.path.join(ROOT_DIR, "vectorDB")
+IO_DIR = os.path.join(ROOT_DIR, "io")
+START_DIR = os.getcwd()  # --save / --compare 상대 경로 기준
+sys.path[:0] = [VECTORDB_DIR, IO_DIR]
+os.chdir(VECTORDB_DIR)
+
+import metrics
+import providers
+import convert_and_upload
+import vector_search
+from synthetic import HashingEmbedder, make_articles, make_queries, write_jsonl
+
+BENCH_INDEX = "benchmark_articles"
+TINY_LLM = "sshleifer/tiny-gpt2"
+# 회귀 비교 대상 지표 (True: 클수록 좋음)
+COMPARE_METRICS = {
+    "upload_docs_per_sec": True,
+    "search_p50_ms": False,
+    "search_p95_ms": False,
+    "search_p99_ms": False,
+    "hybrid_p95_ms": False,
+    "search_batch_qps": True,
+    "recall_at_k": True,
+    "bot_answers_per_sec": True,
+}
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def latency_summary(prefix, seconds):
+    ms = [s * 1000 for s in seconds]
+    return {f"{prefix}_p50_ms": percentile(ms, 50), f"{prefix}_p95_ms": percentile(ms, 95), f"{prefix}_p99_ms": percentile(ms, 99)}
+
+def use_index(name):
+    # 운영 인덱스를 건드리지 않도록 벤치마크 전용 인덱스 사용
+    convert_and_upload.index_name = name
+    vector_search.INDEX_NAME = name
+    vector_search.invalidate_cache()
+
+# ---------------------- 1. 업로드 ----------------------
+def bench_upload(articles, batch_size, chunk_size, threads):
+    client = providers.get_client()
+    if client.indices.exists(index=convert_and_upload.index_name):
+        client.indices.delete(index=convert_and_upload.index_name)
+    convert_and_upload.create_index_if_not_exists(convert_and_upload.index_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "articles.jsonl")
+        write_jsonl(articles, path)
+        stats = convert_and_upload.upload_stream(path, batch_size=batch_size, chunk_size=chunk_size, threads=threads)
+    client.indices.refresh(index=convert_and_upload.index_name)
+    return {
+        "upload_passages": stats["success"],
+        "upload_failed": stats["failed"],
+        "upload_seconds": stats["seconds"],
+        "upload_docs_per_sec": stats["docs_per_sec"],
+    }
+
+# ---------------------- 2. 검색 ----------------------
+def bench_search(queries, top_k, ef_search):
+    vector_search.invalidate_cache()
+    vector_seconds, hybrid_seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector_search.search_by_vector(query, top_k, ef_search=ef_search)
+        vector_seconds.append(time.perf_counter() - start)
+    for query in queries:
+        start = time.perf_counter()
+        # 같은 질의의 임베딩은 캐시됨 → 검색/fusion 비용 위주로 측정
+        vector_search.hybrid_search(query, top_k, ef_search=ef_search)
+        hybrid_seconds.append(time.perf_counter() - start)
+    # 질의 전체를 한 번에 (임베딩 배치 + msearch 1번)
+    vector_search.invalidate_cache()
+    start = time.perf_counter()
+    vector_search.search_by_vectors(queries, top_k, ef_search=ef_search)
+    batch_seconds = time.perf_counter() - start
+    report = {"search_queries": len(queries)}
+    report.update(latency_summary("search", vector_seconds))
+    report.update(latency_summary("hybrid", hybrid_seconds))
+    report["search_batch_qps"] = len(queries) / batch_seconds if batch_seconds else 0.0
+    report["recall_at_k"] = vector_search.check_recall(queries, top_k, ef_search)
+    return report
+
+# ---------------------- 3. 봇 답변 처리량 ----------------------
+class _FakeMessage:
+    def __init__(self, text):
+        self.text = text
+
+    async def edit_text(self, text):
+        self.text = text
+
+class _FakeBot:
+    """context.bot 대역: 보낸 메시지를 기록만 함"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, reply_to_message_id=None):
+        message = _FakeMessage(text)
+        self.sent.append((chat_id, message))
+        return message
+
+def _fake_update(chat_id, message_id, text):
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id, type="private"),
+        effective_user=SimpleNamespace(id=chat_id, full_name=f"bench-{chat_id}"),
+        message=SimpleNamespace(text=text, message_id=message_id),
+    )
+
+async def _bench_bot(bot, chats, questions, queries):
+    await bot.warm_up_and_start()
+    if not bot.bot_ready.is_set():
+        raise RuntimeError("봇 준비 실패 (위 로그 확인)")
+    fake_bot = _FakeBot()
+    context = SimpleNamespace(bot=fake_bot)
+
+    async def chat(chat_id):
+        # 채팅방 하나는 답변을 받은 뒤 다음 질문을 보냄
+        for i in range(questions):
+            query = queries[(chat_id * questions + i) % len(queries)]
+            await bot.handle_message(_fake_update(chat_id, i, query), context)
+
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(_io.StringIO()):
+            await asyncio.gather(*(chat(chat_id) for chat_id in range(chats)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await bot.on_shutdown(None)
+    errors = sum(1 for _, message in fake_bot.sent if message.text.startswith("⚠️"))
+    answers = len(fake_bot.sent) - errors
+    stats = bot.generation_scheduler.stats()
+    return {
+        "bot_chats": chats,
+        "bot_answers": answers,
+        "bot_errors": errors,
+        "bot_seconds": elapsed,
+        "bot_answers_per_sec": answers / elapsed if elapsed else 0.0,
+        "bot_avg_batch_size": stats["avg_batch_size"],
+    }
+
+def bench_bot(chats, questions, queries, llm_model, max_new_tokens):
+    os.environ["LLM_MODEL_NAME"] = llm_model
+    os.environ["GEN_MAX_NEW_TOKENS"] = str(max_new_tokens)
+    # 같은 채팅방이 연달아 질문하므로 속도 제한은 끔 (대기열/동시 실행 제한은 그대로 측정)
+    os.environ.setdefault("CHAT_RATE_PER_MIN", "0")
+    os.environ.setdefault("USER_RATE_PER_MIN", "0")
+    try:
+        import TelegramLlmBot as bot
+    except ImportError as e:
+        print(f"⚠️ 봇 벤치마크 건너뜀 (패키지 없음: {e})")
+        return {}
+    return asyncio.run(_bench_bot(bot, chats, questions, queries))
+
+# ---------------------- 보고 / 회귀 비교 ----------------------
+def print_report(report):
+    print("\n📈 벤치마크 결과")
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        if not isinstance(value, dict):
+            print(f"  - {key}: {value}")
+
+def compare(report, baseline, tolerance):
+    """기준 결과보다 tolerance 비율 이상 나빠진 지표 목록"""
+    regressions = []
+    for key, higher_is_better in COMPARE_METRICS.items():
+        old, new = baseline.get(key), report.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = change < -tolerance if higher_is_better else change > tolerance
+        mark = "❌" if worse else "✅"
+        print(f"  {mark} {key}: {old:.3f} → {new:.3f} ({change * 100:+.1f}%)")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="업로드 / 검색 / 봇 답변 성능 측정")
+    parser.add_argument("--backend", choices=["fake", "local", "opensearch"], default="fake",
+                        help="fake: 프로세스 내 메모리 구현 (기본), local: memmap 로컬 저장소 (임시 폴더)")
+    parser.add_argument("--index", default=BENCH_INDEX, help=f"벤치마크 전용 인덱스 (기본: {BENCH_INDEX}, 실행 시 삭제 후 재생성)")
+    parser.add_argument("--docs", type=int, default=1000, help="합성 기사 수")
+    parser.add_argument("--queries", type=int, default=200, help="검색 질의 수")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int)
+    parser.add_argument("--embedding", choices=["hash", "model"], default="hash", help="hash: 다운로드 없는 해싱 임베딩, model: 실제 임베딩 모델")
+    parser.add_argument("--batch-size", type=int, help="임베딩 배치 크기")
+    parser.add_argument("--chunk-size", type=int, help="bulk 요청당 문서 수")
+    parser.add_argument("--threads", type=int, help="parallel_bulk 스레드 수")
+    parser.add_argument("--chats", type=int, default=8, help="동시에 질문하는 채팅방 수")
+    parser.add_argument("--questions", type=int, default=4, help="채팅방당 질문 수")
+    parser.add_argument("--llm-model", default=TINY_LLM, help=f"봇 벤치마크용 LLM (기본: {TINY_LLM})")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--skip-bot", action="store_true", help="봇 답변 처리량 측정 생략")
+    parser.add_argument("--keep-index", action="store_true", help="끝난 뒤 벤치마크 인덱스를 지우지 않음")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON (나빠진 지표가 있으면 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="회귀로 볼 변화 비율 (기본 0.1 = 10%%)")
+    args = parser.parse_args()
+
+    if args.backend == "fake":
+        from fake_opensearch import FakeOpenSearch
+        providers.set_client(FakeOpenSearch())
+    elif args.backend == "local":
+        from local_store import LocalVectorStore
+        providers.set_client(LocalVectorStore(tempfile.mkdtemp(prefix="local_store_"), providers.LOCAL_STORE_DTYPE))
+    if args.embedding == "hash":
+        providers.set_embedding_model(HashingEmbedder())
+    use_index(args.index)
+
+    articles = make_articles(args.docs, seed=args.seed)
+    queries = make_queries(articles, args.queries, seed=args.seed + 1)
+    report = {"backend": args.backend, "embedding": args.embedding, "docs": args.docs, "top_k": args.top_k}
+    try:
+        print(f"[1] 업로드: 기사 {args.docs}개")
+        report.update(bench_upload(articles, args.batch_size, args.chunk_size, args.threads))
+        print(f"[2] 검색: 질의 {len(queries)}개")
+        report.update(bench_search(queries, args.top_k, args.ef_search))
+        if not args.skip_bot:
+            print(f"[3] 봇: 채팅방 {args.chats}개 × 질문 {args.questions}개 ({args.llm_model})")
+            report.update(bench_bot(args.chats, args.questions, queries, args.llm_model, args.max_new_tokens))
+    finally:
+        if not args.keep_index:
+            providers.get_client().indices.delete(index=args.index, ignore=[404])
+    report["stages"] = metrics.snapshot()
+    print_report(report)
+
+    if args.save:
+        with open(os.path.join(START_DIR, args.save), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(os.path.join(START_DIR, args.compare), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n🔍 기준 결과와 비교 (허용 {args.tolerance * 100:.0f}%)")
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
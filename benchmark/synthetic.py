@@ -0,0 +1,96 @@
+import re
+import json
+import random
+import hashlib
+import numpy as np
+
+# 🧪 벤치마크용 합성 기사 / 질의 / 임베딩 모델
+
+TEAMS = ["대한민국", "일본", "미국", "멕시코", "캐나다", "브라질", "아르헨티나", "프랑스", "독일", "스페인",
+         "잉글랜드", "포르투갈", "네덜란드", "이탈리아", "크로아티아", "모로코", "세네갈", "호주", "이란", "사우디아라비아"]
+PLAYERS = ["손흥민", "이강인", "김민재", "황희찬", "조규성", "음바페", "메시", "케인", "비니시우스", "벨링엄",
+           "무시알라", "페드리", "살라", "하키미", "쿠보", "풀리시치", "데이비스", "알바레스", "그리즈만", "야말"]
+CITIES = ["뉴욕", "로스앤젤레스", "댈러스", "마이애미", "토론토", "밴쿠버", "멕시코시티", "과달라하라", "시애틀", "보스턴"]
+EVENTS = ["선제골", "동점골", "결승골", "페널티킥", "자책골", "퇴장", "부상", "교체 투입", "프리킥 골", "헤더 골"]
+STAGES = ["조별리그 1차전", "조별리그 2차전", "조별리그 3차전", "32강", "16강", "8강", "준결승", "결승"]
+
+SENTENCES = [
+    "{player}은 {city}에서 열린 {stage} {team1}와 {team2}의 경기에서 전반 {minute}분 {event}을 기록했다.",
+    "{team1} 감독은 경기 후 기자회견에서 {player}의 활약이 승부를 갈랐다고 평가했다.",
+    "이날 {city} 경기장에는 {crowd}명의 관중이 입장해 {team1}와 {team2}의 맞대결을 지켜봤다.",
+    "{team2}는 후반 {minute}분 {event}으로 반격에 나섰지만 끝내 경기를 뒤집지 못했다.",
+    "{team1}는 이번 승리로 {stage} 이후 일정에서 유리한 위치를 차지하게 됐다.",
+    "전문가들은 {player}의 컨디션이 {stage}의 가장 큰 변수가 될 것이라고 전망했다.",
+    "{team2} 대표팀은 {city}에 베이스캠프를 차리고 다음 경기를 준비한다.",
+    "경기 데이터에 따르면 {team1}의 점유율은 {share}%로 {team2}보다 높았다.",
+]
+
+def _fill(template, rng, facts):
+    return template.format(
+        minute=rng.randint(1, 90), crowd=f"{rng.randint(20, 90) * 1000:,}",
+        share=rng.randint(40, 70), **facts
+    )
+
+def make_articles(n, seed=0, sentences=12):
+    """
+    월드컵 뉴스처럼 보이는 합성 기사 n개 생성
+    반환값: [{title, datetime, content, url}, ...] (크롤러 출력과 같은 형식)
+    """
+    rng = random.Random(seed)
+    articles = []
+    for i in range(n):
+        team1, team2 = rng.sample(TEAMS, 2)
+        facts = {
+            "team1": team1, "team2": team2, "player": rng.choice(PLAYERS),
+            "city": rng.choice(CITIES), "stage": rng.choice(STAGES), "event": rng.choice(EVENTS)
+        }
+        lines = [_fill(rng.choice(SENTENCES), rng, facts) for _ in range(sentences)]
+        articles.append({
+            "title": f"[{facts['stage']}] {team1} vs {team2}, {facts['player']} {facts['event']} ({i})",
+            "datetime": f"2026-{rng.randint(6, 7):02d}-{rng.randint(1, 28):02d}",
+            "content": " ".join(lines),
+            "url": f"https://example.com/news/{i}"
+        })
+    return articles
+
+def make_queries(articles, n, seed=1):
+    """기사 제목/본문에서 뽑은 질문 n개 (같은 질의가 반복되지 않게 번호를 붙임)"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        article = rng.choice(articles)
+        sentence = rng.choice(re.split(r"(?<=\.) ", article["content"]))
+        words = sentence.split()
+        start = rng.randint(0, max(0, len(words) - 6))
+        queries.append(f"{' '.join(words[start:start + 6])} 어떻게 됐어? #{i}")
+    return queries
+
+def write_jsonl(articles, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False) + "\n")
+
+class HashingEmbedder:
+    """
+    모델 다운로드 없이 쓰는 결정적 임베딩 (문자 n-gram 해싱 → L2 정규화)
+    SentenceTransformer.encode와 같은 호출 형식을 지원
+    """
+
+    def __init__(self, dimension=384, ngram=2):
+        self.dimension = dimension
+        self.ngram = ngram
+
+    def _encode_one(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        text = re.sub(r"\s+", " ", text.lower())
+        for i in range(max(1, len(text) - self.ngram + 1)):
+            digest = hashlib.md5(text[i:i + self.ngram].encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(text) for text in texts]) if texts else np.zeros((0, self.dimension), dtype=np.float32)
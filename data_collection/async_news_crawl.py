@@ -0,0 +1,137 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import aiohttp
+from news_crawl import BING_NEWS_URL, parse_article_html, parse_search_results
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# ✅ 호스트별 동시 요청 수 제한 + 요청 간 최소 간격(politeness)
+class HostLimiter:
+    def __init__(self, per_host=2, delay=1.0):
+        self.delay = delay
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self._locks = defaultdict(asyncio.Lock)
+        self._next_time = defaultdict(float)
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        async with self._semaphores[host]:
+            loop = asyncio.get_running_loop()
+            async with self._locks[host]:
+                wait = self._next_time[host] - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_time[host] = loop.time() + self.delay
+            yield
+
+# ✅ 재시도(지수 백오프) 포함 GET → (상태 코드, 응답 헤더, 본문 텍스트) (실패 시 None)
+async def fetch(session, limiter, url, params=None, headers=None, retries=3, backoff=0.5):
+    for attempt in range(retries + 1):
+        try:
+            async with limiter.slot(url):
+                async with session.get(url, params=params, headers=headers) as res:
+                    if res.status in RETRY_STATUS:
+                        raise aiohttp.ClientResponseError(res.request_info, res.history, status=res.status)
+                    if res.status >= 400:
+                        print(f"⚠️ HTTP {res.status}: {url}")
+                        return None
+                    return res.status, res.headers, await res.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                print(f"⚠️ 요청 실패 ({retries + 1}회 시도): {url} ({e})")
+                return None
+            await asyncio.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+async def fetch_text(session, limiter, url, params=None, retries=3):
+    res = await fetch(session, limiter, url, params=params, retries=retries)
+    return res[2] if res else None
+
+# ✅ 기사 한 건 수집: 다운로드(비동기) → 본문 파싱(프로세스 풀) → (상태, 기사, 캐시에 기록할 값)
+# 새/변경 기사는 여기서 캐시에 기록하지 않음 (num_articles를 넘겨 버려지는 기사가 다음 실행에서 "변경 없음"이 되지 않도록)
+async def crawl_article(session, limiter, pool, card, retries, cache=None):
+    url = card["url"]
+    res = await fetch(session, limiter, url, headers=cache.request_headers(url) if cache else None, retries=retries)
+    if res is None:
+        return "failed", None, None
+    status, headers, html = res
+    # 304 응답이거나 HTML이 그대로면 파싱하지 않음
+    if cache and cache.is_unchanged(url, status, html if status == 200 else None):
+        return "unchanged", None, None
+    content = await asyncio.get_running_loop().run_in_executor(pool, parse_article_html, html)
+    if not content or "본문 추출 실패" in content:
+        return "failed", None, None
+    state = cache.content_state(url, content) if cache else "new"
+    if state == "unchanged":
+        # HTML은 바뀌었어도 추출한 본문이 같음 (새 ETag / HTML 해시만 갱신)
+        cache.record(url, headers, html, content)
+        return state, None, None
+    article = {"title": card["title"], "datetime": card["datetime"], "content": content, "url": url}
+    return state, article, (url, headers, html, content)
+
+async def async_bing_news_search(query, num_articles=100, search_url=BING_NEWS_URL, concurrency=16,
+                                 per_host=2, delay=1.0, retries=3, timeout=10, parse_workers=None, cache=None):
+    """
+    bing 뉴스 검색 결과의 기사들을 비동기로 동시에 수집
+    - concurrency: 전체 동시 연결 수, per_host / delay: 호스트별 동시 요청 수와 요청 간격
+    - 같은 URL은 한 번만 요청, 본문 파싱은 프로세스 풀에서 실행
+    - cache(CrawlCache)를 주면 조건부 요청으로 변경되지 않은 기사는 건너뜀
+      (이때 num_articles는 확인할 검색 결과 수)
+    반환값: [{title, datetime, content, url}, ...] (검색 결과 순서 유지, 새/변경 기사만)
+    """
+    start = time.perf_counter()
+    limiter = HostLimiter(per_host, delay)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    articles = []
+    unchanged = 0
+    seen_urls = set()
+    offset = 0
+    fetched = 0
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=client_timeout) as session:
+            while len(articles) + unchanged < num_articles:
+                # 부족한 만큼 검색 결과 페이지를 모음 (실패분을 고려해 약간 여유 있게)
+                cards = []
+                while len(cards) < (num_articles - len(articles) - unchanged) * 1.2:
+                    html = await fetch_text(session, limiter, search_url, params={"q": query, "first": offset}, retries=retries)
+                    offset += 10
+                    new_cards = [
+                        card for card in (parse_search_results(html) if html else [])
+                        if card["url"].startswith("http") and card["url"] not in seen_urls
+                    ]
+                    # 결과가 없거나 이미 본 기사만 반복되면 종료
+                    if not new_cards:
+                        break
+                    for card in new_cards:
+                        if card["url"] not in seen_urls:
+                            seen_urls.add(card["url"])
+                            cards.append(card)
+                if not cards:
+                    print("📭 더 이상 결과 없음")
+                    break
+
+                results = await asyncio.gather(*(crawl_article(session, limiter, pool, card, retries, cache) for card in cards))
+                fetched += len(cards)
+                # 검색 결과 순서대로 num_articles까지만 받고, 받은 기사만 캐시에 기록
+                for state, article, page in results:
+                    if len(articles) + unchanged >= num_articles:
+                        break
+                    if state == "unchanged":
+                        unchanged += 1
+                    elif article:
+                        articles.append(article)
+                        if cache:
+                            cache.record(*page)
+
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ 비동기 수집 완료: 새/변경 기사 {len(articles)}개, 변경 없음 {unchanged}개 "
+          f"(요청 {fetched}개, {elapsed:.1f}초, {fetched / elapsed if elapsed else 0:.1f} pages/sec)")
+    return articles
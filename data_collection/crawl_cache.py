@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import hashlib
+
+CRAWL_CACHE_PATH = "crawl_cache.json"
+OUTPUT_JSONL = "bing_articles.jsonl"
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# ✅ URL별 수집 이력 캐시 (ETag / Last-Modified / HTML·본문 해시)
+class CrawlCache:
+    """
+    재수집 시 변경되지 않은 기사를 건너뛰기 위한 디스크 캐시
+    - request_headers(): If-None-Match / If-Modified-Since 조건부 요청 헤더
+    - is_unchanged(): 304 응답이거나 HTML이 그대로면 True (본문 파싱 생략)
+    - content_state(): 파싱된 본문 해시를 비교해 "new" / "changed" / "unchanged" 반환 (기록하지 않음)
+    - record(): content_state()와 같은 값을 반환하고 이력을 기록 (실제로 내보낸 기사만 기록할 것)
+    """
+
+    def __init__(self, path=CRAWL_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def request_headers(self, url):
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, status, html=None):
+        entry = self.entries.get(url)
+        if not entry:
+            return False
+        if status == 304 or (html is not None and entry.get("html_hash") == text_hash(html)):
+            entry["checked_at"] = time.time()
+            return True
+        return False
+
+    def content_state(self, url, content):
+        entry = self.entries.get(url)
+        if entry is None:
+            return "new"
+        if entry.get("content_hash") != text_hash(content):
+            return "changed"
+        return "unchanged"
+
+    def record(self, url, headers, html, content):
+        state = self.content_state(url, content)
+        self.entries[url] = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "html_hash": text_hash(html),
+            "content_hash": text_hash(content),
+            "checked_at": time.time()
+        }
+        return state
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+# ✅ 새로 수집/변경된 기사를 JSONL에 이어 쓰기
+def append_jsonl(articles, path=OUTPUT_JSONL):
+    with open(path, "a", encoding="utf-8") as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False) + "\n")
@@ -3,52 +3,99 @@ from bs4 import BeautifulSoup
 import json
 import time
 
+BING_NEWS_URL = "https://www.bing.com/news/search"
+
+def parse_article_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # 페이지 내 모든 <p> 태그의 텍스트를 이어 붙임
+    paragraphs = soup.find_all("p")
+    content = "\n".join(
+        [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
+    )
+
+    return content if content else "본문 추출 실패"
+
 def extract_article_text(url):
     headers = {'User-Agent': 'Mozilla/5.0'}
     try:
         res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        # 페이지 내 모든 <p> 태그의 텍스트를 이어 붙임
-        paragraphs = soup.find_all("p")
-        content = "\n".join(
-            [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-        )
-
-        return content if content else "본문 추출 실패"
+        return parse_article_html(res.text)
     except Exception as e:
         return f"에러: {str(e)}"
 
-def bing_news_search(query, num_articles=100):
+def fetch_article(url, cache=None):
+    """
+    기사 한 건 수집 → (상태, 본문)
+    상태: "new" | "changed" | "unchanged"(캐시 기준 변경 없음, 본문 None) | "failed"
+    """
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    if cache:
+        headers.update(cache.request_headers(url))
+    try:
+        res = requests.get(url, headers=headers, timeout=10)
+    except Exception as e:
+        return "failed", f"에러: {str(e)}"
+    # 304 응답이거나 HTML이 그대로면 파싱하지 않음
+    if cache and cache.is_unchanged(url, res.status_code, res.text if res.status_code == 200 else None):
+        return "unchanged", None
+    content = parse_article_html(res.text)
+    if not content or "본문 추출 실패" in content:
+        return "failed", content
+    if not cache:
+        return "new", content
+    # HTML은 바뀌었어도 추출한 본문이 같으면 "unchanged"
+    state = cache.record(url, res.headers, res.text, content)
+    return state, (content if state != "unchanged" else None)
+
+def parse_search_results(html):
+    """bing 뉴스 검색 결과 페이지 → [{title, datetime, url}, ...]"""
+    soup = BeautifulSoup(html, "html.parser")
+    cards = []
+    for item in soup.select("div.news-card"):
+        title_tag = item.select_one("a.title")
+        time_tag = item.select_one("span.source")
+        cards.append({
+            "title": title_tag.text.strip() if title_tag else "제목 없음",
+            "datetime": time_tag.text.strip() if time_tag else "날짜 없음",
+            "url": title_tag['href'] if title_tag else "링크 없음"
+        })
+    return cards
+
+def bing_news_search(query, num_articles=100, search_url=BING_NEWS_URL, cache=None):
+    """
+    cache(CrawlCache)를 주면 변경되지 않은 기사는 건너뛰고 새/변경 기사만 반환
+    (이때 num_articles는 확인할 검색 결과 수)
+    """
     headers = {'User-Agent': 'Mozilla/5.0'}
     articles = []
+    unchanged = 0
     offset = 0
 
-    while len(articles) < num_articles:
-        url = f"https://www.bing.com/news/search?q={query}&first={offset}"
-        res = requests.get(url, headers=headers)
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        results = soup.select("div.news-card")
+    while len(articles) + unchanged < num_articles:
+        res = requests.get(search_url, params={"q": query, "first": offset}, headers=headers)
+        results = parse_search_results(res.text)
 
         if not results:
             print("📭 더 이상 결과 없음")
             break
 
         for item in results:
-            title_tag = item.select_one("a.title")
-            title = title_tag.text.strip() if title_tag else "제목 없음"
-            link = title_tag['href'] if title_tag else "링크 없음"
-            time_tag = item.select_one("span.source")
-            date = time_tag.text.strip() if time_tag else "날짜 없음"
+            title, date, link = item["title"], item["datetime"], item["url"]
 
             print(f"\n▶ [{len(articles)+1}] {title}")
             print(f"URL: {link}")
 
-            content = extract_article_text(link)
-            print(f"본문 길이: {len(content)}자")
+            state, content = fetch_article(link, cache)
+            if state == "unchanged":
+                print("♻️ 변경 없음, 건너뜀")
+                unchanged += 1
+                if len(articles) + unchanged >= num_articles:
+                    break
+                continue
+            print(f"본문 길이: {len(content or '')}자")
 
-            if not content or "본문 추출 실패" in content or "에러:" in content:
+            if state == "failed":
                 print("⚠️ 본문 추출 실패, 건너뜀")
                 continue
 
@@ -59,7 +106,7 @@ def bing_news_search(query, num_articles=100):
                 "url": link
             })
 
-            if len(articles) >= num_articles:
+            if len(articles) + unchanged >= num_articles:
                 break
 
             time.sleep(1)
@@ -70,8 +117,32 @@ def bing_news_search(query, num_articles=100):
     return articles
 
 if __name__ == "__main__":
-    result = bing_news_search("월드컵 2026", 200)
-    with open("bing_articles_full.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-
-    print(f"\n✅ 최종 저장된 기사 수: {len(result)}개")
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--query", default="월드컵 2026", help="검색어")
+    parser.add_argument("--num", type=int, default=200, help="수집할 기사 수")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="비동기 동시 수집 모드")
+    parser.add_argument("--incremental", action="store_true", help="수집 캐시 사용: 새/변경 기사만 JSONL에 추가")
+    args = parser.parse_args()
+
+    cache = None
+    if args.incremental:
+        from crawl_cache import CrawlCache, append_jsonl, OUTPUT_JSONL
+        cache = CrawlCache()
+
+    if args.use_async:
+        import asyncio
+        from async_news_crawl import async_bing_news_search
+        result = asyncio.run(async_bing_news_search(args.query, args.num, cache=cache))
+    else:
+        result = bing_news_search(args.query, args.num, cache=cache)
+
+    if cache:
+        append_jsonl(result)
+        cache.save()
+        print(f"\n✅ 새/변경 기사 {len(result)}개 → {OUTPUT_JSONL}에 추가")
+    else:
+        with open("bing_articles_full.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+        print(f"\n✅ 최종 저장된 기사 수: {len(result)}개")
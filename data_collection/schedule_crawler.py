@@ -1,71 +1,215 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import os
+import re
+import csv
+import json
+import time
+import argparse
+import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
+from crawl_cache import CrawlCache
 
-# 브라우저 설정
-options = webdriver.ChromeOptions()
-options.add_argument('--headless')  # 브라우저 창 띄우지 않음
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
+# FIFA 월드컵 경기 일정 기사 URL
+SCHEDULE_URL = 'https://www.fifa.com/en/tournaments/mens/worldcup/canadamexicousa2026/articles/match-schedule-fixtures-results-teams-stadiums'
+OUTPUT_CSV = "fixtures_fifa_articles.csv"
+CHANGES_JSONL = "fixtures_changes.jsonl"      # 실행마다 바뀐 경기만 이어 씀
+SCHEDULE_CACHE_PATH = "schedule_cache.json"   # ETag / Last-Modified / HTML 해시 (변경 없으면 파싱 생략)
+COLUMNS = ["날짜", "매치번호", "조", "경기장", "팀"]
+# 기사 본문 단락 클래스 (CSS 모듈 해시 접미사는 배포마다 바뀔 수 있어 앞부분만 비교)
+RICH_TEXT_CLASS = "rich-text_p"
+TEAM_SPLIT = re.compile(r"\s+(?:v|vs\.?)\s+")
 
-# Selenium 드라이버 실행
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# ---------------------- 파싱 (정적 HTML / 렌더링된 HTML 공통) ----------------------
+def _parse_match_line(line, current_date):
+    # "Match 1 – Group A – Mexico City Stadium" 또는 "Match 1 – Mexico v South Africa – Group A – Mexico City Stadium"
+    # 하이픈 종류 정리: 하이픈, en-dash 등 통일
+    clean_line = line.strip().replace(" - ", " – ").replace("–", " – ")
+    parts = [p.strip() for p in clean_line.split(" – ") if p.strip()]
+    if len(parts) < 2:
+        return None
+    match_no = parts[0].replace("Match", "").strip()
+    rest = parts[1:]
+    teams = ""
+    if len(rest) > 1 and TEAM_SPLIT.search(rest[0]):
+        teams = "|".join(t.strip() for t in TEAM_SPLIT.split(rest[0]))
+        rest = rest[1:]
+    return {
+        "날짜": current_date,
+        "매치번호": match_no,
+        "조": rest[0],
+        "경기장": rest[-1] if len(rest) >= 2 else "",
+        "팀": teams
+    }
 
-# FIFA 월드컵 경기 일정 기사 URL
-url = 'https://www.fifa.com/en/tournaments/mens/worldcup/canadamexicousa2026/articles/match-schedule-fixtures-results-teams-stadiums'
-driver.get(url)
-time.sleep(5)  # 렌더링 대기
-
-# HTML 파싱
-soup = BeautifulSoup(driver.page_source, 'html.parser')
-driver.quit()
-
-# 결과 저장 리스트
-data = []
-current_date = ""
-
-# <h4>와 <p>를 순서대로 훑으면서 날짜-경기 쌍을 추출
-for elem in soup.find_all(['h4', 'p']):
-    if elem.name == 'h4':
-        strong_tag = elem.find('strong')
-        if strong_tag:
-            current_date = strong_tag.get_text(strip=True)
-
-    elif elem.name == 'p' and 'rich-text_p__UfX5b' in elem.get('class', []):
-        lines = elem.get_text(separator="\n").split("\n")
-        for line in lines:
-            if line.strip().startswith("Match"):
+def parse_schedule_html(html):
+    """
+    경기 일정 기사 HTML → [{날짜, 매치번호, 조, 경기장, 팀}, ...]
+    <h4><strong>날짜</strong></h4> 다음의 본문 단락에서 "Match ..." 줄을 읽음
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    data = []
+    current_date = ""
+
+    # <h4>와 <p>를 순서대로 훑으면서 날짜-경기 쌍을 추출
+    for elem in soup.find_all(['h4', 'p']):
+        if elem.name == 'h4':
+            strong_tag = elem.find('strong')
+            if strong_tag:
+                current_date = strong_tag.get_text(strip=True)
+
+        elif elem.name == 'p' and any(c.startswith(RICH_TEXT_CLASS) for c in elem.get('class', [])):
+            for line in elem.get_text(separator="\n").split("\n"):
+                if not line.strip().startswith("Match"):
+                    continue
                 try:
-                    # 하이픈 종류 정리: 하이픈, en-dash 등 통일
-                    clean_line = line.strip().replace(" - ", " – ").replace("–", " – ")
-                    parts = clean_line.split(" – ")
-
-                    if len(parts) >= 3:
-                        match_no = parts[0].replace("Match", "").strip()
-                        group = parts[1].strip()
-                        stadium = parts[2].strip()
-                    elif len(parts) == 2:
-                        match_no = parts[0].replace("Match", "").strip()
-                        group = parts[1].strip()
-                        stadium = ""
-                    else:
-                        continue  # 무시
-
-                    data.append({
-                        "날짜": current_date,
-                        "매치번호": match_no,
-                        "조": group,
-                        "경기장": stadium
-                    })
+                    row = _parse_match_line(line, current_date)
                 except Exception as e:
                     print("⚠️ 파싱 실패:", line, ">>", e)
+                    continue
+                if row:
+                    data.append(row)
+    return data
+
+# ---------------------- 가져오기 ----------------------
+def fetch_static(url, cache=None, timeout=15):
+    """
+    일반 HTTP 요청으로 HTML 가져오기 → (상태, HTML, 응답 헤더)
+    상태: "ok" | "unchanged"(304 또는 HTML 그대로, HTML None)
+    """
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    if cache:
+        headers.update(cache.request_headers(url))
+    res = requests.get(url, headers=headers, timeout=timeout)
+    if cache and cache.is_unchanged(url, res.status_code, res.text if res.status_code == 200 else None):
+        return "unchanged", None, res.headers
+    res.raise_for_status()
+    return "ok", res.text, res.headers
+
+def fetch_rendered(url, wait_timeout=20):
+    """정적 HTML에 일정이 없을 때만 쓰는 대체 경로: 헤드리스 Chrome으로 렌더링 (일정 단락이 나타날 때까지 대기)"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    # 브라우저 설정
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')  # 브라우저 창 띄우지 않음
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    try:
+        driver.get(url)
+        # 고정 sleep 대신 본문 단락이 렌더링될 때까지만 대기
+        WebDriverWait(driver, wait_timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, f"p[class*='{RICH_TEXT_CLASS}']"))
+        )
+        return driver.page_source
+    finally:
+        driver.quit()
+
+def crawl(url=SCHEDULE_URL, browser="auto", cache=None):
+    """
+    browser: "auto"(정적 HTML에서 일정을 못 찾으면 Selenium) | "never" | "always"
+    반환값: (상태, 경기 목록), 상태 "unchanged"면 경기 목록 None
+    """
+    if browser != "always":
+        start = time.perf_counter()
+        state, html, headers = fetch_static(url, cache)
+        if state == "unchanged":
+            print(f"✅ 일정 페이지 변경 없음 ({time.perf_counter() - start:.2f}s)")
+            return "unchanged", None
+        data = parse_schedule_html(html)
+        print(f"[LOG] 정적 HTML: 경기 {len(data)}개 ({time.perf_counter() - start:.2f}s)")
+        if data and cache:
+            # 다음 실행에서 조건부 요청 / HTML 해시 비교에 사용
+            cache.record(url, headers, html, json.dumps(data, ensure_ascii=False))
+        if data or browser == "never":
+            return "ok", data
+        print("⚠️ 정적 HTML에 일정이 없어 브라우저로 다시 시도합니다.")
+    start = time.perf_counter()
+    data = parse_schedule_html(fetch_rendered(url))
+    print(f"[LOG] 브라우저 렌더링: 경기 {len(data)}개 ({time.perf_counter() - start:.2f}s)")
+    return "ok", data
+
+# ---------------------- 이전 CSV와 비교 ----------------------
+def _row_key(row):
+    return row["매치번호"] or f"{row['날짜']}|{row['조']}|{row['경기장']}"
+
+def load_fixtures(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return [{col: (row.get(col) or "") for col in COLUMNS} for row in csv.DictReader(f)]
+
+def diff_fixtures(old_rows, new_rows):
+    """매치번호 기준 비교 → {"added": [...], "changed": [{"before", "after"}, ...], "removed": [...]}"""
+    old = {_row_key(r): r for r in old_rows}
+    new = {_row_key(r): r for r in new_rows}
+    return {
+        "added": [r for key, r in new.items() if key not in old],
+        "changed": [{"before": old[key], "after": r} for key, r in new.items() if key in old and old[key] != r],
+        "removed": [r for key, r in old.items() if key not in new],
+    }
+
+def save_changes(changes, path=CHANGES_JSONL):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **changes}, ensure_ascii=False) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="FIFA 월드컵 경기 일정 수집 (바뀐 경기만 출력)")
+    parser.add_argument("--url", default=SCHEDULE_URL)
+    parser.add_argument("--html", help="저장된 HTML 파일을 파싱 (네트워크/브라우저 없이)")
+    parser.add_argument("--browser", choices=["auto", "never", "always"], default="auto",
+                        help="auto: 정적 HTML에서 일정을 못 찾을 때만 Selenium 사용 (기본)")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--changes", default=CHANGES_JSONL, help="바뀐 경기를 이어 쓸 JSONL")
+    args = parser.parse_args()
+
+    cache = None
+    if args.html:
+        with open(args.html, "r", encoding="utf-8") as f:
+            data = parse_schedule_html(f.read())
+    else:
+        cache = CrawlCache(SCHEDULE_CACHE_PATH)
+        if not os.path.exists(args.output):
+            # 출력 CSV가 없으면 페이지가 그대로여도 다시 파싱해서 만들어야 함
+            cache.entries.pop(args.url, None)
+        state, data = crawl(args.url, args.browser, cache)
+        if state == "unchanged":
+            cache.save()
+            return
+    if not data:
+        # 페이지 구조가 바뀌었을 가능성 → 기존 CSV를 지우지 않음
+        print("⚠️ 경기를 하나도 찾지 못했습니다. 기존 파일을 유지합니다.")
+        return
+
+    changes = diff_fixtures(load_fixtures(args.output), data)
+    if not any(changes.values()):
+        print(f"✅ 경기 {len(data)}개, 변경 없음")
+        if cache:
+            cache.save()
+        return
+    for row in changes["added"]:
+        print(f"➕ {row['매치번호']}경기 {row['날짜']} {row['조']} {row['경기장']}")
+    for change in changes["changed"]:
+        before, after = change["before"], change["after"]
+        fields = ", ".join(f"{col}: {before[col]} → {after[col]}" for col in COLUMNS if before[col] != after[col])
+        print(f"✏️ {after['매치번호']}경기 {fields}")
+    for row in changes["removed"]:
+        print(f"➖ {row['매치번호']}경기 {row['날짜']} {row['조']}")
+    save_changes(changes, args.changes)
 
-# 결과 저장
-df = pd.DataFrame(data)
-df.to_csv("fixtures_fifa_articles.csv", index=False, encoding='utf-8-sig')
+    # 결과 저장 (바뀌었을 때만 다시 씀 → 봇의 일정표 색인도 이때만 다시 읽음)
+    df = pd.DataFrame(data, columns=COLUMNS)
+    df.to_csv(args.output, index=False, encoding='utf-8-sig')
+    # 캐시는 CSV를 쓴 뒤에 저장 (쓰기에 실패하면 다음 실행에서 다시 파싱)
+    if cache:
+        cache.save()
+    print(f"✅ {len(df)}개 경기 저장 완료! (추가 {len(changes['added'])}, 변경 {len(changes['changed'])}, 삭제 {len(changes['removed'])})")
 
-print(f"✅ {len(df)}개 경기 저장 완료!")
-print(df.head())
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,293 @@
+import time
+PROCESS_START = time.perf_counter()
 import asyncio
 import sys
+import threading
 from telegram import Update
-from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
+from telegram.error import BadRequest
+from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, MessageHandler, filters
 import os
 from dotenv import load_dotenv
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
 import re
 sys.path.append(os.path.join(os.path.dirname(__file__), '../vectorDB'))
-from vector_search import search_by_vector
+from vector_search import hybrid_search, rerank, embed_query, index_generation, RERANK_CANDIDATES, warm_up as warm_up_retrieval
+from cache_utils import SemanticCache
+from providers import Lazy, format_timings, reranker_model, warm_up as warm_up_resources
+import metrics
+from fixtures import FixturesIndex
+from schedule_router import answer_schedule_question
+from admission import AdmissionController, REJECT_RATE_LIMITED, REJECT_CHAT_QUEUE_FULL, REJECT_QUEUE_FULL, REJECT_DEADLINE
 
 # ---------------------- 환경 변수 로드 ----------------------
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../.env'))
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 # CHAT_ID = -4883211398  # 모든 채팅방 지원을 위해 제거
 
-# ---------------------- LLM 모델/토크나이저 로드 ----------------------
-MODEL_NAME = "kakaocorp/kanana-1.5-2.1b-instruct-2505"
-device = "cuda" if torch.cuda.is_available() else "cpu"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, trust_remote_code=True)
-model = AutoModelForCausalLM.from_pretrained(MODEL_NAME, device_map="auto", torch_dtype="auto", trust_remote_code=True)
+# ---------------------- LLM 설정 ----------------------
+MODEL_NAME = os.getenv("LLM_MODEL_NAME", "kakaocorp/kanana-1.5-2.1b-instruct-2505")  # 벤치마크 등에서 작은 모델로 교체 가능
+RETRIEVAL_TOP_K = 5  # 검색해 올 passage 수 (실제 프롬프트 길이는 CONTEXT_TOKEN_BUDGET으로 제한)
+# 1이면 검색 후보 RERANK_CANDIDATES개(config rerank_candidates)를 cross-encoder로 재정렬해 RERANK_TOP_K개만 사용
+RERANK = os.getenv("RERANK", "0") == "1"
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "3"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))  # 참고 문서에 쓸 최대 토큰 수
+MIN_PASSAGE_TOKENS = 32  # 예산이 이보다 적게 남으면 잘린 passage를 넣지 않음
+# 모든 프롬프트가 공유하는 고정 앞부분
+PROMPT_PREFIX = "다음은 참고 문서와 사용자의 질문입니다. 아래 참고 문서 내용을 바탕으로 질문에 답변해 주세요.\n\n[참고 문서]\n"
+GEN_MAX_BATCH_SIZE = int(os.getenv("GEN_MAX_BATCH_SIZE", "8"))  # generate 한 번에 묶을 최대 질문 수
+GEN_MAX_WAIT_MS = int(os.getenv("GEN_MAX_WAIT_MS", "20"))       # 배치를 채우려고 기다리는 최대 시간
+GEN_MAX_NEW_TOKENS = int(os.getenv("GEN_MAX_NEW_TOKENS", "512"))  # 답변 하나의 최대 생성 토큰 수
+PREFIX_CACHE = os.getenv("PREFIX_CACHE", "1") == "1"           # 1이면 PROMPT_PREFIX의 KV 캐시를 한 번 만들어 재사용
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "0") == "1"       # 1이면 답변을 메시지 수정으로 스트리밍
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))  # 스트리밍 메시지 수정 최소 간격(초)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # /metrics 포트 (0이면 비활성)
+# 의미 기반 답변 캐시: 질문 임베딩이 threshold 이상 비슷하고 검색된 문서가 같으면 이전 답변 재사용
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))            # 0이면 비활성
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "300"))            # 답변 유지 시간(초)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # 코사인 유사도 기준
+# 수락 제어 (동시 실행 수 / 대기열 / 대기 시간 / 채팅방·유저별 속도 제한)
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", str(GEN_MAX_BATCH_SIZE * 2)))  # 동시에 검색+생성하는 최대 질문 수
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))       # 차례를 기다릴 수 있는 최대 질문 수
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "15"))         # 이보다 오래 기다린 질문은 버림(초)
+CHAT_MAX_PENDING = int(os.getenv("CHAT_MAX_PENDING", "4"))                # 채팅방 하나의 최대 처리/대기 질문 수
+CHAT_RATE_PER_MIN = int(os.getenv("CHAT_RATE_PER_MIN", "20"))             # 채팅방별 분당 질문 수 (0이면 제한 없음)
+USER_RATE_PER_MIN = int(os.getenv("USER_RATE_PER_MIN", "6"))              # 유저별 분당 질문 수 (0이면 제한 없음)
+# 일정 질문은 경기 일정표에서 바로 답변 (0이면 모든 질문을 RAG + LLM으로)
+SCHEDULE_FAST_PATH = os.getenv("SCHEDULE_FAST_PATH", "1") == "1"
+FIXTURES_CSV = os.getenv("FIXTURES_CSV", os.path.join(os.path.dirname(__file__), '../data_collection/fixtures_fifa_articles.csv'))
+# 답변에서 이 패턴 이후는 프롬프트 잔여물 → 생성도 여기서 멈춤
+STOP_PATTERNS = [
+    '\n[', '\n참고', '\n질문', '\n답변', '\nQ:', '\nA:', '\n---', '\n출처', '\nReference', '\n[참고', '\n[출처', '\n[질문', '\n[답변'
+]
+
+# ---------------------- LLM 모델/토크나이저 (지연 로드) ----------------------
+def _load_tokenizer():
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, trust_remote_code=True)
+    # 배치 생성을 위해 왼쪽 패딩 사용
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+def _load_model():
+    import torch
+    from transformers import AutoModelForCausalLM
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"[LOG] LLM 로드 중 ({MODEL_NAME}, device: {device})")
+    return AutoModelForCausalLM.from_pretrained(MODEL_NAME, device_map="auto", torch_dtype="auto", trust_remote_code=True)
+
+llm_tokenizer = Lazy("llm_tokenizer", _load_tokenizer)
+llm_model = Lazy("llm_model", _load_model)
+
+# ---------------------- 답변 캐시 (인덱스를 다시 올리면 전체 무효화) ----------------------
+answer_cache = SemanticCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_THRESHOLD)
+metrics.register_gauge("answer_cache_hits", lambda: answer_cache.hits)
+metrics.register_gauge("answer_cache_misses", lambda: answer_cache.misses)
+NO_ANSWER = "관련 문서에서 답을 찾지 못했습니다."
+
+# ---------------------- 수락 제어 ----------------------
+admission = AdmissionController(
+    max_active=ADMISSION_MAX_ACTIVE,
+    max_queue=ADMISSION_QUEUE_SIZE,
+    max_wait=ADMISSION_MAX_WAIT,
+    chat_max_pending=CHAT_MAX_PENDING,
+    chat_rate=CHAT_RATE_PER_MIN,
+    user_rate=USER_RATE_PER_MIN,
+)
+metrics.register_gauge("admission_active", lambda: admission.active)
+metrics.register_gauge("admission_queue_size", lambda: admission.queued)
+BUSY_MESSAGES = {
+    REJECT_RATE_LIMITED: "🐢 질문이 너무 잦습니다. 잠시 후 다시 질문해 주세요.",
+    REJECT_CHAT_QUEUE_FULL: "⏳ 이 채팅방의 이전 질문을 처리하고 있습니다. 답변을 받은 뒤 다시 질문해 주세요.",
+    REJECT_QUEUE_FULL: "⏳ 지금 질문이 많아 바로 답변할 수 없습니다. 잠시 후 다시 질문해 주세요.",
+    REJECT_DEADLINE: "⏳ 지금 질문이 많아 바로 답변할 수 없습니다. 잠시 후 다시 질문해 주세요.",
+}
+
+# ---------------------- 경기 일정표 (파일이 바뀌면 자동으로 다시 읽음) ----------------------
+fixtures_index = FixturesIndex(FIXTURES_CSV)
+
+# ---------------------- 준비 상태 ----------------------
+generation_scheduler = None      # 모델 로드 후 생성
+bot_ready = threading.Event()    # 모델/검색 준비 완료 여부
+startup_timings = {}             # 시작 단계별 소요 시간(초)
+
+def warm_up_models():
+    """검색(OpenSearch/임베딩) + LLM 로드 → {단계: 소요 시간(초)}"""
+    timings = dict(warm_up_retrieval())
+    if RERANK:
+        timings.update(warm_up_resources(reranker_model))
+    for resource in (llm_tokenizer, llm_model):
+        resource.get()
+        timings[resource.name] = resource.load_seconds
+    return timings
+
+# ---------------------- 참고 문서 패킹 ----------------------
+def pack_context(results, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    점수가 높은 passage부터 실제 토크나이저 기준 budget 토큰 안에 채워 넣음
+    반환값: (프롬프트용 참고 문서 텍스트, 사용된 문서 목록)
+    """
+    blocks, used_docs, used = [], [], 0
+    for doc in sorted(results, key=lambda d: d["score"], reverse=True):
+        passage = doc["content"].strip()
+        if not passage:
+            continue
+        block = f"[{len(blocks) + 1}] {doc['title']}\n{passage}"
+        ids = llm_tokenizer.get()(block, add_special_tokens=False).input_ids
+        remaining = budget - used
+        if len(ids) > remaining:
+            if remaining < MIN_PASSAGE_TOKENS:
+                continue
+            # 마지막 passage는 남은 예산만큼 잘라서 넣음
+            ids = ids[:remaining]
+            block = llm_tokenizer.get().decode(ids, skip_special_tokens=True)
+        blocks.append(block)
+        used_docs.append(doc)
+        used += len(ids)
+    return "\n\n".join(blocks), used_docs
+
+def build_prompt(context_text, user_input):
+    return f"{PROMPT_PREFIX}{context_text}\n\n[질문]\n{user_input}\n\n[답변]"
 
 # ---------------------- 답변 후처리 함수 ----------------------
-def postprocess_llm_answer(answer, links, user_input=None):
-    # EOS/불필요한 반복/프롬프트 잔여물 자르기
-    stop_patterns = [
-        '\n[', '\n참고', '\n질문', '\n답변', '\nQ:', '\nA:', '\n---', '\n출처', '\nReference', '\n[참고', '\n[출처', '\n[질문', '\n[답변'
-    ]
+def cut_at_stop_patterns(answer):
+    """첫 번째 중단 패턴 앞까지만 남김 → (잘린 답변, 패턴 발견 여부)"""
     min_idx = len(answer)
-    for pat in stop_patterns:
+    for pat in STOP_PATTERNS:
         idx = answer.find(pat)
         if idx != -1 and idx < min_idx:
             min_idx = idx
-    answer = answer[:min_idx].strip()
+    return answer[:min_idx].strip(), min_idx < len(answer)
+
+def postprocess_llm_answer(answer, links, user_input=None):
+    # EOS/불필요한 반복/프롬프트 잔여물 자르기
+    answer, _ = cut_at_stop_patterns(answer)
     # 답변 내 URL 제거(출처는 마지막에만)
     url_pattern = r'https?://\S+'
     answer = re.sub(url_pattern, '', answer)
     # 답변이 너무 짧거나, 질문의 키워드만 반복하거나, '없다'/'알 수 없다' 등 부정적 답변이면 안내
     if not answer or len(answer) < 10 or (user_input and user_input.strip() in answer):
-        return "관련 문서에서 답을 찾지 못했습니다."
+        return NO_ANSWER
     if any(x in answer for x in ["모르", "없", "알 수 없", "정보가 없습니다", "자료가 없습니다", "확인되지 않", "제공되지 않"]):
-        return "관련 문서에서 답을 찾지 못했습니다."
+        return NO_ANSWER
     # 마지막에 [참고 링크] 한 번만 출력
     links = [l for l in links if l]
     if links:
         answer = answer.strip() + '\n\n[참고 링크]\n' + '\n'.join(f"{i+1}. {l}" for i, l in enumerate(links))
     return answer.strip()
 
+def retrieve(user_input):
+    """하이브리드 검색 (+ 재정렬) → (결과, 질문 임베딩, 인덱스 generation), 임베딩은 검색 때 캐시된 값을 재사용"""
+    if RERANK:
+        # 시간 예산(config rerank_budget_ms)을 넘기면 검색 순서 그대로 RERANK_TOP_K개
+        results = rerank(user_input, hybrid_search(user_input, top_k=RERANK_CANDIDATES) or [], top_k=RERANK_TOP_K)
+    else:
+        results = hybrid_search(user_input, top_k=RETRIEVAL_TOP_K) or []
+    return results, embed_query(user_input), index_generation()
+
+def retrieve_and_pack(user_input):
+    """검색 → 참고 문서 패킹 (토크나이저 호출이 이벤트 루프를 막지 않도록 둘 다 워커 스레드에서 실행)"""
+    with metrics.timer("retrieval"):
+        results, embedding, generation = retrieve(user_input)
+    with metrics.timer("context_pack"):
+        context_text, used_docs = pack_context(results)
+    return context_text, used_docs, embedding, generation
+
+def remember_answer(embedding, doc_ids, generation, answer):
+    # 답을 못 찾은 경우는 저장하지 않음 (다음 패러프레이즈에서 다시 생성)
+    if answer != NO_ANSWER:
+        answer_cache.put(embedding, answer, tag=doc_ids, generation=generation)
+
+# ---------------------- 스트리밍 답변 ----------------------
+async def safe_edit(message, text):
+    # 내용이 같을 때 나는 "message is not modified" 오류 등은 무시
+    try:
+        await message.edit_text(text)
+    except BadRequest as e:
+        print(f"[WARN] 메시지 수정 실패: {e}")
+
+async def stream_answer(update, context, prompt):
+    """자리표시 메시지를 먼저 보내고, 생성되는 텍스트로 STREAM_EDIT_INTERVAL마다 수정"""
+    loop = asyncio.get_running_loop()
+    placeholder = await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text="⏳ 답변 생성 중...",
+        reply_to_message_id=update.message.message_id,
+    )
+    answer, shown = "", ""
+    last_edit = loop.time()
+    stream = generation_scheduler.stream(prompt)
+    try:
+        async for piece in stream:
+            answer += piece
+            partial, stopped = cut_at_stop_patterns(answer)
+            if stopped:
+                # 이후 토큰은 후처리에서 잘려 나가므로 더 기다리지 않음
+                break
+            if partial and partial != shown and loop.time() - last_edit >= STREAM_EDIT_INTERVAL:
+                await safe_edit(placeholder, partial + " ▌")
+                shown = partial
+                last_edit = loop.time()
+    finally:
+        # 중간에 멈추거나(중단 패턴 / 메시지 수정 오류 / 취소) 끝나도 생성 작업을 바로 정리
+        await stream.aclose()
+    return placeholder, answer
+
 # ---------------------- Telegram Handler ----------------------
+async def answer_question(update, context, user_input, answer_start):
+    """검색 → 참고 문서 패킹 → (답변 캐시) → LLM 생성 → 전송"""
+    # BM25 + 벡터 하이브리드 검색 → 토큰 예산 안에서 참고 passage 채우기
+    context_text, used_docs, embedding, generation = await asyncio.get_running_loop().run_in_executor(
+        None, retrieve_and_pack, user_input
+    )
+    # 검색 결과 없으면 바로 안내
+    if not used_docs:
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text="관련 문서를 찾지 못했습니다.",
+            reply_to_message_id=update.message.message_id,
+        )
+        return
+    # 비슷한 질문 + 프롬프트에 들어가는 passage가 같으면 생성 없이 이전 답변 전송
+    # (검색 순서나 예산 밖으로 밀려난 passage가 달라도 같은 프롬프트 문서면 적중)
+    doc_ids = frozenset(doc["id"] for doc in used_docs)
+    cached_answer = answer_cache.get(embedding, tag=doc_ids, generation=generation)
+    if cached_answer:
+        with metrics.timer("telegram_send"):
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=cached_answer,
+                reply_to_message_id=update.message.message_id,
+            )
+        metrics.observe("answer_total_seconds", time.perf_counter() - answer_start)
+        return
+    # 참고 링크 (같은 기사의 passage는 한 번만)
+    links = list(dict.fromkeys(doc['url'] for doc in used_docs if doc['url']))
+    prompt = build_prompt(context_text, user_input)
+    if STREAM_ANSWERS:
+        # 생성되는 대로 메시지를 수정해서 보여줌 (첫 토큰까지의 체감 지연 감소)
+        placeholder, answer = await stream_answer(update, context, prompt)
+        with metrics.timer("postprocess"):
+            answer = postprocess_llm_answer(answer, links, user_input)
+        remember_answer(embedding, doc_ids, generation, answer)
+        with metrics.timer("telegram_send"):
+            await safe_edit(placeholder, answer)
+        metrics.observe("answer_total_seconds", time.perf_counter() - answer_start)
+        return
+    # LLM 증강 답변 생성 (다른 채팅의 질문과 배치로 묶여 워커 스레드에서 실행)
+    with metrics.timer("generation"):
+        answer = await generation_scheduler.submit(prompt)
+    with metrics.timer("postprocess"):
+        answer = postprocess_llm_answer(answer, links, user_input)
+    remember_answer(embedding, doc_ids, generation, answer)
+    with metrics.timer("telegram_send"):
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=answer,
+            reply_to_message_id=update.message.message_id,
+        )
+    metrics.observe("answer_total_seconds", time.perf_counter() - answer_start)
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # 모든 채팅방/유저의 메시지에 응답
@@ -60,60 +300,121 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_input = (update.message.text or "").strip()
         if not user_input:
             return
-        # 벡터 유사도 검색 호출
-        results = await asyncio.get_running_loop().run_in_executor(
-            None, lambda: search_by_vector(user_input, top_k=3)
-        )
-        # 검색 결과 없으면 바로 안내
-        if not results or all(not doc['url'] for doc in results):
+        # 일정 질문 빠른 경로: 모델 로드 전에도 동작, 애매하면 None → 아래 RAG + LLM
+        if SCHEDULE_FAST_PATH:
+            with metrics.timer("schedule_route"):
+                schedule_answer = answer_schedule_question(user_input, fixtures_index)
+            if schedule_answer:
+                metrics.inc("schedule_fast_path_total")
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=schedule_answer,
+                    reply_to_message_id=update.message.message_id,
+                )
+                return
+        if not bot_ready.is_set():
             await context.bot.send_message(
                 chat_id=chat_id,
-                text="관련 문서를 찾지 못했습니다.",
+                text="🔄 모델을 불러오는 중입니다. 잠시 후 다시 질문해 주세요.",
                 reply_to_message_id=update.message.message_id,
             )
             return
-        # 참고 링크 프롬프트 생성
-        links = [doc['url'] for doc in results if doc['url']]
-        context_text = "\n".join([
-            f"{i+1}. {doc['url']}" for i, doc in enumerate(results) if doc['url']
-        ])
-        prompt = f"다음은 참고 문서 링크와 사용자의 질문입니다. 아래 링크들을 참고해서 질문에 답변해 주세요.\n\n[참고 문서 링크]\n{context_text}\n\n[질문]\n{user_input}\n\n[답변]"
-        # LLM 증강 답변 생성 (generate 직접 사용)
-        input_ids = tokenizer(prompt, return_tensors="pt").input_ids.to(model.device)
-        eos_token_id = tokenizer.eos_token_id
-        with torch.no_grad():
-            output_ids = model.generate(
-                input_ids,
-                max_new_tokens=512,
-                do_sample=True,
-                temperature=0.7,
-                eos_token_id=eos_token_id,
-                pad_token_id=tokenizer.pad_token_id if tokenizer.pad_token_id is not None else eos_token_id,
+        answer_start = time.perf_counter()
+        # 수락 제어: 속도 제한 / 대기열이 꽉 참 / 너무 오래 기다림 → 바로 "바쁨" 안내
+        ticket, reason = admission.admit(chat_id, user_id)
+        if ticket is not None:
+            with metrics.timer("admission_wait"):
+                if not await admission.wait(ticket):
+                    reason = REJECT_DEADLINE
+        if reason:
+            metrics.inc(f"requests_shed_{reason}_total")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=BUSY_MESSAGES[reason],
+                reply_to_message_id=update.message.message_id,
             )
-        answer = tokenizer.decode(output_ids[0][input_ids.shape[1]:], skip_special_tokens=True).strip()
-        answer = postprocess_llm_answer(answer, links, user_input)
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=answer,
-            reply_to_message_id=update.message.message_id,
-        )
+            return
+        try:
+            await answer_question(update, context, user_input, answer_start)
+        finally:
+            admission.release(ticket)
     except Exception as e:
+        metrics.inc("answer_errors_total")
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=f"⚠️ 답변 생성 중 오류가 발생했습니다.\n{e}",
             reply_to_message_id=update.message.message_id,
         )
 
+async def handle_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if bot_ready.is_set():
+        text = "✅ 준비 완료\n" + format_timings("시작 소요 시간", startup_timings)
+    else:
+        text = "🔄 모델을 불러오는 중입니다."
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
+
+# ---------------------- 시작/종료 ----------------------
+async def warm_up_and_start():
+    """모델 로드(워커 스레드) → 생성 스케줄러 시작 → 준비 완료 표시"""
+    global generation_scheduler
+    try:
+        timings = await asyncio.get_running_loop().run_in_executor(None, warm_up_models)
+    except Exception as e:
+        print(f"[ERROR] 모델 로드 실패: {e}")
+        return
+    from generation_scheduler import GenerationScheduler
+    tokenizer = llm_tokenizer.get()
+    generation_scheduler = GenerationScheduler(
+        llm_model.get(),
+        tokenizer,
+        max_batch_size=GEN_MAX_BATCH_SIZE,
+        max_wait_ms=GEN_MAX_WAIT_MS,
+        stop_patterns=STOP_PATTERNS,
+        prefix=PROMPT_PREFIX if PREFIX_CACHE else None,
+        max_new_tokens=GEN_MAX_NEW_TOKENS,
+        do_sample=True,
+        temperature=0.7,
+        eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    await generation_scheduler.start()
+    metrics.register_gauge("generation_queue_size", lambda: generation_scheduler.stats()["queue_size"])
+    startup_timings.update(timings)
+    startup_timings["total_to_ready"] = time.perf_counter() - PROCESS_START
+    bot_ready.set()
+    print(format_timings("봇 준비 완료 (READY)", startup_timings))
+
+async def on_startup(application):
+    # 폴링은 바로 시작하고, 모델은 백그라운드에서 로드
+    application.create_task(warm_up_and_start())
+
+async def on_shutdown(application):
+    if generation_scheduler:
+        await generation_scheduler.stop()
+
 # ---------------------- Main ----------------------
 def main() -> None:
     if not TOKEN:
         print("[ERROR] TELEGRAM_TOKEN 환경변수가 설정되어 있지 않습니다. .env 파일을 확인하세요.")
         sys.exit(1)
-    application = ApplicationBuilder().token(TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        # 핸들러를 동시에 실행 (동시 처리량은 수락 제어가 제한)
+        .concurrent_updates(True)
+        .build()
+    )
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT)
+        print(f"[LOG] 지표: http://127.0.0.1:{METRICS_PORT}/metrics")
+    application.add_handler(CommandHandler("status", handle_status))
     application.add_handler(
         MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message)
     )
-    print("Bot polling…")
+    startup_timings["import_and_init"] = time.perf_counter() - PROCESS_START
+    print(f"Bot polling… (모델 로드 중, 준비되면 READY 출력 / {startup_timings['import_and_init']:.2f}s)")
     application.run_polling()
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+# ---------------------- 요청 수락 제어 (RAG + LLM 파이프라인 앞단) ----------------------
+# - 전체 대기열 크기 제한: 꽉 차면 바로 "바쁨" 응답 (무한히 쌓이지 않게)
+# - 채팅방별 공정 스케줄링: 대기 중인 채팅방을 돌아가며 하나씩 처리 (바쁜 단체방이 다른 방을 막지 않게)
+# - 채팅방/유저별 속도 제한 (토큰 버킷)과 채팅방별 대기 개수 제한
+# - 너무 오래 기다린 요청은 처리하지 않고 버림 (deadline)
+
+REJECT_RATE_LIMITED = "rate_limited"
+REJECT_CHAT_QUEUE_FULL = "chat_queue_full"
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_DEADLINE = "deadline"
+
+class TokenBucket:
+    """분당 rate개, 최대 burst개까지 몰아서 허용"""
+
+    def __init__(self, rate_per_minute, burst, now=None):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.tokens = burst
+        # admit()에서 잰 시각으로 시작해야 첫 take()에서 경과 시간이 음수가 되지 않음
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class Ticket:
+    def __init__(self, chat_id, deadline):
+        self.chat_id = chat_id
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+        self.active = False
+
+class AdmissionController:
+    """
+    사용법:
+        ticket, reason = controller.admit(chat_id, user_id)   # reason이 있으면 거절됨
+        if await controller.wait(ticket):                      # False면 deadline 초과로 버려짐
+            try: ... 파이프라인 실행 ...
+            finally: controller.release(ticket)
+    - max_active: 동시에 파이프라인을 실행할 최대 요청 수
+    - max_queue: 실행을 기다릴 수 있는 최대 요청 수 (전체)
+    - max_wait: 대기 허용 시간(초), 넘으면 버림
+    - chat_max_pending: 채팅방 하나가 동시에 가질 수 있는 요청 수 (실행 중 + 대기)
+    - chat_rate / user_rate: 채팅방 / 유저별 분당 허용 요청 수 (0이면 제한 없음), burst는 몰아서 허용할 개수
+    """
+
+    def __init__(self, max_active=16, max_queue=64, max_wait=15.0, chat_max_pending=4,
+                 chat_rate=20, user_rate=6, burst=3, max_buckets=10000):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.chat_max_pending = chat_max_pending
+        self.chat_rate = chat_rate
+        self.user_rate = user_rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self.active = 0
+        self.queued = 0
+        self.shed = {REJECT_RATE_LIMITED: 0, REJECT_CHAT_QUEUE_FULL: 0, REJECT_QUEUE_FULL: 0, REJECT_DEADLINE: 0}
+        self._waiting = OrderedDict()  # 채팅방 → 대기 중인 Ticket deque (순서 = 다음 차례)
+        self._pending = {}             # 채팅방 → 실행 중 + 대기 중 요청 수
+        self._buckets = OrderedDict()  # (종류, ID) → TokenBucket (오래 안 쓴 것부터 정리)
+
+    def _allow(self, kind, key, rate, now):
+        if not rate or key is None:
+            return True
+        bucket = self._buckets.pop((kind, key), None) or TokenBucket(rate, self.burst, now)
+        self._buckets[(kind, key)] = bucket
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return bucket.take(now)
+
+    def _reject(self, reason):
+        self.shed[reason] += 1
+        return None, reason
+
+    def admit(self, chat_id, user_id=None):
+        """요청 수락 → (Ticket, None), 거절 → (None, 이유)"""
+        now = time.monotonic()
+        if not (self._allow("chat", chat_id, self.chat_rate, now) and self._allow("user", user_id, self.user_rate, now)):
+            return self._reject(REJECT_RATE_LIMITED)
+        if self._pending.get(chat_id, 0) >= self.chat_max_pending:
+            return self._reject(REJECT_CHAT_QUEUE_FULL)
+        if self.active >= self.max_active and self.queued >= self.max_queue:
+            return self._reject(REJECT_QUEUE_FULL)
+        ticket = Ticket(chat_id, now + self.max_wait)
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        self._waiting.setdefault(chat_id, deque()).append(ticket)
+        self.queued += 1
+        self._dispatch()
+        return ticket, None
+
+    def _dispatch(self):
+        """빈 자리가 있는 동안 대기 중인 채팅방을 돌아가며 하나씩 실행 허가"""
+        now = time.monotonic()
+        while self.active < self.max_active and self._waiting:
+            chat_id, tickets = next(iter(self._waiting.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._waiting.move_to_end(chat_id)
+            else:
+                del self._waiting[chat_id]
+            self.queued -= 1
+            if now >= ticket.deadline:
+                # 너무 오래 기다린 요청
+                self._finish(chat_id)
+                self.shed[REJECT_DEADLINE] += 1
+                ticket.future.set_result(False)
+                continue
+            ticket.active = True
+            self.active += 1
+            ticket.future.set_result(True)
+
+    def _finish(self, chat_id):
+        left = self._pending.get(chat_id, 1) - 1
+        if left:
+            self._pending[chat_id] = left
+        else:
+            self._pending.pop(chat_id, None)
+
+    def _unqueue(self, ticket):
+        # 대기열에서 바로 빼서 자리를 비움
+        tickets = self._waiting.get(ticket.chat_id)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            self.queued -= 1
+            if not tickets:
+                del self._waiting[ticket.chat_id]
+            self._finish(ticket.chat_id)
+
+    async def wait(self, ticket):
+        """실행 차례가 오면 True, deadline까지 차례가 오지 않으면 False"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(ticket.future), ticket.deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            if ticket.future.done():
+                return ticket.future.result()
+            self._unqueue(ticket)
+            self.shed[REJECT_DEADLINE] += 1
+            ticket.future.set_result(False)
+            return False
+        except asyncio.CancelledError:
+            # 핸들러가 취소됨: 이미 차례를 받았으면 반납, 아니면 대기열에서 제거
+            if ticket.active:
+                self.release(ticket)
+            else:
+                self._unqueue(ticket)
+                if not ticket.future.done():
+                    ticket.future.cancel()
+            raise
+
+    def release(self, ticket):
+        """실행이 끝난 요청의 자리 반납 → 다음 요청 실행"""
+        if ticket.active:
+            ticket.active = False
+            self.active -= 1
+            self._finish(ticket.chat_id)
+        self._dispatch()
+
+    def stats(self):
+        return {"active": self.active, "queued": self.queued, "chats_waiting": len(self._waiting), "shed": dict(self.shed)}
@@ -0,0 +1,130 @@
+import os
+import re
+import csv
+import threading
+from datetime import datetime
+
+# ---------------------- 경기 일정표 (fixtures_fifa_articles.csv) 메모리 색인 ----------------------
+# schedule_crawler.py가 만든 CSV(날짜, 매치번호, 조, 경기장 + 선택: 팀 'A|B' 또는 대진 'A v B')를
+# 한 번 읽어 날짜/팀/조/경기장/매치번호로 색인
+# 파일이 바뀌면(mtime) 다음 조회 때 다시 읽음
+
+DATE_FORMATS = ("%Y-%m-%d", "%A %d %B %Y", "%A, %d %B %Y", "%d %B %Y", "%B %d, %Y", "%A %B %d, %Y")
+TEAM_SPLIT = re.compile(r"\s+(?:v|vs\.?|VS)\s+")
+
+def parse_date(text):
+    """'Thursday 11 June 2026' 같은 날짜 → '2026-06-11' (알 수 없는 형식이면 None)"""
+    text = re.sub(r"\s+", " ", (text or "").strip())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def normalize_name(text):
+    return re.sub(r"\s+", " ", (text or "").strip()).lower()
+
+def _parse_teams(*fields):
+    # 'Mexico v South Africa' 처럼 대진이 들어 있는 칸이 있으면 팀 목록으로 사용
+    for field in fields:
+        parts = TEAM_SPLIT.split(field or "")
+        if len(parts) == 2 and all(parts):
+            return [p.strip() for p in parts]
+    return []
+
+def _parse_row(row):
+    match_no = re.sub(r"\D", "", row.get("매치번호", ""))
+    group = (row.get("조") or "").strip()
+    teams = [t.strip() for t in (row.get("팀") or "").split("|") if t.strip()] or _parse_teams(group, row.get("대진"))
+    if teams and TEAM_SPLIT.search(group):
+        # 조 칸에 대진이 들어 있던 경우 (조 정보 없음)
+        group = ""
+    return {
+        "date": parse_date(row.get("날짜")),
+        "date_text": (row.get("날짜") or "").strip(),
+        "match_no": int(match_no) if match_no else None,
+        "group": group,
+        "stadium": (row.get("경기장") or "").strip(),
+        "teams": teams,
+    }
+
+class _Snapshot:
+    """한 번 읽은 일정표와 색인 (조회 중 교체돼도 안전하도록 통째로 바꿈)"""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.by_date, self.by_team, self.by_group, self.by_stadium, self.by_match = {}, {}, {}, {}, {}
+        for i, fixture in enumerate(fixtures):
+            if fixture["date"]:
+                self.by_date.setdefault(fixture["date"], []).append(i)
+            for team in fixture["teams"]:
+                self.by_team.setdefault(normalize_name(team), []).append(i)
+            if fixture["group"]:
+                self.by_group.setdefault(normalize_name(fixture["group"]), []).append(i)
+            if fixture["stadium"]:
+                self.by_stadium.setdefault(normalize_name(fixture["stadium"]), []).append(i)
+            if fixture["match_no"] is not None:
+                self.by_match.setdefault(fixture["match_no"], []).append(i)
+
+class FixturesIndex:
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self._snapshot = _Snapshot([])
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """파일이 처음이거나 바뀌었으면 다시 읽음 → 현재 색인 반환"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._snapshot
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    with open(self.path, "r", encoding="utf-8-sig", newline="") as f:
+                        fixtures = [_parse_row(row) for row in csv.DictReader(f)]
+                    self._snapshot = _Snapshot(fixtures)
+                    self._stamp = stamp
+                    print(f"[LOG] 경기 일정 {len(fixtures)}개 로드: {self.path}")
+        return self._snapshot
+
+    @property
+    def teams(self):
+        return list(self.refresh().by_team)
+
+    @property
+    def stadiums(self):
+        return list(self.refresh().by_stadium)
+
+    def lookup(self, date=None, team=None, group=None, stadium=None, match_no=None):
+        """
+        조건을 모두 만족하는 경기 목록 (매치번호 순)
+        - team / stadium은 일정표 이름의 일부만 맞아도 됨 (예: 'dallas' → 'Dallas Stadium')
+        """
+        snapshot = self.refresh()
+        candidates = None
+
+        def narrow(rows):
+            nonlocal candidates
+            rows = set(rows)
+            candidates = rows if candidates is None else candidates & rows
+
+        if date:
+            narrow(snapshot.by_date.get(date, []))
+        if match_no is not None:
+            narrow(snapshot.by_match.get(match_no, []))
+        if group:
+            narrow(snapshot.by_group.get(normalize_name(group), []))
+        if team:
+            team = normalize_name(team)
+            narrow(i for name, rows in snapshot.by_team.items() if team in name for i in rows)
+        if stadium:
+            stadium = normalize_name(stadium)
+            narrow(i for name, rows in snapshot.by_stadium.items() if stadium in name for i in rows)
+        if candidates is None:
+            return []
+        fixtures = [snapshot.fixtures[i] for i in candidates]
+        return sorted(fixtures, key=lambda f: (f["match_no"] is None, f["match_no"] or 0, f["date"] or ""))
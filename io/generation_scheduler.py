@@ -0,0 +1,329 @@
+import asyncio
+import copy
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+import metrics
+
+# ---------------------- 중단 패턴 기반 조기 종료 ----------------------
+class StopOnPatterns(StoppingCriteria):
+    """
+    생성된 텍스트에 중단 패턴(예: '\n[참고')이 나오면 해당 시퀀스 생성을 멈춤
+    (어차피 후처리에서 잘려 나갈 토큰을 더 생성하지 않기 위함)
+    """
+
+    def __init__(self, tokenizer, prompt_length, patterns, window=12):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.patterns = patterns
+        self.window = window  # 매 스텝 마지막 window개 토큰만 디코딩해서 확인
+
+    def __call__(self, input_ids, scores, **kwargs):
+        tails = self.tokenizer.batch_decode(input_ids[:, max(self.prompt_length, input_ids.shape[1] - self.window):])
+        done = [any(pat in tail for pat in self.patterns) for tail in tails]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+class StopOnEvent(StoppingCriteria):
+    """event가 설정되면 모든 시퀀스 생성을 멈춤 (스트리밍을 받던 쪽이 중간에 그만둔 경우)"""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+# ---------------------- prefill / decode 시간 측정 ----------------------
+class StepTimer(StoppingCriteria):
+    """
+    generate의 각 스텝 시각을 기록 (생성은 멈추지 않음)
+    첫 호출 시점 = prefill + 첫 토큰 완료, 이후 호출 = decode 스텝
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.steps = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.steps += 1
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+    def record(self):
+        if self.first is None:
+            return
+        end = time.perf_counter()
+        metrics.observe("llm_prefill_seconds", self.first - self.start)
+        decode_seconds = end - self.first
+        metrics.observe("llm_decode_seconds", decode_seconds)
+        if self.steps > 1 and decode_seconds > 0:
+            metrics.observe("llm_decode_tokens_per_second", (self.steps - 1) / decode_seconds, metrics.RATE_BUCKETS)
+
+# ---------------------- 고정 프롬프트 앞부분 KV 캐시 ----------------------
+# 앞부분 뒤에 이어지는 프롬프트 예시 (참고 문서 → 질문 → 답변 순서)
+PREFIX_CHECK_SAMPLE = "[1] 참고 문서 제목\n참고 문서 본문입니다.\n\n[질문]\n내일 경기 일정 알려줘\n\n[답변]"
+
+def expand_cache(cache, batch_size):
+    """미리 계산한 past_key_values를 배치 크기만큼 복사 (generate가 캐시를 덮어쓰므로 매번 새로 복사)"""
+    cache = copy.deepcopy(cache)
+    if batch_size > 1:
+        if isinstance(cache, tuple):
+            # 예전 transformers의 (key, value) 튜플 형식
+            cache = tuple(tuple(t.repeat_interleave(batch_size, dim=0) for t in layer) for layer in cache)
+        else:
+            cache.batch_repeat_interleave(batch_size)
+    return cache
+
+# 앞부분 캐시 자체가 모델/transformers 버전과 맞지 않을 때 나는 오류 메시지 (이때만 캐시를 끔)
+CACHE_INCOMPATIBLE_HINTS = ("past_key_values", "cache", "shape", "size mismatch", "must match the size", "dimension")
+
+def is_cache_incompatible(error):
+    """앞부분 캐시와 모델이 맞지 않아 생긴 오류인지 (OOM / 취소 같은 일시적 오류는 False)"""
+    message = str(error).lower()
+    if "out of memory" in message or isinstance(error, MemoryError):
+        return False
+    if isinstance(error, TypeError):
+        # 예: generate가 past_key_values 형식(튜플/Cache)을 받지 못함
+        return True
+    return isinstance(error, (ValueError, RuntimeError, IndexError, AttributeError)) and \
+        any(hint in message for hint in CACHE_INCOMPATIBLE_HINTS)
+
+# ---------------------- LLM 생성 배치 스케줄러 ----------------------
+class GenerationScheduler:
+    """
+    여러 핸들러에서 들어온 프롬프트를 asyncio 큐로 모아 패딩된 배치로 generate 실행
+    - max_batch_size: 한 번의 generate에 묶을 최대 프롬프트 수
+    - max_wait_ms: 첫 요청이 들어온 뒤 배치를 채우려고 기다리는 최대 시간
+    - stop_patterns: 생성 텍스트에 나오면 해당 시퀀스 생성을 멈출 패턴 목록
+    - prefix: 모든 프롬프트가 공유하는 고정 앞부분 → start()에서 한 번 prefill해 두고 요청마다 재사용 (None이면 끔)
+    - prefix_check_sample: 앞부분 뒤에 붙는 프롬프트 예시 (앞부분을 따로 토크나이즈해도 되는지 start()에서 확인)
+    - stream_readers: 스트리밍 텍스트 조각을 읽는 전용 스레드 수 (검색 등이 쓰는 기본 executor와 분리)
+    - generate는 전용 워커 스레드 1개에서 실행되어 이벤트 루프를 막지 않음
+    """
+
+    STREAM_POLL_SECONDS = 0.05  # 스트리밍 조각 읽기 1회 최대 대기 (읽기 스레드를 오래 붙잡지 않음)
+
+    def __init__(self, model, tokenizer, max_batch_size=8, max_wait_ms=20, stop_patterns=None, prefix=None,
+                 prefix_check_sample=PREFIX_CHECK_SAMPLE, stream_readers=2, **generate_kwargs):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.stop_patterns = stop_patterns
+        self.prefix = prefix
+        self.prefix_check_sample = prefix_check_sample
+        self._prefix_ids = None    # (1 × 앞부분 토큰 수)
+        self._prefix_cache = None  # 앞부분의 past_key_values
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.generate_kwargs = generate_kwargs
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generate")
+        self._stream_executor = ThreadPoolExecutor(max_workers=stream_readers, thread_name_prefix="stream-read")
+        # 처리량 통계
+        self.answers = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+
+    async def start(self):
+        if self.prefix:
+            await self.run_exclusive(self.build_prefix_cache)
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+        self._stream_executor.shutdown(wait=False)
+
+    async def submit(self, prompt):
+        """프롬프트 하나를 큐에 넣고 생성된 답변(프롬프트 제외 텍스트)을 기다림"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future))
+        return await future
+
+    async def stream(self, prompt):
+        """
+        프롬프트 하나를 생성하면서 텍스트 조각을 순서대로 yield (TextIteratorStreamer 사용)
+        받는 쪽이 중간에 그만두면(aclose / 취소) 생성을 멈추게 하고 백그라운드 생성 작업을 정리
+        """
+        loop = asyncio.get_running_loop()
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                        timeout=self.STREAM_POLL_SECONDS)
+        cancel = threading.Event()
+        task = asyncio.ensure_future(self.run_exclusive(self._generate_streaming, prompt, streamer, cancel))
+        finished = False
+        try:
+            while True:
+                piece = await loop.run_in_executor(self._stream_executor, self._read_piece, streamer)
+                # 생성 작업이 시작 전에 취소되면 종료 신호가 오지 않으므로 작업 상태도 확인
+                if piece is StopIteration or (piece is None and task.done() and streamer.text_queue.empty()):
+                    break
+                if piece is not None:
+                    yield piece
+            finished = True
+        finally:
+            if finished:
+                await task  # 생성 중 예외가 있었다면 여기서 전파
+            else:
+                # 실행 중이면 StopOnEvent로 다음 스텝에서 멈추고, 아직 대기 중이면 실행하지 않음
+                cancel.set()
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    @staticmethod
+    def _read_piece(streamer):
+        """조각 하나 → 문자열 / 끝이면 StopIteration / 아직 없으면 None"""
+        try:
+            return next(streamer)
+        except StopIteration:
+            return StopIteration
+        except queue.Empty:
+            return None
+
+    async def run_exclusive(self, fn, *args):
+        """배치 generate와 같은 워커 스레드에서 fn 실행 (모델 동시 접근 방지)"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # 이미 취소된 요청은 생성하지 않음
+        return [(prompt, future) for prompt, future in batch if not future.cancelled()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                answers = await self.run_exclusive(self._generate_batch, prompts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), answer in zip(batch, answers):
+                if not future.done():
+                    future.set_result(answer)
+
+    def prefix_tokenizes_separately(self, ids):
+        """
+        앞부분 토큰 + (특수 토큰 없이) 나머지 토큰 == 전체 프롬프트 토큰 인지 확인
+        경계에서 토큰이 합쳐지는 토크나이저(예: 앞부분 끝 '\n' + 나머지 첫 '[')면 캐시를 쓰면 안 됨
+        """
+        full = self.tokenizer(self.prefix + self.prefix_check_sample).input_ids
+        rest = self.tokenizer(self.prefix_check_sample, add_special_tokens=False).input_ids
+        return list(full) == ids[0].tolist() + list(rest)
+
+    def build_prefix_cache(self):
+        """고정 앞부분을 한 번 prefill해서 past_key_values 보관 (모델 로드당 1번)"""
+        start = time.perf_counter()
+        ids = self.tokenizer(self.prefix, return_tensors="pt").input_ids.to(self.model.device)
+        if not self.prefix_tokenizes_separately(ids):
+            print("[WARN] 앞부분과 나머지를 따로 토크나이즈한 결과가 전체 프롬프트와 달라 앞부분 KV 캐시를 끕니다")
+            metrics.inc("prefix_cache_disabled_total")
+            return
+        with torch.no_grad():
+            self._prefix_cache = self.model(input_ids=ids, use_cache=True).past_key_values
+        self._prefix_ids = ids
+        print(f"[LOG] 프롬프트 앞부분 KV 캐시 준비: {ids.shape[1]}토큰, {time.perf_counter() - start:.2f}초")
+
+    def _generate_kwargs(self, prompt_length, step_timer, cancel=None):
+        kwargs = dict(self.generate_kwargs)
+        criteria = [step_timer]
+        if cancel is not None:
+            criteria.append(StopOnEvent(cancel))
+        if self.stop_patterns:
+            criteria.append(StopOnPatterns(self.tokenizer, prompt_length, self.stop_patterns))
+        kwargs["stopping_criteria"] = StoppingCriteriaList(criteria)
+        return kwargs
+
+    def _tokenize(self, prompts, use_prefix=True):
+        with metrics.timer("llm_tokenize"):
+            if not use_prefix or self._prefix_cache is None or not all(p.startswith(self.prefix) for p in prompts):
+                return self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+            # 앞부분 토큰 + (왼쪽 패딩된) 나머지 토큰: 패딩이 앞부분과 나머지 사이에 들어가도
+            # attention_mask 기준으로 위치가 계산되므로 캐시된 앞부분 위치(0 ~ n-1)와 어긋나지 않음
+            rest = self.tokenizer([p[len(self.prefix):] for p in prompts], return_tensors="pt",
+                                  padding=True, add_special_tokens=False).to(self.model.device)
+            prefix_ids = self._prefix_ids.expand(len(prompts), -1)
+            return {
+                "input_ids": torch.cat([prefix_ids, rest["input_ids"]], dim=1),
+                "attention_mask": torch.cat([torch.ones_like(prefix_ids), rest["attention_mask"]], dim=1),
+                "past_key_values": expand_cache(self._prefix_cache, len(prompts)),
+            }
+
+    def _generate(self, prompts, use_prefix=True, cancel=None, **extra):
+        """
+        토크나이즈 → generate → (입력, 출력 토큰)
+        앞부분 캐시를 쓴 generate가 실패하면 이번 호출만 캐시 없이 다시 생성
+        (캐시가 모델과 맞지 않는 오류일 때만 이후 호출에서도 캐시를 끔)
+        """
+        inputs = self._tokenize(prompts, use_prefix)
+        step_timer = StepTimer()
+        try:
+            with torch.no_grad():
+                output_ids = self.model.generate(**inputs, **extra, **self._generate_kwargs(inputs["input_ids"].shape[1], step_timer, cancel))
+        except Exception as e:
+            # 캐시를 안 썼거나, 취소됐거나, 스트리밍으로 이미 토큰을 내보낸 뒤면 다시 생성하지 않음
+            if "past_key_values" not in inputs or isinstance(e, CancelledError) or ("streamer" in extra and step_timer.steps):
+                raise
+            if is_cache_incompatible(e):
+                print(f"[WARN] 프롬프트 앞부분 KV 캐시를 쓸 수 없어 끄고 다시 생성합니다: {type(e).__name__}: {e}")
+                self._prefix_cache = None
+                metrics.inc("prefix_cache_disabled_total")
+            else:
+                print(f"[WARN] 앞부분 KV 캐시로 생성 실패 → 이번 요청만 캐시 없이 다시 생성합니다: {type(e).__name__}: {e}")
+                metrics.inc("prefix_cache_retries_total")
+            return self._generate(prompts, use_prefix=False, cancel=cancel, **extra)
+        step_timer.record()
+        return inputs, output_ids
+
+    def _generate_streaming(self, prompt, streamer, cancel):
+        if cancel.is_set():
+            streamer.end()
+            return
+        try:
+            self._generate([prompt], cancel=cancel, streamer=streamer)
+        except BaseException:
+            # 예외가 나도 소비 쪽 반복이 끝나도록 종료 신호 전달
+            streamer.end()
+            raise
+
+    def _generate_batch(self, prompts):
+        start = time.perf_counter()
+        # tokenizer.padding_side = "left" 여야 배치 내 모든 프롬프트 뒤에 바로 생성이 이어짐
+        inputs, output_ids = self._generate(prompts)
+        metrics.observe("llm_batch_size", len(prompts), metrics.RATE_BUCKETS)
+        new_tokens = output_ids[:, inputs["input_ids"].shape[1]:]
+        answers = [a.strip() for a in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+        self.busy_seconds += time.perf_counter() - start
+        self.batches += 1
+        self.answers += len(prompts)
+        return answers
+
+    def stats(self):
+        return {
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "prefix_cache_tokens": self._prefix_ids.shape[1] if self._prefix_cache is not None else 0,
+            "answers": self.answers,
+            "batches": self.batches,
+            "avg_batch_size": self.answers / self.batches if self.batches else 0.0,
+            "answers_per_sec": self.answers / self.busy_seconds if self.busy_seconds else 0.0
+        }
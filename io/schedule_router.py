@@ -0,0 +1,157 @@
+import re
+from datetime import date, timedelta
+
+# ---------------------- 일정 질문 빠른 경로 ----------------------
+# 규칙 기반 의도 분류: 일정 질문이면 경기 일정표(FixturesIndex)에서 바로 답변, 아니면 None → RAG + LLM
+
+TOURNAMENT_YEAR = 2026
+MAX_LISTED = 12  # 답변에 나열할 최대 경기 수
+
+SCHEDULE_KEYWORDS = ("일정", "언제", "몇 시", "몇시", "어디서", "어디에서", "경기장", "스케줄", "대진", "몇 경기",
+                     "무슨 경기", "어떤 경기", "경기 있", "경기 뭐", "경기는", "경기 알려")
+# 결과/분석/전망처럼 일정표로 답할 수 없는 질문은 RAG로 보냄
+OPEN_ENDED_KEYWORDS = ("왜", "어떻게", "결과", "이겼", "졌", "스코어", "골", "분석", "전망", "예상", "평가", "부상", "명단", "감독", "선수")
+
+TEAM_ALIASES = {
+    "대한민국": "korea republic", "한국": "korea republic", "일본": "japan", "미국": "usa", "멕시코": "mexico",
+    "캐나다": "canada", "브라질": "brazil", "아르헨티나": "argentina", "프랑스": "france", "독일": "germany",
+    "스페인": "spain", "잉글랜드": "england", "포르투갈": "portugal", "네덜란드": "netherlands", "벨기에": "belgium",
+    "크로아티아": "croatia", "모로코": "morocco", "세네갈": "senegal", "호주": "australia", "이란": "ir iran",
+    "사우디아라비아": "saudi arabia", "사우디": "saudi arabia", "우루과이": "uruguay", "콜롬비아": "colombia",
+    "에콰도르": "ecuador", "스위스": "switzerland", "오스트리아": "austria", "노르웨이": "norway", "카타르": "qatar",
+    "요르단": "jordan", "우즈베키스탄": "uzbekistan", "이집트": "egypt", "튀니지": "tunisia", "알제리": "algeria",
+    "가나": "ghana", "남아공": "south africa", "남아프리카공화국": "south africa", "파라과이": "paraguay",
+    "뉴질랜드": "new zealand", "스코틀랜드": "scotland", "코트디부아르": "côte d'ivoire", "카보베르데": "cabo verde",
+    "파나마": "panama", "아이티": "haiti", "퀴라소": "curaçao",
+}
+CITY_ALIASES = {
+    "멕시코시티": "mexico city", "과달라하라": "guadalajara", "몬테레이": "monterrey", "토론토": "toronto",
+    "밴쿠버": "vancouver", "뉴욕": "new york", "뉴저지": "new jersey", "로스앤젤레스": "los angeles", "LA": "los angeles",
+    "댈러스": "dallas", "휴스턴": "houston", "캔자스시티": "kansas city", "애틀랜타": "atlanta", "마이애미": "miami",
+    "보스턴": "boston", "필라델피아": "philadelphia", "시애틀": "seattle", "샌프란시스코": "san francisco",
+}
+
+# 별칭 바로 뒤에 붙어도 되는 조사/접미어 (예: '한국의', '이란이랑', '뉴욕에서') — 그 밖의 한글이 이어지면 다른 단어
+# ('대진이란', '가나요'가 이란/가나로 잡히지 않도록)
+_PARTICLES = ("은", "는", "이", "가", "의", "와", "과", "랑", "이랑", "하고", "도", "을", "를", "에", "에서",
+              "전", "팀", "대표팀", "경기", "경기장", "와의", "과의")
+
+def _alias_pattern(alias):
+    """별칭을 단어 단위로 찾는 정규식 (한글은 앞 글자/뒤 조사 확인, 영어는 대소문자 무시)"""
+    if re.fullmatch(r"[A-Z]{2,3}", alias):
+        # 'LA' 같은 약어는 대문자 단독 토큰만 ('PLAYER', 'LAFC'는 아님)
+        return re.compile(rf"(?<![A-Za-z]){alias}(?![A-Za-z])")
+    if re.search(r"[가-힣]", alias):
+        return re.compile(rf"(?<![가-힣A-Za-z]){re.escape(alias)}(?=(?:{'|'.join(_PARTICLES)})?(?![가-힣]))")
+    return re.compile(rf"(?<![A-Za-z]){re.escape(alias)}(?![A-Za-z])", re.IGNORECASE)
+
+# 도시는 영어 이름('Los Angeles')으로도 찾음
+_CITY_PATTERNS = [(_alias_pattern(alias), city) for alias, city in
+                  list(CITY_ALIASES.items()) + [(city, city) for city in dict.fromkeys(CITY_ALIASES.values())]]
+_TEAM_PATTERNS = [(_alias_pattern(alias), team) for alias, team in TEAM_ALIASES.items()]
+
+_GROUP_RE = re.compile(r"(?:([A-La-l])\s*조|(?:그룹|group)\s*([A-La-l])\b)", re.IGNORECASE)
+_MATCH_RE = re.compile(r"(?:(\d{1,3})(?:\s*번\s*)?(?:경기|매치)|(?:매치|match)\s*(\d{1,3}))", re.IGNORECASE)
+_ISO_DATE_RE = re.compile(r"(20\d\d)-(\d{1,2})-(\d{1,2})")
+_KO_DATE_RE = re.compile(r"(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+_SLASH_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})\b")
+_RELATIVE_DAYS = {"오늘": 0, "내일": 1, "모레": 2, "어제": -1}
+_WEEKDAYS = "월화수목금토일"
+
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def parse_question(text, known_teams=(), today=None):
+    """질문에서 날짜/팀/조/경기장/매치번호 추출 → {필드: 값} (찾은 것만)"""
+    today = today or date.today()
+    found = {}
+    m = _ISO_DATE_RE.search(text) or _KO_DATE_RE.search(text) or _SLASH_DATE_RE.search(text)
+    if m:
+        parts = [int(x) for x in m.groups()]
+        day = _safe_date(*parts) if len(parts) == 3 else _safe_date(TOURNAMENT_YEAR, *parts)
+        if day:
+            found["date"] = day.isoformat()
+        # 날짜 숫자가 매치번호로 잡히지 않도록 제거
+        text = text[:m.start()] + " " + text[m.end():]
+    else:
+        for word, offset in _RELATIVE_DAYS.items():
+            if word in text:
+                found["date"] = (today + timedelta(days=offset)).isoformat()
+                break
+
+    m = _GROUP_RE.search(text)
+    if m:
+        found["group"] = f"Group {(m.group(1) or m.group(2)).upper()}"
+    m = _MATCH_RE.search(text)
+    if m:
+        found["match_no"] = int(m.group(1) or m.group(2))
+
+    # 도시 이름을 먼저 찾아 지움 (예: '멕시코시티'가 팀 '멕시코'로 잡히지 않도록)
+    for pattern, city in _CITY_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            found["stadium"] = city
+            text = text[:m.start()] + " " + text[m.end():]
+            break
+    lowered = text.lower()
+    # 질문에서 가장 먼저 나오는 팀 (같은 위치면 긴 별칭, 예: '남아프리카공화국'이 '남아공'보다 먼저)
+    matches = [(m.start(), -len(m.group()), team) for pattern, team in _TEAM_PATTERNS for m in [pattern.search(text)] if m]
+    if matches:
+        found["team"] = min(matches)[2]
+    else:
+        for team in known_teams:
+            if re.search(rf"\b{re.escape(team)}\b", lowered):
+                found["team"] = team
+                break
+    return found
+
+def is_schedule_question(text):
+    if any(word in text for word in OPEN_ENDED_KEYWORDS):
+        return False
+    return any(word in text for word in SCHEDULE_KEYWORDS)
+
+def format_fixture(fixture):
+    parts = [f"{fixture['match_no']}경기" if fixture["match_no"] is not None else "경기"]
+    if fixture["teams"]:
+        parts.append(" vs ".join(fixture["teams"]))
+    if fixture["group"]:
+        parts.append(fixture["group"])
+    if fixture["stadium"]:
+        parts.append(fixture["stadium"])
+    return " | ".join(parts)
+
+def _format_day(iso):
+    if not iso:
+        return "날짜 미정"
+    d = date.fromisoformat(iso)
+    return f"{d.month}월 {d.day}일 ({_WEEKDAYS[d.weekday()]})"
+
+def format_answer(fixtures):
+    lines = ["📅 경기 일정"]
+    current = object()
+    for fixture in fixtures[:MAX_LISTED]:
+        if fixture["date"] != current:
+            current = fixture["date"]
+            lines.append(f"\n[{_format_day(current) if current else fixture['date_text'] or '날짜 미정'}]")
+        lines.append(f"- {format_fixture(fixture)}")
+    if len(fixtures) > MAX_LISTED:
+        lines.append(f"\n… 외 {len(fixtures) - MAX_LISTED}경기")
+    return "\n".join(lines)
+
+def answer_schedule_question(text, fixtures_index, today=None):
+    """
+    일정표로 답할 수 있는 질문이면 답변 문자열, 아니면 None
+    (의도가 애매하거나 맞는 경기가 없으면 None → 기존 RAG + LLM 경로)
+    """
+    if not is_schedule_question(text):
+        return None
+    query = parse_question(text, fixtures_index.teams, today)
+    if not query:
+        return None
+    fixtures = fixtures_index.lookup(**query)
+    if not fixtures:
+        return None
+    return format_answer(fixtures)
@@ -0,0 +1,198 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "io"))
+
+from admission import (
+    REJECT_CHAT_QUEUE_FULL, REJECT_DEADLINE, REJECT_QUEUE_FULL, REJECT_RATE_LIMITED,
+    AdmissionController, TokenBucket,
+)
+
+def run(coro):
+    # Ticket이 실행 중인 이벤트 루프에서 future를 만들기 때문에 루프 안에서 실행
+    return asyncio.run(coro)
+
+def controller(**kwargs):
+    # 기본값: 속도 제한 없음 (필요한 테스트에서만 켬)
+    options = {"max_active": 1, "max_queue": 8, "max_wait": 5.0, "chat_max_pending": 8, "chat_rate": 0, "user_rate": 0}
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+def admitted(ticket, reason):
+    assert reason is None
+    return ticket
+
+# ---------------------- 채팅방별 공정 스케줄링 ----------------------
+def test_round_robin_across_chats():
+    async def scenario():
+        ctl = controller()
+        order = []
+        tickets = {}
+        for name, chat_id in [("a1", "A"), ("a2", "A"), ("a3", "A"), ("a4", "A"), ("b1", "B"), ("c1", "C")]:
+            tickets[name] = admitted(*ctl.admit(chat_id))
+        while tickets:
+            running = [name for name, ticket in tickets.items() if ticket.active]
+            assert len(running) == 1  # max_active=1
+            order.append(running[0])
+            assert await ctl.wait(tickets[running[0]]) is True
+            ctl.release(tickets.pop(running[0]))
+        return ctl, order
+
+    ctl, order = run(scenario())
+    # 바쁜 채팅방 A가 먼저 4개를 넣어도 B, C가 A의 나머지보다 먼저 차례를 받음
+    assert order == ["a1", "a2", "b1", "c1", "a3", "a4"]
+    assert ctl.stats() == {"active": 0, "queued": 0, "chats_waiting": 0, "shed": {
+        REJECT_RATE_LIMITED: 0, REJECT_CHAT_QUEUE_FULL: 0, REJECT_QUEUE_FULL: 0, REJECT_DEADLINE: 0}}
+    assert ctl._pending == {}
+
+def test_chat_max_pending():
+    async def scenario():
+        ctl = controller(chat_max_pending=2)
+        admitted(*ctl.admit("A"))
+        admitted(*ctl.admit("A"))
+        assert ctl.admit("A") == (None, REJECT_CHAT_QUEUE_FULL)
+        # 다른 채팅방은 영향 없음
+        return ctl, ctl.admit("B")
+
+    ctl, (ticket, reason) = run(scenario())
+    assert ticket is not None and reason is None
+    assert ctl.shed[REJECT_CHAT_QUEUE_FULL] == 1
+
+# ---------------------- 전체 대기열 크기 제한 ----------------------
+def test_queue_full_rejected_until_slot_frees():
+    async def scenario():
+        ctl = controller(max_active=1, max_queue=2)
+        first = admitted(*ctl.admit("A"))
+        admitted(*ctl.admit("B"))
+        admitted(*ctl.admit("C"))
+        assert (ctl.active, ctl.queued) == (1, 2)
+        rejected = ctl.admit("D")
+        assert rejected == (None, REJECT_QUEUE_FULL)
+        assert "D" not in ctl._pending and "D" not in ctl._waiting
+        # 실행이 끝나 대기열에 자리가 생기면 다시 받음
+        ctl.release(first)
+        assert (ctl.active, ctl.queued) == (1, 1)
+        return ctl, ctl.admit("D")
+
+    ctl, (ticket, reason) = run(scenario())
+    assert ticket is not None and reason is None
+    assert ctl.shed[REJECT_QUEUE_FULL] == 1
+
+# ---------------------- deadline 초과 ----------------------
+def test_deadline_timeout_frees_queue_slot():
+    async def scenario():
+        ctl = controller(max_active=1, max_queue=1, max_wait=0.05)
+        first = admitted(*ctl.admit("A"))
+        late = admitted(*ctl.admit("B"))
+        assert ctl.admit("C") == (None, REJECT_QUEUE_FULL)
+        # 실행 중인 요청이 끝나지 않아 B는 deadline까지 차례를 받지 못함
+        assert await ctl.wait(late) is False
+        assert not late.active and late.future.result() is False
+        # _unqueue로 대기열과 채팅방별 개수에서 빠짐
+        assert (ctl.active, ctl.queued) == (1, 0)
+        assert "B" not in ctl._waiting and "B" not in ctl._pending
+        waiting = admitted(*ctl.admit("C"))
+        ctl.release(first)
+        assert waiting.active
+        # 이미 끝난 요청은 나중에 release해도 자리 수가 바뀌지 않음
+        ctl.release(late)
+        assert ctl.active == 1
+        return ctl
+
+    ctl = run(scenario())
+    assert ctl.shed[REJECT_DEADLINE] == 1
+
+def test_expired_ticket_skipped_on_dispatch():
+    async def scenario():
+        ctl = controller(max_active=1, max_wait=0.05)
+        first = admitted(*ctl.admit("A"))
+        stale = admitted(*ctl.admit("B"))
+        await asyncio.sleep(0.1)
+        fresh = admitted(*ctl.admit("C"))
+        # 자리가 났을 때 deadline이 지난 B는 건너뛰고 C를 실행
+        ctl.release(first)
+        assert stale.future.result() is False and not stale.active
+        assert fresh.active
+        assert await ctl.wait(stale) is False
+        return ctl
+
+    ctl = run(scenario())
+    assert ctl.shed[REJECT_DEADLINE] == 1
+    assert ctl._pending == {"C": 1}
+
+def test_cancelled_wait_leaves_queue():
+    async def scenario():
+        ctl = controller(max_active=1)
+        first = admitted(*ctl.admit("A"))
+        queued = admitted(*ctl.admit("B"))
+        task = asyncio.ensure_future(ctl.wait(queued))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert (ctl.active, ctl.queued) == (1, 0)
+        assert "B" not in ctl._pending
+        ctl.release(first)
+        return ctl
+
+    ctl = run(scenario())
+    assert ctl.stats()["active"] == 0
+
+# ---------------------- 속도 제한 ----------------------
+def test_token_bucket_burst_and_refill():
+    bucket = TokenBucket(rate_per_minute=60, burst=2)
+    now = bucket.updated
+    assert bucket.take(now) and bucket.take(now)
+    assert not bucket.take(now)
+    # 분당 60개 = 초당 1개 충전
+    assert not bucket.take(now + 0.5)
+    assert bucket.take(now + 1.0)
+    # 오래 쉬어도 burst 이상 쌓이지 않음
+    later = now + 600
+    assert bucket.take(later) and bucket.take(later)
+    assert not bucket.take(later)
+
+def test_first_request_allowed_with_burst_one():
+    # 새 버킷이 admit()이 잰 시각보다 늦게 만들어져도 첫 요청은 통과해야 함 (회귀 테스트)
+    async def scenario():
+        ctl = controller(chat_rate=6, user_rate=6, burst=1)
+        return ctl.admit("A", "u1")
+
+    ticket, reason = run(scenario())
+    assert ticket is not None and reason is None
+
+def test_rate_limited_per_user_and_chat():
+    async def scenario():
+        ctl = controller(max_active=16, chat_rate=0, user_rate=1, burst=2)
+        assert admitted(*ctl.admit("A", "u1"))
+        assert admitted(*ctl.admit("B", "u1"))
+        # 같은 유저는 채팅방이 달라도 burst를 넘으면 거절
+        assert ctl.admit("C", "u1") == (None, REJECT_RATE_LIMITED)
+        assert admitted(*ctl.admit("C", "u2"))
+        # 거절된 요청은 대기열/채팅방별 개수에 잡히지 않음
+        assert "C" in ctl._pending and ctl._pending["C"] == 1
+        # 시간이 지나 토큰이 다시 차면 허용 (분당 1개)
+        ctl._buckets[("user", "u1")].updated -= 60
+        assert admitted(*ctl.admit("C", "u1"))
+
+        chat = controller(max_active=16, chat_rate=1, user_rate=0, burst=1)
+        assert admitted(*chat.admit("A", "u1"))
+        assert chat.admit("A", "u2") == (None, REJECT_RATE_LIMITED)
+        return ctl, chat
+
+    ctl, chat = run(scenario())
+    assert ctl.shed[REJECT_RATE_LIMITED] == 1
+    assert chat.shed[REJECT_RATE_LIMITED] == 1
+
+def test_rate_buckets_are_bounded():
+    async def scenario():
+        ctl = controller(max_active=64, max_queue=64, chat_rate=0, user_rate=6, max_buckets=3)
+        for user in range(10):
+            admitted(*ctl.admit(f"chat{user}", f"u{user}"))
+        return ctl
+
+    ctl = run(scenario())
+    assert list(ctl._buckets) == [("user", "u7"), ("user", "u8"), ("user", "u9")]
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "data_collection"))
+
+from async_news_crawl import HostLimiter, async_bing_news_search, fetch
+from crawl_cache import CrawlCache
+
+# ---------------------- 로컬 stub 서버 (bing 검색 결과 페이지 + 기사 페이지) ----------------------
+PAGE_SIZE = 10
+
+class StubState:
+    def __init__(self, articles=30, duplicates=False, article_delay=0.0):
+        self.articles = articles
+        self.duplicates = duplicates      # True면 페이지마다 앞 페이지의 기사 하나를 다시 넣음
+        self.article_delay = article_delay
+        self.contents = {i: f"기사 {i} 본문입니다." for i in range(articles)}
+        self.failures = {}                # 경로 → [차례대로 돌려줄 오류 상태 코드]
+        self.requests = {}                # 경로 → 요청 횟수
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def search_page(self, base, first):
+        ids = list(range(first, min(first + PAGE_SIZE, self.articles)))
+        if self.duplicates and ids and first:
+            ids.insert(0, first - 1)
+        cards = "".join(
+            f'<div class="news-card"><a class="title" href="{base}/article/{i}">제목 {i}</a>'
+            f'<span class="source">2026-06-{i % 28 + 1:02d}</span></div>'
+            for i in ids
+        )
+        return f"<html><body>{cards}</body></html>"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        state = self.server.state
+        parts = urlsplit(self.path)
+        with state.lock:
+            state.requests[parts.path] = state.requests.get(parts.path, 0) + 1
+            failures = state.failures.get(parts.path)
+            status = failures.pop(0) if failures else None
+        if status:
+            self._send(status, "busy")
+            return
+        if parts.path == "/news/search":
+            first = int(parse_qs(parts.query).get("first", ["0"])[0])
+            self._send(200, state.search_page(f"http://{self.headers['Host']}", first))
+        elif parts.path.startswith("/article/"):
+            with state.lock:
+                state.active += 1
+                state.max_active = max(state.max_active, state.active)
+            try:
+                time.sleep(state.article_delay)
+                article_id = int(parts.path.rsplit("/", 1)[1])
+                content = state.contents[article_id]
+                etag = f'"{hash(content) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, None, {"ETag": etag})
+                else:
+                    self._send(200, f"<html><body><p>{content}</p></body></html>", {"ETag": etag})
+            finally:
+                with state.lock:
+                    state.active -= 1
+        else:
+            self._send(404, "not found")
+
+    def _send(self, status, body, headers=None):
+        data = body.encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body is not None:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.state = StubState()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def crawl(stub, num, cache=None, **kwargs):
+    kwargs.setdefault("delay", 0)
+    kwargs.setdefault("parse_workers", 1)
+    return asyncio.run(async_bing_news_search("월드컵", num, search_url=f"{stub.base}/news/search", cache=cache, **kwargs))
+
+def article_urls(stub, ids):
+    return [f"{stub.base}/article/{i}" for i in ids]
+
+# ---------------------- 수집 / 중복 제거 ----------------------
+def test_collects_articles_in_search_order(stub):
+    articles = crawl(stub, 12)
+    assert [a["url"] for a in articles] == article_urls(stub, range(12))
+    assert articles[0]["content"] == "기사 0 본문입니다."
+
+def test_duplicate_urls_are_fetched_once(stub):
+    stub.state.duplicates = True
+    articles = crawl(stub, 25)
+    urls = [a["url"] for a in articles]
+    assert len(urls) == len(set(urls)) == 25
+    assert all(count == 1 for path, count in stub.state.requests.items() if path.startswith("/article/"))
+
+# ---------------------- 재시도 / 백오프 ----------------------
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_fetch_retries_retryable_status(stub, status):
+    stub.state.failures["/article/0"] = [status, status]
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await fetch(session, HostLimiter(delay=0), f"{stub.base}/article/0", retries=3, backoff=0.01)
+
+    status_code, _, html = asyncio.run(run())
+    assert status_code == 200 and "기사 0" in html
+    assert stub.state.requests["/article/0"] == 3
+
+def test_fetch_gives_up_after_retries(stub):
+    stub.state.failures["/article/0"] = [503] * 10
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await fetch(session, HostLimiter(delay=0), f"{stub.base}/article/0", retries=2, backoff=0.01)
+
+    assert asyncio.run(run()) is None
+    assert stub.state.requests["/article/0"] == 3
+
+def test_fetch_does_not_retry_client_errors(stub):
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await fetch(session, HostLimiter(delay=0), f"{stub.base}/missing", retries=3, backoff=0.01)
+
+    assert asyncio.run(run()) is None
+    assert stub.state.requests["/missing"] == 1
+
+def test_crawl_recovers_from_transient_errors(stub):
+    stub.state.failures["/article/3"] = [429]
+    stub.state.failures["/news/search"] = [502]
+    articles = crawl(stub, 5)
+    assert [a["url"] for a in articles] == article_urls(stub, range(5))
+    assert stub.state.requests["/article/3"] == 2
+
+# ---------------------- 호스트별 동시 요청 제한 ----------------------
+@pytest.mark.parametrize("per_host", [1, 2])
+def test_per_host_concurrency_limit(stub, per_host):
+    stub.state.article_delay = 0.05
+    crawl(stub, 8, per_host=per_host, concurrency=16)
+    assert stub.state.max_active == per_host
+
+def test_host_limiter_spaces_requests():
+    async def run():
+        limiter = HostLimiter(per_host=4, delay=0.05)
+        loop = asyncio.get_running_loop()
+        times = []
+
+        async def one():
+            async with limiter.slot("http://example.test/a"):
+                times.append(loop.time())
+
+        await asyncio.gather(*(one() for _ in range(4)))
+        return sorted(times)
+
+    times = asyncio.run(run())
+    assert all(b - a >= 0.04 for a, b in zip(times, times[1:]))
+
+# ---------------------- 증분 수집 (캐시) ----------------------
+def test_incremental_run_skips_unchanged_articles(stub, tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl_cache.json"))
+    assert len(crawl(stub, 10, cache)) == 10
+    cache.save()
+
+    cache = CrawlCache(str(tmp_path / "crawl_cache.json"))
+    assert crawl(stub, 10, cache) == []
+
+    stub.state.contents[4] = "기사 4 수정된 본문입니다."
+    changed = crawl(stub, 10, cache)
+    assert [a["url"] for a in changed] == article_urls(stub, [4])
+    assert changed[0]["content"] == "기사 4 수정된 본문입니다."
+
+def test_cache_records_only_returned_articles(stub, tmp_path):
+    # 검색 결과는 10개 단위로 받아오므로 num_articles를 넘는 기사도 내려받게 됨
+    cache = CrawlCache(str(tmp_path / "crawl_cache.json"))
+    articles = crawl(stub, 12, cache)
+    assert len(articles) == 12
+    assert sorted(cache.entries) == sorted(article_urls(stub, range(12)))
+
+    # 버려졌던 기사는 다음 실행에서 새 기사로 수집됨
+    articles = crawl(stub, 20, cache)
+    assert [a["url"] for a in articles] == article_urls(stub, range(12, 20))
@@ -0,0 +1,129 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "vectorDB"))
+
+import cache_utils
+from cache_utils import SemanticCache
+
+DIM = 8
+
+def unit(i, noise=0.0):
+    # i번째 축 방향 벡터 (noise를 주면 코사인 유사도가 1보다 조금 낮은 패러프레이즈)
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i] = 1.0
+    vector[(i + 1) % DIM] = noise
+    return vector
+
+@pytest.fixture
+def clock(monkeypatch):
+    # cache_utils가 보는 time.monotonic만 바꿔서 TTL / 마지막 사용 시각을 직접 조절
+    fake = types.SimpleNamespace(now=1000.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(cache_utils, "time", fake)
+    return fake
+
+@pytest.fixture
+def cache(clock):
+    return SemanticCache(maxsize=3, ttl=60, threshold=0.95)
+
+def slot_of(cache, value):
+    return [i for i, entry in enumerate(cache._entries) if entry is not None and entry[3] == value]
+
+# ---------------------- 적중 / 미스 ----------------------
+def test_similar_question_hits(cache):
+    cache.put(unit(0), "답변", tag=("p1", "p2"))
+    assert cache.get(unit(0, noise=0.1), tag=("p1", "p2")) == "답변"
+    assert cache.get(unit(1), tag=("p1", "p2"), default="없음") == "없음"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_different_tag_is_miss(cache):
+    # 질문이 거의 같아도 프롬프트에 들어간 문서(tag)가 다르면 이전 답변을 쓰지 않음
+    cache.put(unit(0), "이전 문서로 만든 답변", tag=("p1",))
+    assert cache.get(unit(0), tag=("p9",)) is None
+    assert cache.get(unit(0, noise=0.05), tag=None) is None
+    assert cache.get(unit(0), tag=("p1",)) == "이전 문서로 만든 답변"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_same_question_keeps_one_entry_per_tag(cache):
+    cache.put(unit(0), "문서 1 답변", tag=("p1",))
+    cache.put(unit(0), "문서 2 답변", tag=("p2",))
+    assert len(cache) == 2
+    assert cache.get(unit(0), tag=("p1",)) == "문서 1 답변"
+    assert cache.get(unit(0), tag=("p2",)) == "문서 2 답변"
+
+# ---------------------- generation / TTL ----------------------
+def test_generation_bump_clears_cache(cache):
+    cache.put(unit(0), "1차 인덱스 답변", generation=1)
+    cache.put(unit(1), "다른 답변", generation=1)
+    assert cache.get(unit(0), generation=1) == "1차 인덱스 답변"
+    # 인덱스를 다시 올리면 (generation 변경) 이전 답변은 모두 버림
+    assert cache.get(unit(0), generation=2) is None
+    assert len(cache) == 0 and cache.generation == 2
+    cache.put(unit(0), "2차 인덱스 답변", generation=2)
+    assert cache.get(unit(0), generation=2) == "2차 인덱스 답변"
+    # put에서 generation이 바뀌어도 마찬가지
+    cache.put(unit(2), "3차", generation=3)
+    assert cache.get(unit(0), generation=3) is None
+
+def test_ttl_expiry(cache, clock):
+    cache.put(unit(0), "답변")
+    clock.now += 59.9
+    assert cache.get(unit(0)) == "답변"
+    # 조회해도 만료 시각은 늘어나지 않음
+    clock.now += 0.1
+    assert cache.get(unit(0)) is None
+    assert len(cache) == 0 and cache._entries[0] is None
+
+def test_expired_slot_is_reused(cache, clock):
+    cache.put(unit(0), "a")
+    cache.put(unit(1), "b")
+    cache.put(unit(2), "c")
+    clock.now += 61
+    cache.put(unit(3), "d")
+    assert slot_of(cache, "d") == [0]
+    assert len(cache) == 1
+
+# ---------------------- 슬롯 교체 ----------------------
+def test_paraphrase_overwrites_same_slot(cache, clock):
+    cache.put(unit(0), "처음 답변", tag=("p1",))
+    cache.put(unit(1), "다른 질문", tag=("p1",))
+    slot = slot_of(cache, "처음 답변")
+    clock.now += 1
+    # 비슷한 질문 + 같은 tag → 새 슬롯을 쓰지 않고 같은 자리에 덮어씀
+    cache.put(unit(0, noise=0.1), "새 답변", tag=("p1",))
+    assert slot_of(cache, "새 답변") == slot
+    assert slot_of(cache, "처음 답변") == []
+    assert len(cache) == 2
+    assert cache.get(unit(0), tag=("p1",)) == "새 답변"
+    expires_at, last_used, _, _ = cache._entries[slot[0]]
+    assert (expires_at, last_used) == (clock.now + 60, clock.now)
+
+def test_lru_slot_replaced_when_full(cache, clock):
+    for i, value in enumerate(["a", "b", "c"]):
+        cache.put(unit(i), value)
+        clock.now += 1
+    # a를 다시 사용 → 가장 오래 안 쓴 항목은 b
+    assert cache.get(unit(0)) == "a"
+    clock.now += 1
+    cache.put(unit(3), "d")
+    assert slot_of(cache, "d") == [1]
+    assert cache.get(unit(1)) is None
+    assert [cache.get(unit(i)) for i in (0, 2, 3)] == ["a", "c", "d"]
+
+def test_dimension_change_resets(cache):
+    cache.put(unit(0), "8차원")
+    cache.put(np.ones(4), "4차원")
+    assert cache.get(unit(0)) is None
+    assert cache.get(np.ones(4)) == "4차원"
+    assert len(cache) == 1
+
+def test_disabled_cache(clock):
+    cache = SemanticCache(maxsize=0, ttl=60, threshold=0.95)
+    cache.put(unit(0), "답변")
+    assert cache.get(unit(0), default="없음") == "없음"
+    assert cache.stats()["size"] == 0
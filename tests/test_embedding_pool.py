@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "vectorDB"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmark"))
+
+from embedding_pool import EmbeddingPool
+from synthetic import HashingEmbedder
+
+CRASH = "💥 워커 종료"
+FAIL = "⚠️ encode 오류"
+
+class FlakyEmbedder(HashingEmbedder):
+    """CRASH 문장이 오면 워커 프로세스가 바로 죽고, FAIL 문장이 오면 예외 (워커 안에서 만들어짐)"""
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, **kwargs):
+        if CRASH in texts:
+            os._exit(3)
+        if FAIL in texts:
+            raise ValueError("encode 실패")
+        return super().encode(texts, batch_size, show_progress_bar, **kwargs)
+
+def texts(n, prefix="문장"):
+    return [f"{prefix} {i} 월드컵 경기 일정과 결과" for i in range(n)]
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = EmbeddingPool(HashingEmbedder, workers=2, max_batch=8, max_wait_ms=5)
+    yield pool
+    pool.close()
+
+@pytest.fixture
+def reference():
+    return HashingEmbedder()
+
+# ---------------------- 결과가 직접 encode와 같은지 ----------------------
+def test_single_string(pool, reference):
+    result = pool.encode("손흥민 경기 일정")
+    assert result.shape == (pool.dimension,)
+    np.testing.assert_allclose(result, reference.encode("손흥민 경기 일정"), rtol=1e-6)
+
+def test_batch_split_across_workers(pool, reference):
+    batch = texts(37)  # max_batch(8) × 워커(2)보다 큰 요청
+    result = pool.encode(batch, batch_size=64)
+    assert result.shape == (37, pool.dimension)
+    np.testing.assert_allclose(result, reference.encode(batch), rtol=1e-6)
+
+def test_empty_batch(pool):
+    result = pool.encode([])
+    assert result.shape == (0, pool.dimension)
+
+def test_results_are_copies(pool, reference):
+    # 공유 메모리 버퍼는 다음 배치가 덮어쓰므로 돌려받은 배열은 그대로여야 함
+    first = pool.encode(texts(4, "첫 요청"))
+    kept = first.copy()
+    pool.encode(texts(8, "다음 요청"))
+    np.testing.assert_array_equal(first, kept)
+    assert first.flags.owndata
+
+def test_concurrent_requests_are_batched(pool, reference):
+    before = pool.stats()
+    results, errors = {}, []
+
+    def one(i):
+        try:
+            text = f"동시 질문 {i}"
+            results[text] = pool.encode(text) if i % 2 else pool.encode([text, f"{text} 추가"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(results) == 40
+    for text, result in results.items():
+        expected = reference.encode(text) if result.ndim == 1 else reference.encode([text, f"{text} 추가"])
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+    after = pool.stats()
+    assert after["texts"] - before["texts"] == 60
+    # 동시에 들어온 요청이 배치로 묶임 (요청 40개보다 배치 수가 적음)
+    assert after["batches"] - before["batches"] < 40
+    assert after["pending_requests"] == 0
+
+# ---------------------- 워커 오류 / 비정상 종료 ----------------------
+@pytest.fixture
+def flaky_pool():
+    pool = EmbeddingPool(FlakyEmbedder, workers=2, max_batch=4, max_wait_ms=1)
+    yield pool
+    pool.close()
+
+def test_worker_exception_fails_only_that_request(flaky_pool, reference):
+    with pytest.raises(RuntimeError, match="encode 실패"):
+        flaky_pool.encode([FAIL])
+    np.testing.assert_allclose(flaky_pool.encode("정상 문장"), reference.encode("정상 문장"), rtol=1e-6)
+
+def wait_for_respawn(pool, old_pids, timeout=60):
+    # 수집 스레드가 종료를 알아채고 새 워커를 띄워 교체할 때까지 대기
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        pids = {worker.process.pid for worker in pool._workers}
+        if pids != old_pids and all(worker.process.is_alive() for worker in pool._workers):
+            return pids
+        time.sleep(0.05)
+    raise AssertionError("임베딩 워커가 다시 시작되지 않음")
+
+def test_worker_crash_is_respawned(flaky_pool, reference):
+    pids = {worker.process.pid for worker in flaky_pool._workers}
+    with pytest.raises(RuntimeError, match="비정상 종료"):
+        flaky_pool.encode([CRASH])
+    # 남은 워커가 처리하는 동안에도 요청은 정상 처리
+    np.testing.assert_allclose(flaky_pool.encode(texts(6)), reference.encode(texts(6)), rtol=1e-6)
+    new_pids = wait_for_respawn(flaky_pool, pids)
+    assert len(new_pids) == 2 and len(new_pids & pids) == 1
+    for _ in range(10):
+        np.testing.assert_allclose(flaky_pool.encode(texts(6)), reference.encode(texts(6)), rtol=1e-6)
+
+def test_killed_worker_is_respawned(flaky_pool, reference):
+    pids = {worker.process.pid for worker in flaky_pool._workers}
+    victim = flaky_pool._workers[0]
+    victim.process.kill()
+    victim.process.join(timeout=5)
+    wait_for_respawn(flaky_pool, pids)
+    assert victim not in flaky_pool._workers
+    results = [flaky_pool.encode(f"질문 {i}") for i in range(20)]
+    for i, result in enumerate(results):
+        np.testing.assert_allclose(result, reference.encode(f"질문 {i}"), rtol=1e-6)
+
+def test_close_during_respawn(reference):
+    pool = EmbeddingPool(FlakyEmbedder, workers=2, max_batch=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        pool.encode([CRASH])
+    # 새 워커를 띄우는 중에 종료해도 공유 메모리를 두 번 해제하거나 새 워커를 남기지 않음
+    pool.close()
+    time.sleep(1.5)
+    assert not any(worker.process.is_alive() for worker in pool._workers)
+
+def test_encode_after_close():
+    pool = EmbeddingPool(HashingEmbedder, workers=1)
+    pool.close()
+    with pytest.raises(RuntimeError, match="종료"):
+        pool.encode("닫힌 풀")
@@ -0,0 +1,212 @@
+import os
+import sys
+import asyncio
+from concurrent.futures import CancelledError
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "io"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "vectorDB"))
+
+import metrics
+from generation_scheduler import GenerationScheduler
+
+# ---------------------- 스텁 토크나이저 / 모델 (모델 다운로드 없이 캐시 경로 확인) ----------------------
+PAD, BOS, EOS = 0, 1, 2
+OFFSET = 10
+MERGED = 3  # merge_newline_bracket=True일 때 '\n['를 토큰 하나로 합침
+PREFIX = "다음은 참고 문서입니다.\n\n[참고 문서]\n"
+ANSWER = "답변입니다"
+
+class StubTokenizer:
+    """글자 하나 = 토큰 하나 (BOS를 앞에 붙임, 왼쪽 패딩)"""
+
+    padding_side = "left"
+    pad_token_id = PAD
+    eos_token_id = EOS
+
+    def __init__(self, merge_newline_bracket=False):
+        self.merge_newline_bracket = merge_newline_bracket
+
+    def encode_one(self, text, add_special_tokens=True):
+        ids = [BOS] if add_special_tokens else []
+        i = 0
+        while i < len(text):
+            if self.merge_newline_bracket and text.startswith("\n[", i):
+                ids.append(MERGED)
+                i += 2
+            else:
+                ids.append(ord(text[i]) + OFFSET)
+                i += 1
+        return ids
+
+    def __call__(self, texts, return_tensors=None, padding=False, add_special_tokens=True):
+        single = isinstance(texts, str)
+        rows = [self.encode_one(t, add_special_tokens) for t in ([texts] if single else texts)]
+        if return_tensors != "pt":
+            return transformers.BatchEncoding({"input_ids": rows[0] if single else rows})
+        width = max(len(r) for r in rows)
+        ids = [[PAD] * (width - len(r)) + r for r in rows]
+        mask = [[0] * (width - len(r)) + [1] * len(r) for r in rows]
+        return transformers.BatchEncoding({"input_ids": torch.tensor(ids), "attention_mask": torch.tensor(mask)})
+
+    def decode(self, ids, skip_special_tokens=True):
+        ids = ids.tolist() if hasattr(ids, "tolist") else ids
+        return "".join("\n[" if i == MERGED else chr(i - OFFSET) for i in ids if i >= OFFSET or i == MERGED)
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return [self.decode(row) for row in rows]
+
+class StubModel:
+    """
+    prefill: 토큰 ID를 그대로 담은 (key, value) 튜플 캐시
+    generate: 받은 인자를 기록하고 ANSWER를 한 글자씩 생성
+    (캐시를 받으면 failures, 캐시 없이 호출되면 plain_failures에 넣은 예외를 차례로 발생)
+    """
+
+    device = torch.device("cpu")
+
+    def __init__(self):
+        self.calls = []
+        self.failures = []
+        self.plain_failures = []
+
+    def __call__(self, input_ids, use_cache=True):
+        states = input_ids.float()[:, None, :, None]
+        return type("Output", (), {"past_key_values": ((states, states.clone()),)})()
+
+    def generate(self, input_ids, attention_mask=None, past_key_values=None, stopping_criteria=(), streamer=None, **kwargs):
+        self.calls.append({"input_ids": input_ids.clone(), "past_key_values": past_key_values})
+        failures = self.failures if past_key_values is not None else self.plain_failures
+        if failures:
+            raise failures.pop(0)
+        if streamer is not None:
+            streamer.put(input_ids)
+        output = input_ids
+        for ch in ANSWER:
+            step = torch.full((output.shape[0], 1), ord(ch) + OFFSET, dtype=output.dtype)
+            output = torch.cat([output, step], dim=1)
+            if streamer is not None:
+                streamer.put(step[0])
+            done = stopping_criteria(output, None) if stopping_criteria else None
+            if done is not None and bool(torch.as_tensor(done).all()):
+                break
+        if streamer is not None:
+            streamer.end()
+        return output
+
+def make_scheduler(tokenizer=None, prefix=PREFIX, **kwargs):
+    scheduler = GenerationScheduler(StubModel(), tokenizer or StubTokenizer(), prefix=prefix, **kwargs)
+    if prefix:
+        scheduler.build_prefix_cache()
+    return scheduler
+
+def prompt(question):
+    return f"{PREFIX}[1] 제목\n본문\n\n[질문]\n{question}\n\n[답변]"
+
+# ---------------------- 앞부분 캐시 준비 ----------------------
+def test_prefix_cache_built():
+    scheduler = make_scheduler()
+    assert scheduler.stats()["prefix_cache_tokens"] == len(PREFIX) + 1
+
+def test_prefix_cache_disabled_when_boundary_tokens_merge():
+    # 앞부분 끝 '\n' + 나머지 첫 '['가 토큰 하나로 합쳐지면 따로 토크나이즈한 결과가 달라짐
+    scheduler = make_scheduler(StubTokenizer(merge_newline_bracket=True))
+    assert scheduler.stats()["prefix_cache_tokens"] == 0
+    assert scheduler._generate_batch([prompt("질문")]) == [ANSWER]
+    assert scheduler.model.calls[-1]["past_key_values"] is None
+
+# ---------------------- 캐시 사용 / 미사용 경로 ----------------------
+def test_cached_path_matches_uncached():
+    prompts = [prompt("한국 경기 언제야"), prompt("결승 어디서 해")]
+    cached, plain = make_scheduler(), make_scheduler(prefix=None)
+    assert cached._generate_batch(prompts) == plain._generate_batch(prompts) == [ANSWER, ANSWER]
+
+    call = cached.model.calls[-1]
+    key, value = call["past_key_values"][0]
+    assert key.shape[0] == value.shape[0] == len(prompts)
+    prefix_ids = cached._prefix_ids[0]
+    for row in call["input_ids"]:
+        # 모든 행이 같은 앞부분 토큰으로 시작 (패딩은 앞부분과 나머지 사이)
+        assert torch.equal(row[:len(prefix_ids)], prefix_ids)
+    assert plain.model.calls[-1]["past_key_values"] is None
+
+def test_cached_input_matches_full_tokenization():
+    scheduler = make_scheduler()
+    text = prompt("내일 경기")
+    inputs = scheduler._tokenize([text])
+    assert inputs["input_ids"][0].tolist() == StubTokenizer().encode_one(text)
+
+def test_prompt_without_prefix_uses_plain_path():
+    scheduler = make_scheduler()
+    assert scheduler._generate_batch(["앞부분 없이 바로 질문"]) == [ANSWER]
+    assert scheduler.model.calls[-1]["past_key_values"] is None
+
+# ---------------------- 캐시 사용 실패 시 재시도 ----------------------
+@pytest.fixture
+def counters(monkeypatch):
+    counted = []
+    monkeypatch.setattr(metrics, "inc", lambda name, value=1: counted.append(name))
+    return counted
+
+def test_transient_error_retries_without_cache_once(counters):
+    scheduler = make_scheduler()
+    scheduler.model.failures.append(RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB"))
+    assert scheduler._generate_batch([prompt("질문")]) == [ANSWER]
+    calls = scheduler.model.calls
+    assert calls[-2]["past_key_values"] is not None and calls[-1]["past_key_values"] is None
+    # 이번 요청만 캐시 없이: 캐시는 그대로 켜져 있음
+    assert scheduler.stats()["prefix_cache_tokens"] > 0
+    assert counters == ["prefix_cache_retries_total"]
+    scheduler._generate_batch([prompt("다음 질문")])
+    assert scheduler.model.calls[-1]["past_key_values"] is not None
+
+@pytest.mark.parametrize("error", [
+    TypeError("'tuple' object has no attribute 'get_seq_length'"),
+    RuntimeError("The size of tensor a (17) must match the size of tensor b (18) at non-singleton dimension 2"),
+    ValueError("past_key_values should be a Cache instance"),
+])
+def test_incompatible_cache_is_disabled(error, counters):
+    scheduler = make_scheduler()
+    scheduler.model.failures.append(error)
+    assert scheduler._generate_batch([prompt("질문")]) == [ANSWER]
+    assert scheduler.stats()["prefix_cache_tokens"] == 0
+    assert counters == ["prefix_cache_disabled_total"]
+    scheduler._generate_batch([prompt("다음 질문")])
+    assert scheduler.model.calls[-1]["past_key_values"] is None
+
+def test_cancellation_is_not_retried():
+    scheduler = make_scheduler()
+    scheduler.model.failures.append(CancelledError())
+    with pytest.raises(CancelledError):
+        scheduler._generate_batch([prompt("질문")])
+    assert len(scheduler.model.calls) == 1
+    assert scheduler.stats()["prefix_cache_tokens"] > 0
+
+def test_retry_failure_propagates():
+    scheduler = make_scheduler()
+    scheduler.model.failures.append(RuntimeError("CUDA out of memory"))
+    scheduler.model.plain_failures.append(RuntimeError("device lost"))
+    with pytest.raises(RuntimeError, match="device lost"):
+        scheduler._generate_batch([prompt("질문")])
+    assert len(scheduler.model.calls) == 2
+
+# ---------------------- submit / stream ----------------------
+def test_submit_and_stream():
+    async def run():
+        scheduler = GenerationScheduler(StubModel(), StubTokenizer(), prefix=PREFIX, max_wait_ms=1)
+        await scheduler.start()
+        try:
+            answers = await asyncio.gather(*(scheduler.submit(prompt(f"질문 {i}")) for i in range(3)))
+            pieces = [piece async for piece in scheduler.stream(prompt("스트리밍"))]
+            return answers, pieces, scheduler
+        finally:
+            await scheduler.stop()
+
+    answers, pieces, scheduler = asyncio.run(run())
+    assert answers == [ANSWER] * 3
+    assert "".join(pieces) == ANSWER
+    assert scheduler.stats()["answers"] == 3
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "data_collection"))
+
+import schedule_crawler
+from schedule_crawler import COLUMNS, diff_fixtures, load_fixtures, parse_schedule_html
+
+FIXTURE_HTML = os.path.join(os.path.dirname(__file__), "fixtures", "fifa_schedule.html")
+
+@pytest.fixture
+def schedule_html():
+    with open(FIXTURE_HTML, "r", encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture
+def rows(schedule_html):
+    return parse_schedule_html(schedule_html)
+
+def row(match_no, date="Thursday 11 June 2026", group="Group A", stadium="Mexico City Stadium", teams=""):
+    return {"날짜": date, "매치번호": match_no, "조": group, "경기장": stadium, "팀": teams}
+
+# ---------------------- 파싱 (저장된 HTML) ----------------------
+def test_parses_every_match_line(rows):
+    assert [r["매치번호"] for r in rows] == ["1", "2", "3", "4", "5", "6", "73", "104"]
+    assert all(set(r) == set(COLUMNS) for r in rows)
+
+def test_match_with_teams(rows):
+    assert rows[0] == row("1", teams="Mexico|South Africa")
+
+def test_match_without_teams(rows):
+    assert rows[4] == row("5", date="Saturday 13 June 2026", group="Group C", stadium="Boston Stadium")
+
+def test_hyphen_and_vs_separators(rows):
+    assert rows[3] == row("4", date="Friday 12 June 2026", group="Group D", stadium="Los Angeles Stadium", teams="USA|Paraguay")
+
+def test_date_heading_applies_to_following_matches(rows):
+    assert [r["날짜"] for r in rows if r["날짜"] == "Friday 12 June 2026"] == ["Friday 12 June 2026"] * 2
+    assert rows[-1]["날짜"] == "Sunday 19 July 2026"
+
+def test_ignores_other_paragraphs(rows):
+    # 뉴스레터 단락의 "Match reminders"나 안내 문구는 경기로 읽지 않음
+    assert not any("reminders" in r["조"] or "kick-off" in r["조"] for r in rows)
+
+def test_knockout_rounds(rows):
+    assert rows[-2] == row("73", date="Sunday 28 June 2026", group="Round of 32", stadium="Los Angeles Stadium",
+                           teams="Group A runners-up|Group B runners-up")
+    assert rows[-1] == row("104", date="Sunday 19 July 2026", group="Final", stadium="New York New Jersey Stadium")
+
+def test_empty_page():
+    assert parse_schedule_html("<html><body><p>nothing here</p></body></html>") == []
+
+# ---------------------- 이전 CSV와 비교 ----------------------
+def test_diff_no_changes(rows):
+    assert diff_fixtures(rows, [dict(r) for r in rows]) == {"added": [], "changed": [], "removed": []}
+
+def test_diff_added(rows):
+    changes = diff_fixtures(rows[:-1], rows)
+    assert changes == {"added": [rows[-1]], "changed": [], "removed": []}
+
+def test_diff_removed(rows):
+    changes = diff_fixtures(rows, rows[1:])
+    assert changes == {"added": [], "changed": [], "removed": [rows[0]]}
+
+def test_diff_changed(rows):
+    new_rows = [dict(r) for r in rows]
+    new_rows[2]["경기장"] = "BMO Field"
+    changes = diff_fixtures(rows, new_rows)
+    assert changes["added"] == [] and changes["removed"] == []
+    assert changes["changed"] == [{"before": rows[2], "after": new_rows[2]}]
+
+def test_diff_all_kinds(rows):
+    new_rows = [dict(r) for r in rows[1:]] + [row("105", date="Monday 20 July 2026", group="Friendly", stadium="Somewhere")]
+    new_rows[0]["팀"] = "Korea Republic|Czechia"
+    changes = diff_fixtures(rows, new_rows)
+    assert [r["매치번호"] for r in changes["added"]] == ["105"]
+    assert [c["after"]["매치번호"] for c in changes["changed"]] == ["2"]
+    assert [r["매치번호"] for r in changes["removed"]] == ["1"]
+
+def test_csv_round_trip(rows, tmp_path):
+    import pandas as pd
+    path = tmp_path / "fixtures.csv"
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False, encoding="utf-8-sig")
+    assert load_fixtures(str(path)) == rows
+    assert diff_fixtures(load_fixtures(str(path)), rows) == {"added": [], "changed": [], "removed": []}
+
+# ---------------------- main: 캐시는 CSV를 쓴 뒤에만 저장 ----------------------
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.headers = {"ETag": '"v1"'}
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def run_main(schedule_html, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    requests_made = []
+
+    def fake_get(url, headers=None, timeout=None):
+        requests_made.append(headers or {})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse("", 304)
+        return FakeResponse(schedule_html)
+
+    monkeypatch.setattr(schedule_crawler.requests, "get", fake_get)
+
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["schedule_crawler.py", "--browser", "never", *argv])
+        schedule_crawler.main()
+        return requests_made
+
+    return run
+
+def test_main_writes_csv_then_skips_unchanged_page(run_main, rows, tmp_path):
+    run_main()
+    assert load_fixtures(str(tmp_path / schedule_crawler.OUTPUT_CSV)) == rows
+    assert os.path.exists(tmp_path / schedule_crawler.SCHEDULE_CACHE_PATH)
+    with open(tmp_path / schedule_crawler.CHANGES_JSONL, "r", encoding="utf-8") as f:
+        assert len(json.loads(f.readline())["added"]) == len(rows)
+
+    requests_made = run_main()
+    assert requests_made[-1].get("If-None-Match") == '"v1"'
+
+def test_main_rebuilds_missing_csv(run_main, rows, tmp_path):
+    run_main()
+    os.remove(tmp_path / schedule_crawler.OUTPUT_CSV)
+    requests_made = run_main()
+    # CSV가 없으면 조건부 요청을 보내지 않고 다시 파싱
+    assert "If-None-Match" not in requests_made[-1]
+    assert load_fixtures(str(tmp_path / schedule_crawler.OUTPUT_CSV)) == rows
+
+def test_main_does_not_save_cache_when_csv_write_fails(run_main, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(schedule_crawler.pd.DataFrame, "to_csv", fail)
+    with pytest.raises(OSError):
+        run_main()
+    assert not os.path.exists(tmp_path / schedule_crawler.SCHEDULE_CACHE_PATH)
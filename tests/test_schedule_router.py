@@ -0,0 +1,169 @@
+import os
+import sys
+import csv
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "io"))
+
+from fixtures import FixturesIndex, parse_date
+from schedule_router import answer_schedule_question, is_schedule_question, parse_question
+
+# schedule_crawler.py가 쓰는 CSV 형식 (COLUMNS = 날짜, 매치번호, 조, 경기장, 팀)
+COLUMNS = ["날짜", "매치번호", "조", "경기장", "팀"]
+ROWS = [
+    ["Thursday 11 June 2026", "1", "Group A", "Mexico City Stadium", "Mexico|South Africa"],
+    ["Thursday 11 June 2026", "2", "Group A", "Guadalajara Stadium", "Korea Republic|Czechia"],
+    ["Friday 12 June 2026", "3", "Group B", "Toronto Stadium", "Canada|IR Iran"],
+    ["Friday 12 June 2026", "4", "Group D", "Los Angeles Stadium", "USA|Paraguay"],
+    ["Saturday 13 June 2026", "5", "Group C", "Boston Stadium", "Ghana|Panama"],
+    ["Thursday 18 June 2026", "28", "Group A", "Atlanta Stadium", "Korea Republic|Mexico"],
+    ["Sunday 28 June 2026", "73", "Round of 32", "Los Angeles Stadium", "Group A runners-up|Group B runners-up"],
+    ["Sunday 19 July 2026", "104", "Final", "New York New Jersey Stadium", ""],
+]
+TODAY = date(2026, 6, 11)
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "fixtures_fifa_articles.csv"
+    write_csv(path, ROWS)
+    return FixturesIndex(str(path))
+
+def match_numbers(fixtures):
+    return [f["match_no"] for f in fixtures]
+
+# ---------------------- parse_question ----------------------
+@pytest.mark.parametrize("text, expected", [
+    ("한국 경기 언제야", {"team": "korea republic"}),
+    ("한국의 경기 일정", {"team": "korea republic"}),
+    ("대한민국 대표팀 일정", {"team": "korea republic"}),
+    ("이란 경기 일정", {"team": "ir iran"}),
+    ("이란이랑 캐나다 경기 언제", {"team": "ir iran"}),
+    ("가나는 언제 경기해", {"team": "ghana"}),
+    ("남아프리카공화국 경기", {"team": "south africa"}),
+    ("멕시코시티 경기 일정", {"stadium": "mexico city"}),
+    ("멕시코 경기 일정", {"team": "mexico"}),
+    ("LA 경기 일정", {"stadium": "los angeles"}),
+    ("LA에서 경기 있어?", {"stadium": "los angeles"}),
+    ("Los Angeles 경기", {"stadium": "los angeles"}),
+    ("los angeles 경기", {"stadium": "los angeles"}),
+    ("뉴욕에서 열리는 경기", {"stadium": "new york"}),
+    ("A조 일정", {"group": "Group A"}),
+    ("group b 경기 일정", {"group": "Group B"}),
+    ("73번 경기 어디서 해", {"match_no": 73}),
+    ("match 104 일정", {"match_no": 104}),
+])
+def test_parse_question(text, expected):
+    assert parse_question(text, today=TODAY) == expected
+
+@pytest.mark.parametrize("text", [
+    # 흔한 단어 안의 'LA' / 어미와 겹치는 팀 별칭은 일정 조건이 아님 (회귀 테스트)
+    "PLAYER 일정 알려줘",
+    "CLASSIC 경기 언제",
+    "LAFC 경기",
+    "16강 대진이란 뭐야",
+    "…하나요? 가나요",
+])
+def test_parse_question_ignores_alias_collisions(text):
+    query = parse_question(text, today=TODAY)
+    assert "stadium" not in query
+    assert "team" not in query
+
+def test_parse_question_collision_with_real_alias_later():
+    # 어미와 겹치는 부분은 건너뛰고 뒤에 나오는 진짜 팀 이름을 찾음
+    assert parse_question("대진이란 뭐고 한국 경기는 언제야", today=TODAY) == {"team": "korea republic"}
+
+def test_parse_question_dates():
+    assert parse_question("6월 12일 경기", today=TODAY) == {"date": "2026-06-12"}
+    assert parse_question("2026-06-13 경기 일정", today=TODAY) == {"date": "2026-06-13"}
+    assert parse_question("6/18 경기", today=TODAY) == {"date": "2026-06-18"}
+    assert parse_question("내일 경기 뭐야", today=TODAY) == {"date": "2026-06-12"}
+    # 날짜 숫자는 매치번호로 읽지 않음
+    assert "match_no" not in parse_question("6월 12일 경기", today=TODAY)
+
+def test_parse_question_combines_fields():
+    assert parse_question("내일 LA에서 하는 경기", today=TODAY) == {"date": "2026-06-12", "stadium": "los angeles"}
+
+def test_parse_question_known_teams_from_index(index):
+    assert parse_question("Czechia 경기 일정", index.teams, today=TODAY) == {"team": "czechia"}
+
+# ---------------------- is_schedule_question ----------------------
+@pytest.mark.parametrize("text", ["한국 경기 언제야", "A조 일정", "결승 경기장 어디에서 해", "내일 무슨 경기 있어"])
+def test_is_schedule_question(text):
+    assert is_schedule_question(text)
+
+@pytest.mark.parametrize("text", ["한국 경기 결과 알려줘", "왜 졌어", "손흥민 선수 일정", "오늘 날씨 어때", "감독 전망은"])
+def test_is_not_schedule_question(text):
+    assert not is_schedule_question(text)
+
+# ---------------------- FixturesIndex ----------------------
+def test_parse_date():
+    assert parse_date("Thursday 11 June 2026") == "2026-06-11"
+    assert parse_date("2026-06-11") == "2026-06-11"
+    assert parse_date("TBD") is None
+
+def test_lookup_by_each_field(index):
+    assert match_numbers(index.lookup(date="2026-06-11")) == [1, 2]
+    assert match_numbers(index.lookup(team="korea republic")) == [2, 28]
+    assert match_numbers(index.lookup(group="Group A")) == [1, 2, 28]
+    assert match_numbers(index.lookup(stadium="los angeles")) == [4, 73]
+    assert match_numbers(index.lookup(match_no=104)) == [104]
+
+def test_lookup_combines_conditions(index):
+    assert match_numbers(index.lookup(team="mexico", date="2026-06-18")) == [28]
+    assert index.lookup(team="mexico", stadium="boston") == []
+    assert index.lookup() == []
+
+def test_lookup_row_shape(index):
+    fixture = index.lookup(match_no=1)[0]
+    assert fixture == {
+        "date": "2026-06-11", "date_text": "Thursday 11 June 2026", "match_no": 1, "group": "Group A",
+        "stadium": "Mexico City Stadium", "teams": ["Mexico", "South Africa"],
+    }
+    assert index.lookup(match_no=104)[0]["teams"] == []
+
+def test_missing_file_is_empty(tmp_path):
+    assert FixturesIndex(str(tmp_path / "missing.csv")).lookup(match_no=1) == []
+
+def test_reloads_when_file_changes(index):
+    assert match_numbers(index.lookup(stadium="boston")) == [5]
+    snapshot = index.refresh()
+    assert index.refresh() is snapshot  # 바뀌지 않으면 다시 읽지 않음
+
+    rows = [row[:] for row in ROWS]
+    rows[4][3] = "Toronto Stadium"
+    write_csv(index.path, rows)
+    stat = os.stat(index.path)
+    os.utime(index.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.lookup(stadium="boston") == []
+    assert match_numbers(index.lookup(stadium="toronto")) == [3, 5]
+
+# ---------------------- answer_schedule_question ----------------------
+def test_answer_for_team(index):
+    answer = answer_schedule_question("한국 경기 언제야", index, today=TODAY)
+    assert answer.splitlines()[0] == "📅 경기 일정"
+    assert "[6월 11일 (목)]" in answer
+    assert "- 2경기 | Korea Republic vs Czechia | Group A | Guadalajara Stadium" in answer
+    assert "- 28경기 | Korea Republic vs Mexico | Group A | Atlanta Stadium" in answer
+
+def test_answer_for_relative_date(index):
+    answer = answer_schedule_question("내일 무슨 경기 있어", index, today=TODAY)
+    assert "3경기" in answer and "4경기" in answer and "1경기" not in answer
+
+@pytest.mark.parametrize("text", [
+    "한국 경기 결과 알려줘",   # 일정 질문 아님
+    "경기 일정 알려줘",        # 조건 없음
+    "카타르 경기 일정",        # 일정표에 없는 팀
+    "16강 대진이란 뭐야",      # 이란으로 잘못 읽으면 안 됨
+    "가나요 경기 일정",        # 가나로 잘못 읽으면 안 됨
+    "PLAYER 일정 알려줘",      # LA로 잘못 읽으면 안 됨
+])
+def test_falls_back_to_rag(index, text):
+    assert answer_schedule_question(text, index, today=TODAY) is None
@@ -0,0 +1,174 @@
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+_MISSING = object()
+
+# ✅ 크기 제한 LRU 캐시 (스레드 안전, 적중/미스 카운터 포함)
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        # 저장된 값 반환 (없으면 _MISSING), lock을 잡은 상태에서 호출
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._load(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+# ✅ LRU + 만료 시간(TTL) 캐시
+class TTLCache(LRUCache):
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def _load(self, key):
+        entry = super()._load(key)
+        if entry is _MISSING:
+            return _MISSING
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def put(self, key, value):
+        super().put(key, (time.monotonic() + self.ttl, value))
+
+# ✅ 의미 기반 캐시: 임베딩 코사인 유사도가 threshold 이상인 이전 항목을 찾음 (크기 제한 + TTL)
+# - 항목마다 tag(예: 프롬프트에 들어간 passage ID 집합)를 같이 저장하고, tag가 같은 항목만 적중으로 봄
+# - generation(예: 인덱스 재업로드 번호)이 바뀌면 전체 삭제
+class SemanticCache:
+    def __init__(self, maxsize, ttl, threshold):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.generation = None
+        self._vectors = None                  # (maxsize × 차원) 정규화된 임베딩
+        self._entries = [None] * max(maxsize, 0)  # 슬롯 → (만료 시각, 마지막 사용 시각, tag, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            self._entries = [None] * len(self._entries)
+            self.generation = generation
+
+    def _similar_slots(self, vector):
+        # threshold 이상인 슬롯을 유사도 높은 순으로, lock을 잡은 상태에서 호출
+        if self._vectors is None or self._vectors.shape[1] != len(vector):
+            return []
+        sims = self._vectors @ vector
+        slots = np.flatnonzero(sims >= self.threshold)
+        return slots[np.argsort(-sims[slots])]
+
+    def get(self, embedding, tag=None, generation=None, default=None):
+        if self.maxsize <= 0:
+            return default
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation(generation)
+            for slot in self._similar_slots(vector):
+                entry = self._entries[slot]
+                if entry is None:
+                    continue
+                expires_at, _, entry_tag, value = entry
+                if now >= expires_at:
+                    self._entries[slot] = None
+                    continue
+                if entry_tag == tag:
+                    self._entries[slot] = (expires_at, now, entry_tag, value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def put(self, embedding, value, tag=None, generation=None):
+        if self.maxsize <= 0:
+            return
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation(generation)
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+                self._entries = [None] * self.maxsize
+            slot = None
+            # 거의 같은 질문 + 같은 tag 항목이 있으면 덮어씀 (패러프레이즈마다 슬롯을 쓰지 않도록)
+            for candidate in self._similar_slots(vector):
+                entry = self._entries[candidate]
+                if entry is not None and entry[2] == tag:
+                    slot = candidate
+                    break
+            if slot is None:
+                empty = [i for i, entry in enumerate(self._entries) if entry is None or now >= entry[0]]
+                # 빈 슬롯(또는 만료된 슬롯)이 없으면 가장 오래 안 쓴 항목을 교체
+                slot = empty[0] if empty else min(range(self.maxsize), key=lambda i: self._entries[i][1])
+            self._vectors[slot] = vector
+            self._entries[slot] = (now + self.ttl, now, tag, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries = [None] * len(self._entries)
+
+    def __len__(self):
+        now = time.monotonic()
+        return sum(1 for entry in self._entries if entry is not None and now < entry[0])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -1,19 +1,26 @@
 import os
+import re
 import sys
 import json
 import uuid
 import yaml
 import argparse
 import hashlib
-from opensearchpy import OpenSearch, helpers
+import time
+from contextlib import contextmanager
+from opensearchpy import helpers
+from opensearchpy.exceptions import NotFoundError, TransportError
+import metrics
+import providers
+from providers import EMBEDDING_MODEL_NAME, get_client, get_embedding_model
 
 # 🔧 기본 설정
 CONFIG_PATH = "../config/upload_config.yaml"
 INPUT_JSON = "../data_collection/bing_articles_full.json"
 BULK_JSONL = "bulk.jsonl"
+MANIFEST_PATH = "sync_manifest.json"
 
-# 🔗 OpenSearch 클라이언트 연결
-client = OpenSearch("http://localhost:9200")
+# 🔗 OpenSearch 클라이언트 / 🧠 임베딩 모델은 providers에서 처음 사용할 때 로드
 
 # ⚙️ 설정 로드
 with open(CONFIG_PATH, "r", encoding="utf-8") as f:
@@ -21,18 +28,29 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 
 index_name = config.get("index_name", "default_index")
 id_strategy = config.get("id_strategy", "sequential")  # uuid | sequential | hash
-
-# ✅ 인데그스 생성 (벡터 필드 포함)
-def create_index_if_not_exists(index_name):
-    if client.indices.exists(index=index_name):
-        print(f"[0] 인데그스 '{index_name}' 이미 존재")
-        return
-
-    mapping = {
+embed_batch_size = config.get("embed_batch_size", 64)    # SentenceTransformer 한 번에 인코딩할 문서 수
+bulk_chunk_size = config.get("bulk_chunk_size", 500)     # bulk 요청 한 번에 보낼 문서 수
+bulk_threads = config.get("bulk_threads", 1)             # 1보다 크면 parallel_bulk 사용
+# 임베딩 모델/전처리가 바뀌면 값을 올려서 sync 시 전체 재임베딩
+embedding_version = config.get("embedding_version", EMBEDDING_MODEL_NAME)
+passage_chars = config.get("passage_chars", 500)      # 기사 분할 단위 (글자 수)
+passage_overlap = config.get("passage_overlap", 100)  # 이웃 passage 간 겹치는 글자 수
+# sync manifest에 기록되는 버전 (임베딩 모델 또는 분할 설정이 바뀌면 재임베딩)
+index_version = f"{embedding_version}|p{passage_chars}/{passage_overlap}"
+hnsw_m = config.get("hnsw_m", 16)                                # HNSW 노드당 연결 수
+hnsw_ef_construction = config.get("hnsw_ef_construction", 128)  # HNSW 그래프 생성 시 후보 수
+index_replicas = config.get("index_replicas", 0)           # 서비스 중 복제본 수 (재색인 적재 중에는 0)
+refresh_interval = config.get("refresh_interval", "1s")    # 서비스 중 refresh 간격 (재색인 적재 중에는 끔)
+reindex_keep = config.get("reindex_keep", 2)               # 재색인 후 남겨 둘 세대 수 (현재 포함, 롤백용)
+
+# ✅ 인데그스 설정 + 매핑 (벡터 필드 포함)
+def index_body():
+    return {
         "settings": {
             "index": {
                 "number_of_shards": 1,
-                "number_of_replicas": 0,
+                "number_of_replicas": index_replicas,
+                "refresh_interval": refresh_interval,
                 "knn": True
             }
         },
@@ -48,58 +66,191 @@ def create_index_if_not_exists(index_name):
                     "fields": {"keyword": {"type": "keyword"}}
                 },
                 "url": {"type": "keyword"},
-                "datetime": {"type": "text"},
+                "datetime": {
+                    "type": "text",
+                    "fields": {"keyword": {"type": "keyword"}}
+                },
                 "project_name": {"type": "keyword"},
                 "file_name": {"type": "keyword"},
                 "page": {"type": "integer"},
+                "doc_id": {"type": "keyword"},
                 "embedding": {
                     "type": "knn_vector",
-                    "dimension": 384
+                    "dimension": 384,
+                    # HNSW 그래프 (lucene 엔진: knn 쿼리 안에서 filter 사전 적용 지원)
+                    "method": {
+                        "name": "hnsw",
+                        "space_type": "cosinesimil",
+                        "engine": "lucene",
+                        "parameters": {"m": hnsw_m, "ef_construction": hnsw_ef_construction}
+                    }
                 }
             }
         }
     }
 
-    client.indices.create(index=index_name, body=mapping)
+# ✅ 인데그스 생성
+def create_index_if_not_exists(index_name):
+    if get_client().indices.exists(index=index_name):
+        print(f"[0] 인데그스 '{index_name}' 이미 존재")
+        return
+
+    get_client().indices.create(index=index_name, body=index_body())
     print(f"[0] 인데그스 '{index_name}' 생성 완료")
 
+# ✅ 문서 내용 해시 (title + content)
+def hash_id(item):
+    base = item.get("title", "") + item.get("content", "")
+    return hashlib.md5(base.encode("utf-8")).hexdigest()
+
+# ✅ 인덱스 generation 갱신 (vector_search의 검색 결과 캐시 무효화용)
+def bump_index_generation():
+    if not get_client().indices.exists(index=index_name):
+        return
+    get_client().indices.put_mapping(index=index_name, body={"_meta": {"generation": str(time.time_ns())}})
+
 # ✅ ID 생성 전략
 def generate_id(item, i):
     if id_strategy == "sequential":
         return str(i + 1)
     elif id_strategy == "hash":
-        base = item.get("title", "") + item.get("content", "")
-        return hashlib.md5(base.encode("utf-8")).hexdigest()
+        return hash_id(item)
     else:
         return str(uuid.uuid4())
 
+# ✅ 기사 본문을 겹치는 passage로 분할 (가능하면 줄/문장 경계에서 자름)
+def split_passages(text, size=None, overlap=None):
+    size = size or passage_chars
+    overlap = passage_overlap if overlap is None else overlap
+    text = text.strip()
+    if len(text) <= size:
+        return [text]
+
+    passages = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n", start, end), text.rfind(". ", start, end))
+            if cut > start + size // 2:
+                end = cut + 1
+        passage = text[start:end].strip()
+        if passage:
+            passages.append(passage)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return passages
+
+# ✅ passage ID (기사 ID + page)
+def chunk_id(doc_id, page):
+    return f"{doc_id}-{page}"
+
+# ✅ 업로드할 문서 본문 구성 (passage 하나 = 문서 하나, page = passage 순번)
+def build_document(item, doc_id, embedding, file_name=None, content=None, page=1, parent_id=None):
+    return {
+        "title": item.get("title", ""),
+        "content": item.get("content", "") if content is None else content,
+        "url": item.get("url", ""),
+        "datetime": item.get("datetime", ""),
+        "project_name": "agentic_rag",
+        "file_name": file_name or os.path.basename(INPUT_JSON),
+        "page": page,
+        "doc_id": parent_id or doc_id,
+        "id": doc_id,
+        "embedding": embedding
+    }
+
 # ✅ bulk.jsonl 생성 (임베딩 포함)
 def convert_json_to_bulk():
     with open(INPUT_JSON, "r", encoding="utf-8") as f:
         data = json.load(f)
 
+    count = 0
     with open(BULK_JSONL, "w", encoding="utf-8") as out:
         for i, item in enumerate(data):
             doc_id = generate_id(item, i)
-            text = item.get("content", "")
-            embedding = embedding_model.encode(text).tolist()
-
-            meta = {"index": {"_index": index_name, "_id": doc_id}}
-            doc = {
-                "title": item.get("title", ""),
-                "content": text,
-                "url": item.get("url", ""),
-                "datetime": item.get("datetime", ""),
-                "project_name": "agentic_rag",
-                "file_name": os.path.basename(INPUT_JSON),
-                "page": 1,
-                "id": doc_id,
-                "embedding": embedding
+            for page, passage in enumerate(split_passages(item.get("content", "")), 1):
+                passage_id = chunk_id(doc_id, page)
+                embedding = get_embedding_model().encode(passage).tolist()
+
+                meta = {"index": {"_index": index_name, "_id": passage_id}}
+                doc = build_document(item, passage_id, embedding, content=passage, page=page, parent_id=doc_id)
+                out.write(json.dumps(meta, ensure_ascii=False) + "\n")
+                out.write(json.dumps(doc, ensure_ascii=False) + "\n")
+                count += 1
+
+    print(f"[1] bulk 포맷 변화 완료: {BULK_JSONL} ({len(data)}개 문서, {count}개 passage)")
+
+# ✅ 입력 파일을 한 건씩 읽기 (JSON 배열 / JSONL 모두 지원, 전체를 메모리에 올리지 않음)
+def iter_articles(path, read_size=1 << 16):
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(read_size).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"JSON 배열 형식이 아닙니다: {path}")
+        buf = buf[1:]
+        while True:
+            buf = buf.lstrip().lstrip(",").lstrip()
+            if buf.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                # 버퍼에 아직 항목 전체가 들어오지 않음 → 더 읽어서 재시도
+                chunk = f.read(read_size)
+                if not chunk:
+                    raise
+                buf += chunk
+                continue
+            yield item
+            buf = buf[end:]
+
+# ✅ 이터러블을 batch_size 단위 리스트로 묶기
+def iter_batches(iterable, batch_size):
+    batch = []
+    for x in iterable:
+        batch.append(x)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ✅ (doc_id, item) → (passage_id, doc_id, page, passage, item)
+def iter_passages(id_items):
+    for doc_id, item in id_items:
+        for page, passage in enumerate(split_passages(item.get("content", "")), 1):
+            yield chunk_id(doc_id, page), doc_id, page, passage, item
+
+# ✅ (doc_id, item) → passage 분할 → 배치 단위 임베딩 → bulk action 생성 (중간 파일 없음)
+def embed_actions(id_items, batch_size=None, file_name=None):
+    batch_size = batch_size or embed_batch_size
+    for batch in iter_batches(iter_passages(id_items), batch_size):
+        texts = [passage for _, _, _, passage, _ in batch]
+        # 배치당 SentenceTransformer 호출 1번
+        with metrics.timer("upload_embed_batch"):
+            embeddings = get_embedding_model().encode(texts, batch_size=batch_size, show_progress_bar=False)
+        metrics.inc("upload_embedded_passages_total", len(texts))
+        for (passage_id, doc_id, page, passage, item), embedding in zip(batch, embeddings):
+            yield {
+                "_op_type": "index",
+                "_index": index_name,
+                "_id": passage_id,
+                "_source": build_document(item, passage_id, embedding.tolist(), file_name, passage, page, doc_id)
             }
-            out.write(json.dumps(meta, ensure_ascii=False) + "\n")
-            out.write(json.dumps(doc, ensure_ascii=False) + "\n")
 
-    print(f"[1] bulk 포맷 변화 완료: {BULK_JSONL} ({len(data)}개 문서)")
+def iter_bulk_actions(input_path=INPUT_JSON, batch_size=None):
+    id_items = ((generate_id(item, i), item) for i, item in enumerate(iter_articles(input_path)))
+    return embed_actions(id_items, batch_size, os.path.basename(input_path))
 
 # ✅ 업로드
 def upload_bulk_jsonl():
@@ -119,71 +270,452 @@ def upload_bulk_jsonl():
         }
         actions.append(action)
 
-    helpers.bulk(client, actions)
+    with metrics.timer("upload_bulk"):
+        helpers.bulk(get_client(), actions)
+    bump_index_generation()
     print(f"[2] 업로드 완료: {len(actions)}개 문서 업로드됨")
     os.remove(BULK_JSONL)
     print(f"[3] 임시 파일 삭제 완료: {BULK_JSONL}")
 
+# ✅ bulk action 스트림 전송 → (성공 수, 실패 수)
+def run_bulk(actions, chunk_size=None, threads=None, on_success=None):
+    with metrics.timer("upload_bulk"):
+        success, failed = _run_bulk(actions, chunk_size, threads, on_success)
+    metrics.inc("upload_bulk_success_total", success)
+    metrics.inc("upload_bulk_failed_total", failed)
+    return success, failed
+
+def _run_bulk(actions, chunk_size=None, threads=None, on_success=None):
+    chunk_size = chunk_size or bulk_chunk_size
+    threads = threads or bulk_threads
+    if threads > 1:
+        results = helpers.parallel_bulk(get_client(), actions, thread_count=threads, chunk_size=chunk_size, raise_on_error=False)
+    else:
+        results = helpers.streaming_bulk(get_client(), actions, chunk_size=chunk_size, raise_on_error=False)
+
+    success, failed = 0, 0
+    for ok, info in results:
+        op, result = next(iter(info.items()))
+        # 이미 없는 문서 삭제(404)는 성공으로 취급
+        if ok or (op == "delete" and result.get("status") == 404):
+            success += 1
+            if on_success:
+                on_success(op, result["_id"])
+        else:
+            failed += 1
+            print(f"⚠️ 업로드 실패: {info}")
+    return success, failed
+
+# ✅ 스트리밍 업로드 (파싱 → 배치 임베딩 → streaming_bulk/parallel_bulk)
+def upload_stream(input_path=INPUT_JSON, batch_size=None, chunk_size=None, threads=None):
+    start = time.perf_counter()
+    success, failed = run_bulk(iter_bulk_actions(input_path, batch_size), chunk_size, threads)
+    bump_index_generation()
+    elapsed = time.perf_counter() - start
+    docs_per_sec = success / elapsed if elapsed > 0 else 0.0
+
+    print(f"[2] 스트리밍 업로드 완료: {success}개 성공, {failed}개 실패 ({elapsed:.1f}초, {docs_per_sec:.1f} docs/sec)")
+    return {"success": success, "failed": failed, "seconds": elapsed, "docs_per_sec": docs_per_sec}
+
+# ✅ 해시 ID 문서가 아닌 예전 문서 삭제 (sequential / uuid ID로 올린 인덱스에 처음 sync할 때)
+HASH_ID_RE = re.compile(r"[0-9a-f]{32}(-\d+)?")
+
+def delete_non_hash_documents(chunk_size=None, scroll="5m"):
+    """→ (삭제 수, 실패 수), 해시 ID(passage ID 포함)가 아닌 문서를 scroll로 찾아 bulk delete"""
+    chunk_size = chunk_size or bulk_chunk_size
+    hits = helpers.scan(get_client(), index=index_name, query={"query": {"match_all": {}}, "_source": False}, scroll=scroll, size=chunk_size)
+    actions = ({"_op_type": "delete", "_index": index_name, "_id": hit["_id"]}
+               for hit in hits if not HASH_ID_RE.fullmatch(hit["_id"]))
+    return run_bulk(actions, chunk_size, threads=1)
+
+# ✅ sync manifest 읽기/쓰기 ({기사 해시: {"version": 인덱스 버전, "pages": passage 수}})
+def load_manifest(path=MANIFEST_PATH, name=None):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    # 다른 인덱스용 manifest는 무시
+    if manifest.get("index_name") != (name or index_name):
+        return {}
+    return manifest.get("documents", {})
+
+def save_manifest(documents, path=MANIFEST_PATH, name=None):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index_name": name or index_name, "documents": documents}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+# ✅ manifest 항목에 해당하는 인덱스 문서 ID 목록
+def manifest_chunk_ids(doc_id, entry, first_page=1):
+    if not isinstance(entry, dict):
+        # passage 분할 이전 manifest: 기사 하나 = 문서 하나
+        return [doc_id]
+    return [chunk_id(doc_id, page) for page in range(first_page, entry["pages"] + 1)]
+
+# ✅ 증분 동기화: 새/변경 기사만 임베딩·업로드, 사라진 기사는 bulk 삭제
+def sync_upload(input_path=INPUT_JSON, batch_size=None, chunk_size=None, manifest_path=MANIFEST_PATH, partial=False):
+    """
+    partial=True: 입력이 새/변경 기사만 담은 파일(예: 크롤러의 bing_articles.jsonl)인 경우
+    - 입력에 없는 기사는 삭제하지 않음
+    - 같은 URL의 기사는 입력의 마지막 버전만 사용하고, 예전 버전은 인덱스에서 삭제
+    """
+    start = time.perf_counter()
+    if id_strategy != "hash":
+        print(f"ℹ️ sync 모드는 id_strategy와 관계없이 내용 해시 ID를 사용합니다 (현재 설정: {id_strategy})")
+
+    # 인덱스가 새로 만들어졌다면 manifest는 의미 없음
+    exists = get_client().indices.exists(index=index_name)
+    manifest = load_manifest(manifest_path) if exists else {}
+    # manifest 없이 문서가 있는 인덱스 = sync 이전 방식(sequential 등)으로 올린 인덱스
+    # → 해시 ID로 다시 올린 뒤 예전 ID 문서를 지움 (안 지우면 모든 기사가 두 번씩 검색됨)
+    legacy = exists and not manifest and get_client().count(index=index_name)["count"] > 0
+    create_index_if_not_exists(index_name)
+
+    # URL별 최신 버전 (partial 모드에서 append-only 입력의 예전 버전을 건너뛰기 위함)
+    latest = {item.get("url"): hash_id(item) for item in iter_articles(input_path)} if partial else {}
+    manifest_by_url = {entry["url"]: doc_id for doc_id, entry in manifest.items()
+                       if isinstance(entry, dict) and entry.get("url")}
+
+    documents = dict(manifest) if partial else {}
+    seen = set()
+    pending = {}  # 업로드할 기사 해시 → (passage 수, url)
+    superseded = {}  # 같은 URL의 새 버전으로 대체된 기존 기사
+    skipped = 0
+
+    def changed_items():
+        nonlocal skipped
+        for item in iter_articles(input_path):
+            doc_id = hash_id(item)
+            url = item.get("url")
+            if doc_id in seen or (partial and latest.get(url) != doc_id):
+                continue
+            seen.add(doc_id)
+            entry = manifest.get(doc_id)
+            if isinstance(entry, dict) and entry.get("version") == index_version:
+                documents[doc_id] = entry
+                skipped += 1
+                continue
+            old_id = manifest_by_url.get(url)
+            if old_id and old_id != doc_id:
+                superseded[old_id] = manifest[old_id]
+            pending[doc_id] = (len(split_passages(item.get("content", ""))), url)
+            yield doc_id, item
+
+    indexed_pages = {}
+    deleted_ids = set()
+
+    def record(op, doc_id):
+        if op == "index":
+            parent_id = doc_id.rsplit("-", 1)[0]
+            indexed_pages[parent_id] = indexed_pages.get(parent_id, 0) + 1
+        elif op == "delete":
+            deleted_ids.add(doc_id)
+
+    actions = embed_actions(changed_items(), batch_size, os.path.basename(input_path))
+    indexed, failed = run_bulk(actions, chunk_size, threads=1, on_success=record)
+    # 모든 passage가 올라간 기사만 manifest에 기록 (실패한 기사는 다음 sync에서 재시도)
+    for doc_id, (pages, url) in pending.items():
+        if indexed_pages.get(doc_id) == pages:
+            documents[doc_id] = {"version": index_version, "pages": pages, "url": url}
+
+    # 원본에서 사라진(또는 새 버전으로 대체된) 기사의 passage + 다시 올린 기사에서 줄어든 passage 삭제
+    removed = dict(superseded)
+    if not partial:
+        removed.update({doc_id: entry for doc_id, entry in manifest.items() if doc_id not in seen})
+    removed = {doc_id: entry for doc_id, entry in removed.items() if doc_id not in seen}
+    stale_ids = [cid for doc_id, entry in removed.items() for cid in manifest_chunk_ids(doc_id, entry)]
+    for doc_id, (pages, _) in pending.items():
+        if doc_id in manifest:
+            stale_ids += manifest_chunk_ids(doc_id, manifest[doc_id], first_page=pages + 1)
+    delete_actions = ({"_op_type": "delete", "_index": index_name, "_id": cid} for cid in stale_ids)
+    deleted, delete_failed = run_bulk(delete_actions, chunk_size, threads=1, on_success=record)
+    if legacy:
+        legacy_deleted, legacy_failed = delete_non_hash_documents(chunk_size)
+        print(f"🧹 해시 ID가 아닌 예전 문서 {legacy_deleted}개 삭제 (실패 {legacy_failed}개)")
+        deleted += legacy_deleted
+        delete_failed += legacy_failed
+    # 삭제에 실패한 기사는 다음 sync에서 다시 시도하도록 manifest에 남김
+    for doc_id, entry in removed.items():
+        if all(cid in deleted_ids for cid in manifest_chunk_ids(doc_id, entry)):
+            documents.pop(doc_id, None)
+        else:
+            documents[doc_id] = entry
+
+    save_manifest(documents, manifest_path)
+    if indexed or deleted:
+        bump_index_generation()
+    elapsed = time.perf_counter() - start
+    print(f"[2] 증분 동기화 완료: 업로드 {indexed}개 passage, 유지 {skipped}개 기사, 삭제 {deleted}개 passage, 실패 {failed + delete_failed}개 ({elapsed:.1f}초)")
+    return {"indexed": indexed, "skipped": skipped, "deleted": deleted, "failed": failed + delete_failed, "seconds": elapsed}
+
+# ---------------------- 무중단 재색인 (blue/green: 별칭 교체) ----------------------
+# index_name은 별칭, 실제 데이터는 세대별 인덱스 "{index_name}-v{시각}"에 있음
+# 새 세대를 다 채운 뒤 update_aliases 한 번으로 별칭을 옮김 → 검색(vector_search)은 중간 상태를 보지 않음
+# 이전 세대는 reindex_keep개까지 남겨 rollback에 사용
+
+def generation_manifest_path(name):
+    # 세대별 sync manifest (현재 세대의 manifest는 MANIFEST_PATH)
+    root, ext = os.path.splitext(MANIFEST_PATH)
+    return f"{root}.{name}{ext}"
+
+def list_generations():
+    """세대 인덱스 이름 목록 (오래된 것부터)"""
+    return sorted(get_client().indices.get(index=f"{index_name}-v*"))
+
+def alias_target():
+    """별칭이 가리키는 세대 인덱스 (별칭이 아니면 None)"""
+    try:
+        return next(iter(get_client().indices.get_alias(name=index_name)), None)
+    except NotFoundError:
+        return None
+
+@contextmanager
+def _writing_to(name):
+    # 업로드 함수들이 별칭 대신 새 세대 인덱스에 쓰도록 잠시 교체
+    global index_name
+    alias, index_name = index_name, name
+    try:
+        yield
+    finally:
+        index_name = alias
+
+def _switch_alias(target, drop_legacy=False):
+    """별칭을 target으로 옮기고 manifest도 교체 → 이전 세대 이름"""
+    previous = alias_target()
+    actions = [{"remove": {"index": previous, "alias": index_name}}] if previous else []
+    if drop_legacy:
+        # 별칭과 같은 이름의 예전 인덱스를 같은 요청 안에서 삭제 (삭제 ~ 별칭 추가 사이 공백 없음)
+        actions.append({"remove_index": {"index": index_name}})
+    actions.append({"add": {"index": target, "alias": index_name}})
+    get_client().indices.update_aliases(body={"actions": actions})
+    # 검색 쪽 캐시가 바로 비워지도록 generation 갱신 (별칭 → 새 세대 매핑)
+    bump_index_generation()
+
+    if previous:
+        save_manifest(load_manifest(MANIFEST_PATH), generation_manifest_path(previous), name=previous)
+    documents = load_manifest(generation_manifest_path(target), name=target)
+    save_manifest(documents, MANIFEST_PATH)
+    return previous
+
+def _prune_generations(keep):
+    current = alias_target()
+    old = [name for name in list_generations() if name != current]
+    for name in old[:max(0, len(old) - (keep - 1))]:
+        get_client().indices.delete(index=name)
+        path = generation_manifest_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"🗑️ 이전 세대 '{name}' 삭제")
+
+def reindex(input_path=INPUT_JSON, batch_size=None, chunk_size=None, drop_legacy=False, keep=None):
+    """
+    새 세대 인덱스를 만들어 전체 적재 → 설정 복구 + force merge → 별칭 교체 (검색 중단 없음)
+    - 적재 중에는 refresh를 끄고 복제본을 0으로 둠 (색인 속도 우선)
+    - drop_legacy=True: 별칭과 같은 이름의 예전 (별칭이 아닌) 인덱스를 교체 시점에 삭제
+    """
+    start = time.perf_counter()
+    client = get_client()
+    keep = keep or reindex_keep
+    legacy = client.indices.exists(index=index_name) and alias_target() is None
+    if legacy and not drop_legacy:
+        print(f"❌ '{index_name}'는 별칭이 아닌 인덱스입니다. 처음 한 번은 --drop-legacy로 교체하세요 (교체 시점에 삭제됨).")
+        return None
+
+    new_index = f"{index_name}-v{time.strftime('%Y%m%d%H%M%S')}"
+    while client.indices.exists(index=new_index):
+        time.sleep(1)
+        new_index = f"{index_name}-v{time.strftime('%Y%m%d%H%M%S')}"
+    client.indices.create(index=new_index, body=index_body())
+    client.indices.put_settings(index=new_index, body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}})
+    print(f"[1] 새 세대 '{new_index}' 적재 시작 (refresh 끔, 복제본 0)")
+
+    manifest_path = generation_manifest_path(new_index)
+    with _writing_to(new_index):
+        stats = sync_upload(input_path, batch_size=batch_size, chunk_size=chunk_size, manifest_path=manifest_path)
+    if stats["failed"]:
+        # 일부만 채워진 세대로는 교체하지 않음 (검색은 기존 세대 그대로)
+        client.indices.delete(index=new_index)
+        os.remove(manifest_path)
+        print(f"❌ 적재 실패 {stats['failed']}개 → 새 세대 삭제, 별칭은 그대로")
+        return None
+
+    client.indices.put_settings(index=new_index, body={"index": {"refresh_interval": refresh_interval, "number_of_replicas": index_replicas}})
+    client.indices.refresh(index=new_index)
+    merge_start = time.perf_counter()
+    client.indices.forcemerge(index=new_index, max_num_segments=1, request_timeout=3600)
+    print(f"[3] 설정 복구 + force merge 완료 ({time.perf_counter() - merge_start:.1f}초)")
+
+    previous = _switch_alias(new_index, drop_legacy=legacy)
+    print(f"🔀 별칭 '{index_name}': {previous or ('(예전 인덱스 삭제)' if legacy else '(없음)')} → {new_index}")
+    _prune_generations(keep)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 재색인 완료: {stats['indexed']}개 passage ({elapsed:.1f}초)")
+    return {**stats, "index": new_index, "previous": previous, "seconds": elapsed}
+
+def rollback(target=None):
+    """별칭을 이전 세대(또는 target)로 되돌림"""
+    current = alias_target()
+    generations = list_generations()
+    if target is None:
+        older = [name for name in generations if current and name < current]
+        target = older[-1] if older else None
+    if target is None or target not in generations:
+        print(f"❌ 되돌릴 세대가 없습니다 (세대 목록: {generations})")
+        return None
+    if target == current:
+        print(f"ℹ️ 별칭 '{index_name}'는 이미 '{target}'를 가리킵니다")
+        return target
+    _switch_alias(target)
+    print(f"⏪ 별칭 '{index_name}': {current} → {target}")
+    return target
+
+# ✅ 삭제 조건 쿼리 (datetime은 날짜가 토큰으로 쪼개져 다른 날까지 지워지지 않도록 keyword 필드로 정확히 비교)
+def build_delete_query(field, value):
+    if field == "id":
+        # 기사 ID(doc_id)면 그 기사의 passage 전체, passage ID({doc_id}-{page})면 그 passage 하나
+        return {"bool": {"should": [{"term": {"doc_id": value}}, {"term": {"id": value}}]}}
+    if field == "datetime":
+        return {"term": {"datetime.keyword": value}}
+    return {"match": {field: value}}
+
+# delete_by_query를 쓸 수 없다는 응답 (이때만 scroll + bulk delete로 대체)
+DELETE_BY_QUERY_UNSUPPORTED = (404, 405, 501)
+
+# ✅ 서버 쪽 delete_by_query로 조건에 맞는 문서 전체 삭제 (비동기 작업 + 진행 상황 조회)
+def delete_by_query(query, slices="auto", requests_per_second=None, wait=True, poll_interval=2.0):
+    """
+    - slices: 병렬 처리 단위 수 ("auto"면 샤드 수에 맞춤)
+    - requests_per_second: 초당 삭제 문서 수 제한 (None이면 제한 없음, 서비스 중 부하 조절용)
+    - wait=False면 작업 ID만 출력하고 바로 반환 (GET _tasks/<작업 ID>로 확인)
+    반환값: {"deleted", "failed", "seconds", "task"}
+    """
+    start = time.perf_counter()
+    params = {"slices": slices, "conflicts": "proceed", "refresh": "true", "wait_for_completion": "false"}
+    if requests_per_second:
+        params["requests_per_second"] = requests_per_second
+    task_id = get_client().delete_by_query(index=index_name, body={"query": query}, **params)["task"]
+    if not wait:
+        print(f"🕒 delete_by_query 작업 시작: {task_id} (완료 여부는 GET _tasks/{task_id}로 확인)")
+        return {"deleted": None, "failed": None, "seconds": time.perf_counter() - start, "task": task_id}
+
+    while True:
+        task = get_client().tasks.get(task_id=task_id)
+        if task.get("completed"):
+            break
+        status = task["task"]["status"]
+        print(f"  ⏳ 삭제 중... {status.get('deleted', 0)}/{status.get('total', 0)}")
+        time.sleep(poll_interval)
+
+    response = task.get("response", {})
+    failures = response.get("failures", [])
+    if task.get("error"):
+        failures.append(task["error"])
+    for failure in failures[:5]:
+        print(f"⚠️ 삭제 실패: {failure}")
+    return {
+        "deleted": response.get("deleted", 0),
+        "failed": len(failures) + response.get("version_conflicts", 0),
+        "seconds": time.perf_counter() - start,
+        "task": task_id
+    }
+
+# ✅ delete_by_query를 쓸 수 없을 때: scroll로 ID만 모아 bulk delete
+def scroll_delete(query, chunk_size=None, scroll="5m"):
+    start = time.perf_counter()
+    chunk_size = chunk_size or bulk_chunk_size
+    # scroll은 검색 시점 스냅샷이라 삭제하면서 읽어도 누락/중복 없음
+    hits = helpers.scan(get_client(), index=index_name, query={"query": query, "_source": False}, scroll=scroll, size=chunk_size)
+    actions = ({"_op_type": "delete", "_index": index_name, "_id": hit["_id"]} for hit in hits)
+    deleted, failed = run_bulk(actions, chunk_size, threads=1)
+    get_client().indices.refresh(index=index_name)
+    return {"deleted": deleted, "failed": failed, "seconds": time.perf_counter() - start, "task": None}
+
+# ✅ 직접 지운 기사를 sync manifest에서도 제거 (다음 --sync에서 입력에 있으면 다시 업로드)
+def forget_manifest_entry(value, manifest_path=MANIFEST_PATH):
+    documents = load_manifest(manifest_path)
+    # passage ID면 그 passage가 속한 기사 항목을 제거
+    doc_id = value if value in documents else value.rsplit("-", 1)[0]
+    if documents.pop(doc_id, None) is not None:
+        save_manifest(documents, manifest_path)
+
 # ✅ 문서 삭제 (id와 조건으로)
-def delete_documents(field=None, value=None):
-    if not client.indices.exists(index=index_name):
+def delete_documents(field=None, value=None, method="query", slices="auto", requests_per_second=None, wait=True):
+    """
+    조건에 맞는 문서를 모두 삭제
+    - field="id": 기사 ID(doc_id)면 그 기사의 passage 전체, passage ID면 그 passage 하나
+    - method="query": 서버 쪽 delete_by_query (지원하지 않는 클러스터면 scroll로 대체)
+    - method="scroll": scroll + bulk delete
+    """
+    if not get_client().indices.exists(index=index_name):
         print(f"❌ 인데그스 '{index_name}' 존재하지 않음")
         return
 
     if not field or not value:
+        if alias_target():
+            print(f"❌ '{index_name}'는 재색인 별칭입니다. 전체 교체는 reindex, 되돌리기는 rollback을 사용하세요.")
+            return
         confirm = input("⚠️ 인데그스 전체를 삭제하시겠습니까? (yes/no): ").strip().lower()
         if confirm == "yes":
-            client.indices.delete(index=index_name)
+            get_client().indices.delete(index=index_name)
             print(f"🗑️ 인데그스 '{index_name}' 삭제 완료")
         else:
             print("❌ 삭제 중지")
         return
 
-    # id 값으로 바로 삭제
-    if field == "id":
-        res = client.delete(index=index_name, id=value, ignore=[404])
-        if res.get("result") == "deleted":
-            print(f"🗑️ ID '{value}' 문서 삭제 완료")
-        else:
-            print(f"❌ ID '{value}' 문서 찾을 수 없음")
+    # 조건에 맞는 문서 전체 삭제 (검색 결과 1000개 제한 없음)
+    query = build_delete_query(field, value)
+    if method == "query":
+        try:
+            stats = delete_by_query(query, slices, requests_per_second, wait)
+        except TransportError as e:
+            # 엔드포인트를 지원하지 않는 클러스터만 대체 (연결 오류 / 시간 초과 / 잘못된 쿼리(400)는 그대로 전파)
+            if e.status_code not in DELETE_BY_QUERY_UNSUPPORTED:
+                raise
+            print(f"⚠️ delete_by_query 미지원 ({e.status_code}) → scroll + bulk 삭제로 대체 ({e})")
+            method = "scroll"
+    if method == "scroll":
+        stats = scroll_delete(query)
+
+    # 비동기 작업(wait=False)도 곧 삭제되므로 검색 결과 캐시는 바로 무효화
+    if stats["deleted"] != 0:
+        bump_index_generation()
+        if field == "id":
+            forget_manifest_entry(value, MANIFEST_PATH)
+    if stats["deleted"] is None:
+        return stats
+    if stats["deleted"]:
+        print(f"🗑️ 조건 삭제 완료 ({method}): {stats['deleted']}개 삭제, 실패 {stats['failed']}개 ({stats['seconds']:.1f}초)")
     else:
-        # match 조건으로 검색 후 삭제
-        query = {"match": {field: value}}
-        search_res = client.search(index=index_name, body={"query": query, "_source": False, "size": 1000})
-        hits = search_res["hits"]["hits"]
-
-        if not hits:
-            print(f"❌ 검색 결과 없음 (field: {field}, value: {value})")
-            return
-
-        for hit in hits:
-            client.delete(index=index_name, id=hit["_id"], ignore=[404])
-        print(f"🗑️ 검색으로 찾은 {len(hits)}개 문서 삭제 완료")
+        print(f"❌ 검색 결과 없음 (field: {field}, value: {value})")
+    return stats
 
 # ✅ 인데그스 확인
 def check_index():
     print("🔪 인데그스 상태 점검 중...")
-    if client.indices.exists(index=index_name):
-        count = client.count(index=index_name)["count"]
+    if get_client().indices.exists(index=index_name):
+        count = get_client().count(index=index_name)["count"]
         print(f"✅ 인데그스 '{index_name}' 존재 (문서 수: {count})")
+        current = alias_target()
+        if current:
+            print(f"🔀 별칭 → '{current}' (세대: {', '.join(list_generations())})")
     else:
         print(f"❌ 인데그스 '{index_name}' 존재하지 않음")
 
 # ✅ 문서 미리보기 (+ 검색)
 def preview_documents(size=5, field=None, value=None):
-    if not client.indices.exists(index=index_name):
+    if not get_client().indices.exists(index=index_name):
         print(f"❌ 인데그스 '{index_name}' 존재하지 않음")
         return
 
     if field and value:
         if field == "id":
-            query = {"term": {field: value}}
+            query = build_delete_query(field, value)
         else:
             query = {"match": {field: value}}
     else:
         query = {"match_all": {}}
 
-    res = client.search(index=index_name, body={"size": size, "query": query})
+    res = get_client().search(index=index_name, body={"size": size, "query": query})
     hits = res["hits"]["hits"]
 
     if not hits:
@@ -240,20 +772,49 @@ if __name__ == "__main__":
         interactive_cli()
     else:
         parser = argparse.ArgumentParser()
-        parser.add_argument("command", choices=["upload", "check", "preview", "delete"], help="실행 명령")
-        parser.add_argument("--field", help="검색할 필드 (id, title, content)")
+        parser.add_argument("command", choices=["upload", "check", "preview", "delete", "reindex", "rollback"], help="실행 명령")
+        parser.add_argument("--field", help="검색할 필드 (id, title, content, datetime / id는 기사 ID 또는 passage ID)")
         parser.add_argument("--value", help="검색 키워드")
         parser.add_argument("--size", type=int, default=5, help="미리보기 개수 (기본: 5)")
+        parser.add_argument("--stream", action="store_true", help="중간 파일 없이 배치 임베딩 + 스트리밍 업로드")
+        parser.add_argument("--sync", action="store_true", help="내용 해시 기반 증분 동기화 (새/변경 문서만 업로드, 사라진 문서 삭제)")
+        parser.add_argument("--partial", action="store_true", help="--sync 입력이 새/변경 기사만 담은 파일 (입력에 없는 기사는 삭제하지 않음)")
+        parser.add_argument("--input", default=INPUT_JSON, help="업로드할 입력 파일 (.json 배열 또는 .jsonl, --stream/--sync/reindex 전용)")
+        parser.add_argument("--batch-size", type=int, help=f"임베딩 배치 크기 (기본: {embed_batch_size})")
+        parser.add_argument("--chunk-size", type=int, help=f"bulk 요청당 문서 수 (기본: {bulk_chunk_size})")
+        parser.add_argument("--threads", type=int, help=f"parallel_bulk 스레드 수 (기본: {bulk_threads})")
+        parser.add_argument("--embed-workers", type=int, help="임베딩 워커 프로세스 수 (-1: CPU 코어 수, 기본: EMBEDDING_WORKERS 환경변수)")
+        parser.add_argument("--method", choices=["query", "scroll"], default="query", help="조건 삭제 방식 (query: delete_by_query, scroll: scroll + bulk)")
+        parser.add_argument("--slices", default="auto", help="delete_by_query 병렬 처리 단위 수 (기본: auto)")
+        parser.add_argument("--rps", type=float, help="delete_by_query 초당 삭제 문서 수 제한")
+        parser.add_argument("--no-wait", action="store_true", help="delete_by_query 작업 완료를 기다리지 않음")
+        parser.add_argument("--drop-legacy", action="store_true", help="reindex: 별칭과 같은 이름의 예전 인덱스를 교체 시점에 삭제")
+        parser.add_argument("--keep", type=int, help=f"reindex: 남겨 둘 세대 수 (기본: {reindex_keep})")
+        parser.add_argument("--to", help="rollback: 되돌릴 세대 인덱스 이름 (기본: 바로 이전 세대)")
         args = parser.parse_args()
+        if args.embed_workers is not None:
+            # 임베딩 모델은 처음 encode할 때 로드되므로 그 전에만 바꾸면 됨
+            providers.EMBEDDING_WORKERS = args.embed_workers
 
         if args.command == "upload":
             print("🚀 업로드 시작")
-            create_index_if_not_exists(index_name)
-            convert_json_to_bulk()
-            upload_bulk_jsonl()
+            if args.sync:
+                sync_upload(args.input, batch_size=args.batch_size, chunk_size=args.chunk_size, partial=args.partial)
+            elif args.stream:
+                create_index_if_not_exists(index_name)
+                upload_stream(args.input, batch_size=args.batch_size, chunk_size=args.chunk_size, threads=args.threads)
+            else:
+                create_index_if_not_exists(index_name)
+                convert_json_to_bulk()
+                upload_bulk_jsonl()
         elif args.command == "check":
             check_index()
         elif args.command == "preview":
             preview_documents(size=args.size, field=args.field, value=args.value)
         elif args.command == "delete":
-            delete_documents(field=args.field, value=args.value)
+            delete_documents(field=args.field, value=args.value, method=args.method, slices=args.slices,
+                             requests_per_second=args.rps, wait=not args.no_wait)
+        elif args.command == "reindex":
+            reindex(args.input, batch_size=args.batch_size, chunk_size=args.chunk_size, drop_legacy=args.drop_legacy, keep=args.keep)
+        elif args.command == "rollback":
+            rollback(args.to)
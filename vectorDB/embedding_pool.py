@@ -0,0 +1,318 @@
+import os
+import sys
+import math
+import time
+import queue
+import atexit
+import threading
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+import numpy as np
+import metrics
+
+# ---------------------- 임베딩 워커 프로세스 풀 ----------------------
+# - 워커 N개가 각자 모델을 한 번 로드하고, 부모 프로세스는 모델을 로드하지 않음
+# - 동시에 들어온 encode 요청(봇의 질의 1개씩)은 max_batch까지 모아 한 번에 encode (micro-batching)
+# - 큰 요청(업로드 배치)은 워커 수만큼 나눠 병렬로 encode
+# - 결과는 워커별 공유 메모리 버퍼로 돌려받음 (pickle된 리스트 대신 행렬을 그대로 복사)
+#   버퍼는 워커의 다음 배치가 덮어쓰므로 encode는 공유 메모리 view가 아니라 복사한 일반 numpy 배열을 돌려줌
+# SentenceTransformer.encode와 같은 호출 형식이라 providers.set_embedding_model()로 그대로 교체 가능
+
+def _worker_main(conn, factory, threads):
+    """워커 프로세스: 모델 로드 → (준비, 차원) 전송 → 공유 메모리 이름을 받아 encode 반복"""
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    model = factory()
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    dimension = len(model.encode(["warm up"], show_progress_bar=False)[0])
+    conn.send(("ready", dimension))
+    shm = shared_memory.SharedMemory(name=conn.recv())
+    max_rows = shm.size // (dimension * 4)
+    output = np.ndarray((max_rows, dimension), dtype=np.float32, buffer=shm.buf)
+    try:
+        while True:
+            texts = conn.recv()
+            if texts is None:
+                break
+            try:
+                embeddings = model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+                output[:len(texts)] = embeddings
+                conn.send(("ok", len(texts)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del output
+        shm.close()
+
+class _Request:
+    def __init__(self, count, dimension):
+        self.out = np.empty((count, dimension), dtype=np.float32)
+        self.remaining = count
+        self.future = Future()
+
+class _Worker:
+    def __init__(self, process, conn, shm, output):
+        self.process = process
+        self.conn = conn
+        self.shm = shm
+        self.output = output
+        self.parts = []  # 처리 중인 배치: [(요청, 시작 행, 개수)]
+        self.dead = False
+
+class EmbeddingPool:
+    """
+    사용법:
+        pool = EmbeddingPool(providers._load_embedding_model, workers=4)
+        pool.encode("질문")                  # 1차원 배열
+        pool.encode(["문서1", "문서2", ...])  # (문서 수, 차원) 배열
+        pool.close()
+    - factory: 워커 안에서 모델을 만드는 함수 (spawn으로 넘어가므로 모듈 최상위 함수/클래스여야 함)
+    - workers: 워커 프로세스 수 (기본: CPU 코어 수)
+    - max_batch: 워커가 한 번에 encode할 최대 문장 수 (= 공유 메모리 버퍼 행 수)
+    - max_wait_ms: 배치를 채우려고 기다리는 최대 시간 (워커가 모두 바쁘면 그동안 요청이 저절로 쌓임)
+    """
+
+    def __init__(self, factory, workers=None, max_batch=32, max_wait_ms=2.0, start_timeout=300):
+        self.factory = factory
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.start_timeout = start_timeout
+        # 코어를 워커끼리 나눠 씀 (워커마다 모든 코어를 쓰면 서로 경쟁)
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.dimension = None
+        self.batches = 0
+        self.texts = 0
+        self._context = mp.get_context("spawn")  # torch 스레드가 있는 프로세스에서 fork하지 않음
+        self._pending = deque()  # [_Request, 문장 목록, 시작 행, 끝 행]
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()  # 쉬는 _Worker
+        self._closed = False
+
+        start = time.perf_counter()
+        self._workers = [None] * self.workers
+        processes = [self._spawn() for _ in range(self.workers)]
+        for i, (process, conn) in enumerate(processes):
+            self._workers[i] = self._attach(process, conn)
+        for worker in self._workers:
+            self._idle.put(worker)
+        threading.Thread(target=self._dispatch_loop, name="embedding-dispatch", daemon=True).start()
+        atexit.register(self.close)
+        print(f"[LOG] 임베딩 워커 {self.workers}개 준비 (차원 {self.dimension}, 워커당 스레드 {self.threads}, {time.perf_counter() - start:.1f}s)")
+
+    # ---------------------- 워커 관리 ----------------------
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.factory, self.threads), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _attach(self, process, conn):
+        """워커 준비 대기 → 공유 메모리 버퍼를 만들어 이름 전달"""
+        if not conn.poll(self.start_timeout):
+            process.terminate()
+            raise RuntimeError(f"임베딩 워커가 {self.start_timeout}초 안에 준비되지 않았습니다")
+        try:
+            _, dimension = conn.recv()
+        except EOFError:
+            raise RuntimeError(f"임베딩 워커 시작 실패 (exit code {process.exitcode})") from None
+        if self.dimension is None:
+            self.dimension = dimension
+        shm = shared_memory.SharedMemory(create=True, size=self.max_batch * dimension * 4)
+        conn.send(shm.name)
+        worker = _Worker(process, conn, shm, np.ndarray((self.max_batch, dimension), dtype=np.float32, buffer=shm.buf))
+        threading.Thread(target=self._collect_loop, args=(worker,), name="embedding-collect", daemon=True).start()
+        return worker
+
+    def _release_worker(self, worker):
+        # 재시작과 close()가 겹쳐도 공유 메모리는 한 번만 해제
+        with self._lock:
+            shm, worker.shm = worker.shm, None
+        if shm is None:
+            return
+        worker.output = None
+        shm.close()
+        shm.unlink()
+        worker.conn.close()
+
+    def _stop_worker(self, worker):
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.terminate()
+        self._release_worker(worker)
+
+    def _restart(self, worker):
+        # 죽은 워커 교체 (모델 로드 실패 등으로 다시 못 띄우면 그 자리는 비워 둠)
+        self._release_worker(worker)
+        if self._closed:
+            return
+        try:
+            replacement = self._attach(*self._spawn())
+        except RuntimeError as e:
+            print(f"⚠️ 임베딩 워커 재시작 실패: {e}")
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._workers[self._workers.index(worker)] = replacement
+        if closed:
+            # 새 워커를 띄우는 사이 풀이 종료됨
+            self._stop_worker(replacement)
+            return
+        self._idle.put(replacement)
+
+    # ---------------------- 요청 → 배치 ----------------------
+    def encode(self, sentences, batch_size=None, show_progress_bar=False, **kwargs):
+        """SentenceTransformer.encode와 같은 형식 (batch_size / show_progress_bar는 호환용, 배치는 풀이 정함)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self._closed:
+            raise RuntimeError("임베딩 풀이 이미 종료되었습니다")
+        request = _Request(len(texts), self.dimension)
+        if not texts:
+            return request.out
+        # 큰 요청은 워커 수만큼 나눠서 병렬 처리
+        piece = max(1, min(self.max_batch, math.ceil(len(texts) / self.workers)))
+        with self._cond:
+            for start in range(0, len(texts), piece):
+                self._pending.append([request, texts, start, min(start + piece, len(texts))])
+            self._cond.notify()
+        out = request.future.result()
+        return out[0] if single else out
+
+    def _take_batch(self):
+        """대기 중인 요청에서 max_batch개까지 모음 → [(요청, 시작 행, 개수)], 문장 목록"""
+        parts, texts = [], []
+        deadline = None
+        with self._cond:
+            while len(texts) < self.max_batch:
+                if not self._pending:
+                    if self._closed:
+                        break
+                    if texts:
+                        deadline = deadline or time.monotonic() + self.max_wait
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                    continue
+                entry = self._pending[0]
+                request, source, start, end = entry
+                count = min(end - start, self.max_batch - len(texts))
+                parts.append((request, start, count))
+                texts += source[start:start + count]
+                if start + count == end:
+                    self._pending.popleft()
+                else:
+                    entry[2] = start + count
+        return parts, texts
+
+    def _dispatch_loop(self):
+        while True:
+            # 쉬는 워커가 생길 때까지 기다리는 동안 요청이 쌓여 다음 배치가 커짐
+            worker = self._idle.get()
+            if worker is None:
+                return
+            if worker.dead:
+                continue
+            parts, texts = self._take_batch()
+            if not texts:
+                return
+            while True:
+                with self._lock:
+                    if not worker.dead:
+                        worker.parts = parts
+                        break
+                # 배치를 모으는 사이 워커가 죽음 → 다른 워커를 기다림
+                worker = self._idle.get()
+                if worker is None:
+                    self._fail(parts, RuntimeError("임베딩 풀이 종료되었습니다"))
+                    return
+            # 결과가 돌아오기 전에 집계 (encode가 끝난 뒤 stats()에 항상 반영되도록)
+            self.batches += 1
+            self.texts += len(texts)
+            metrics.inc("embedding_pool_batches_total")
+            metrics.inc("embedding_pool_texts_total", len(texts))
+            try:
+                worker.conn.send(texts)
+            except (OSError, ValueError):
+                # 워커가 막 죽음: 수집 스레드가 parts를 실패 처리하고 워커를 다시 띄움
+                continue
+
+    # ---------------------- 결과 수집 ----------------------
+    def _fail(self, parts, error):
+        for request, _, _ in parts:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _collect_loop(self, worker):
+        while True:
+            try:
+                status, value = worker.conn.recv()
+            except (EOFError, OSError):
+                if self._closed:
+                    return
+                with self._lock:
+                    worker.dead = True
+                    parts, worker.parts = worker.parts, []
+                worker.process.join(timeout=1)
+                print(f"⚠️ 임베딩 워커 종료됨 (exit code {worker.process.exitcode}) → 다시 시작")
+                self._fail(parts, RuntimeError("임베딩 워커가 비정상 종료되었습니다"))
+                self._restart(worker)
+                return
+            parts, worker.parts = worker.parts, []
+            if status == "error":
+                self._fail(parts, RuntimeError(value))
+            else:
+                # 공유 메모리 버퍼는 다음 배치에서 다시 쓰므로 워커를 돌려놓기 전에 복사
+                offset = 0
+                for request, start, count in parts:
+                    request.out[start:start + count] = worker.output[offset:offset + count]
+                    offset += count
+                    with self._lock:
+                        request.remaining -= count
+                        done = request.remaining == 0
+                    if done and not request.future.done():
+                        request.future.set_result(request.out)
+            self._idle.put(worker)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": self.texts / self.batches if self.batches else 0.0,
+            "pending_requests": len(self._pending),
+        }
+
+    def close(self):
+        """워커 종료 + 공유 메모리 해제 (프로세스 종료 시 자동 호출)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        with self._cond:
+            self._cond.notify_all()
+        self._idle.put(None)
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            self._stop_worker(worker)
+        self._fail([(request, 0, 0) for request, *_ in self._pending], RuntimeError("임베딩 풀이 종료되었습니다"))
+        self._pending.clear()
@@ -0,0 +1,8 @@
+from search_engine import InProcessOpenSearch
+
+# 🧪 프로세스 내 메모리 OpenSearch 대역 (벤치마크 / OpenSearch 없이 파이프라인 확인용)
+# 검색 / 인덱스 관리 동작은 search_engine.InProcessOpenSearch 그대로, 인덱스는 메모리에만 둠
+# 프로세스가 끝나면 내용은 사라짐 (디스크에 남기려면 local_store.LocalVectorStore)
+
+class FakeOpenSearch(InProcessOpenSearch):
+    """providers.set_client(FakeOpenSearch()) 또는 SEARCH_BACKEND=fake"""
@@ -0,0 +1,295 @@
+import os
+import json
+import shutil
+import numpy as np
+from search_engine import InProcessOpenSearch, MemoryIndex, normalize_rows
+
+# 💾 OpenSearch 없이 쓰는 로컬 벡터 저장소 (소규모 배포 / 단독 실행 봇용)
+# 인덱스마다 디렉토리 하나:
+#   index.json          차원, dtype, 행 수, 파일 이름, 매핑(_meta.generation 포함)
+#   vectors-<n>.bin     정규화된 임베딩 행렬 (행 수 × 차원, float32/float16, memmap으로 읽음)
+#   meta-<n>.jsonl      행마다 문서 ID + 메타데이터(제목, passage 본문, url 등) 한 줄
+#   deleted.npy         삭제된 행 표시 (덮어쓰기/삭제는 행을 지우지 않고 표시만 함)
+# 별칭은 저장소 폴더의 aliases.json에 기록 (다른 프로세스는 파일이 바뀌면 다시 읽음 → 재색인 후 교체가 바로 보임)
+# - 벡터 파일은 읽기 전용 memmap이라 여러 워커 프로세스가 같은 페이지 캐시를 공유
+# - 쓰기는 한 프로세스만 (업로드 스크립트), 다른 프로세스는 index.json이 바뀌면 다시 읽음
+# - 삭제된 행이 절반을 넘으면 파일을 새로 써서 정리(compact)
+# - 검색 API는 search_engine.InProcessOpenSearch (knn / 필터 / BM25 비슷한 텍스트 검색 / msearch 배치 / 별칭)
+
+INFO_FILE = "index.json"
+ALIASES_FILE = "aliases.json"  # 저장소 폴더 바로 아래: {별칭: 인덱스}
+DELETED_FILE = "deleted.npy"
+COMPACT_MIN_DELETED = 1024  # 이보다 적게 삭제됐으면 정리하지 않음
+FLOAT16_BLOCK_ROWS = 65536  # float16 행렬은 이 행 수씩 float32로 바꿔 계산
+
+def _write_atomic(path, write):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def _file_stamp(path):
+    # os.replace로 바뀔 때마다 inode가 달라짐 → 다른 프로세스의 쓰기 감지
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+class _StoredIndex(MemoryIndex):
+    def __init__(self, directory, body=None, dtype="float32"):
+        super().__init__(body)
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.vector_field, self.dimension = self._vector_mapping()
+        self.count = 0                       # 파일에 쓴 행 수 (삭제된 행 포함)
+        self.meta_bytes = 0                  # meta 파일에서 유효한 바이트 수
+        self.version = 0
+        self.vectors_file = "vectors-0.bin"
+        self.meta_file = "meta-0.jsonl"
+        self.row_ids = []                    # 행 번호 → 문서 ID
+        self.row_of = {}                     # 살아 있는 문서 ID → 행 번호
+        self.deleted = np.zeros(0, dtype=bool)
+        self.stamp = None
+        self._vectors = None                 # 읽기 전용 memmap (count × dimension)
+        self._pending = {}                   # 아직 파일에 쓰지 않은 문서 ID → (메타데이터, 임베딩)
+
+    def _vector_mapping(self):
+        for name, prop in self.mappings.get("properties", {}).items():
+            if prop.get("type") == "knn_vector":
+                return name, prop.get("dimension")
+        return "embedding", None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # ---------------------- 읽기 ----------------------
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, INFO_FILE), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        target = cls(directory, {"settings": info["settings"], "mappings": info["mappings"]}, info["dtype"])
+        target.stamp = _file_stamp(target._path(INFO_FILE))
+        target.dimension = info["dimension"]
+        target.count = info["count"]
+        target.meta_bytes = info["meta_bytes"]
+        target.version = info["version"]
+        target.vectors_file = info["vectors_file"]
+        target.meta_file = info["meta_file"]
+
+        deleted = np.zeros(target.count, dtype=bool)
+        if os.path.exists(target._path(DELETED_FILE)):
+            saved = np.load(target._path(DELETED_FILE))[:target.count]
+            deleted[:len(saved)] = saved
+        target.deleted = deleted
+
+        if target.meta_bytes:
+            with open(target._path(target.meta_file), "rb") as f:
+                lines = f.read(target.meta_bytes).decode("utf-8").splitlines()
+            for row, line in enumerate(lines[:target.count]):
+                source = json.loads(line)
+                doc_id = source.pop("_id")
+                target.row_ids.append(doc_id)
+                if not deleted[row]:
+                    target.docs[doc_id] = source
+                    target.row_of[doc_id] = row
+        target._open_vectors()
+        return target
+
+    def _open_vectors(self):
+        if self.count and self.dimension:
+            self._vectors = np.memmap(self._path(self.vectors_file), dtype=self.dtype, mode="r",
+                                      shape=(self.count, self.dimension))
+        else:
+            self._vectors = np.zeros((0, self.dimension or 0), dtype=self.dtype)
+
+    def vector_rows(self, field):
+        if field != self.vector_field:
+            return [], np.zeros((0, 0), dtype=self.dtype), None, {}
+        return self.row_ids, self._vectors, ~self.deleted, self.row_of
+
+    def similarities(self, matrix, queries):
+        if matrix.dtype == np.float32:
+            return queries @ np.asarray(matrix).T
+        # float16은 블록 단위로 float32로 바꿔서 계산 (전체 복사본을 만들지 않음)
+        sims = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), FLOAT16_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + FLOAT16_BLOCK_ROWS], dtype=np.float32)
+            sims[:, start:start + len(block)] = queries @ block.T
+        return sims
+
+    # ---------------------- 쓰기 (commit 전까지는 메모리에만) ----------------------
+    def _tombstone(self, doc_id):
+        row = self.row_of.pop(doc_id, None)
+        if row is not None:
+            self.deleted[row] = True
+
+    def put(self, doc_id, source):
+        source = dict(source)
+        vector = source.pop(self.vector_field, None)
+        if vector is None:
+            vector = np.zeros(self.dimension or 0, dtype=np.float32)
+        created = doc_id not in self.docs
+        self._tombstone(doc_id)
+        self.docs[doc_id] = source
+        self._pending[doc_id] = (source, np.asarray(vector, dtype=np.float32))
+        self._invalidate()
+        return created
+
+    def remove(self, doc_id):
+        if doc_id not in self.docs:
+            return False
+        self._pending.pop(doc_id, None)
+        self._tombstone(doc_id)
+        del self.docs[doc_id]
+        self._invalidate()
+        return True
+
+    def commit(self):
+        """대기 중인 행을 파일 끝에 추가하고 index.json을 원자적으로 교체 (다른 프로세스에 공개)"""
+        os.makedirs(self.directory, exist_ok=True)
+        if self._pending:
+            rows = list(self._pending.items())
+            vectors = np.stack([vector for _, (_, vector) in rows])
+            self.dimension = self.dimension or vectors.shape[1]
+            vectors = normalize_rows(vectors.reshape(len(rows), self.dimension)).astype(self.dtype)
+            # 이전에 중간에 끊긴 쓰기가 남긴 꼬리는 덮어씀 (index.json의 count / meta_bytes까지만 유효)
+            self._append(self.vectors_file, self.count * self.dimension * self.dtype.itemsize, vectors.tobytes())
+            data = "".join(json.dumps({"_id": doc_id, **source}, ensure_ascii=False) + "\n" for doc_id, (source, _) in rows)
+            self.meta_bytes = self._append(self.meta_file, self.meta_bytes, data.encode("utf-8"))
+            for i, (doc_id, _) in enumerate(rows):
+                self.row_of[doc_id] = self.count + i
+                self.row_ids.append(doc_id)
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(rows), dtype=bool)])
+            self.count += len(rows)
+            self._pending = {}
+        self._save()
+        deleted = int(self.deleted.sum())
+        if deleted >= COMPACT_MIN_DELETED and deleted * 2 > self.count:
+            self.compact()
+
+    def _append(self, name, offset, data):
+        path = self._path(name)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        return offset + len(data)
+
+    def _save(self):
+        _write_atomic(self._path(DELETED_FILE), lambda f: np.save(f, self.deleted))
+        self.version += 1
+        info = {
+            "dimension": self.dimension, "dtype": self.dtype.name, "count": self.count,
+            "meta_bytes": self.meta_bytes, "version": self.version,
+            "vectors_file": self.vectors_file, "meta_file": self.meta_file,
+            "settings": self.settings, "mappings": self.mappings
+        }
+        _write_atomic(self._path(INFO_FILE), lambda f: f.write(json.dumps(info, ensure_ascii=False).encode("utf-8")))
+        self.stamp = _file_stamp(self._path(INFO_FILE))
+        self._open_vectors()
+
+    def compact(self):
+        """삭제된 행을 빼고 새 파일로 다시 씀 (기존 파일을 열어 둔 프로세스는 다시 읽을 때까지 이전 파일 사용)"""
+        old_files = (self.vectors_file, self.meta_file)
+        alive = np.flatnonzero(~self.deleted)
+        self.vectors_file = f"vectors-{self.version + 1}.bin"
+        self.meta_file = f"meta-{self.version + 1}.jsonl"
+        with open(self._path(self.vectors_file), "wb") as f:
+            for start in range(0, len(alive), FLOAT16_BLOCK_ROWS):
+                f.write(np.asarray(self._vectors[alive[start:start + FLOAT16_BLOCK_ROWS]]).tobytes())
+        row_ids = [self.row_ids[row] for row in alive]
+        data = "".join(json.dumps({"_id": doc_id, **self.docs[doc_id]}, ensure_ascii=False) + "\n" for doc_id in row_ids)
+        with open(self._path(self.meta_file), "wb") as f:
+            f.write(data.encode("utf-8"))
+        self.row_ids = row_ids
+        self.row_of = {doc_id: row for row, doc_id in enumerate(row_ids)}
+        self.deleted = np.zeros(len(row_ids), dtype=bool)
+        self.count = len(row_ids)
+        self.meta_bytes = len(data.encode("utf-8"))
+        self._save()
+        for name in old_files:
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+
+class LocalVectorStore(InProcessOpenSearch):
+    """
+    OpenSearch 클라이언트와 같은 호출 방식의 로컬 저장소 (providers.set_client 또는 SEARCH_BACKEND=local)
+    - path: 인덱스 디렉토리들을 둘 폴더
+    - dtype: 임베딩 저장 형식 ("float32" 또는 메모리를 절반만 쓰는 "float16")
+    """
+
+    def __init__(self, path, dtype="float32"):
+        super().__init__()
+        self.path = path
+        self.dtype = dtype
+        self._alias_stamp = None
+
+    def _resolve(self, index):
+        path = os.path.join(self.path, ALIASES_FILE)
+        try:
+            stamp = _file_stamp(path)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._alias_stamp:
+            if stamp is None:
+                self._aliases = {}
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._aliases = json.load(f)
+            self._alias_stamp = stamp
+        return super()._resolve(index)
+
+    def _aliases_changed(self):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, ALIASES_FILE)
+        _write_atomic(path, lambda f: f.write(json.dumps(self._aliases, ensure_ascii=False).encode("utf-8")))
+        self._alias_stamp = _file_stamp(path)
+
+    def _list_indices(self):
+        if not os.path.isdir(self.path):
+            return []
+        return [name for name in os.listdir(self.path) if os.path.exists(os.path.join(self.path, name, INFO_FILE))]
+
+    def _force_merge(self, target):
+        if target.deleted.any():
+            target.compact()
+
+    def _index_dir(self, index):
+        if not index or os.sep in index or index.startswith("."):
+            raise ValueError(f"잘못된 인덱스 이름: {index}")
+        return os.path.join(self.path, index)
+
+    def _find_index(self, index):
+        index = self._resolve(index)
+        directory = self._index_dir(index)
+        try:
+            stamp = _file_stamp(os.path.join(directory, INFO_FILE))
+        except FileNotFoundError:
+            self._indices.pop(index, None)
+            return None
+        target = self._indices.get(index)
+        # 다른 프로세스가 업로드했으면 다시 읽음 (이 프로세스에서 쓰는 중이면 그대로)
+        if target is None or (target.stamp != stamp and not target._pending):
+            target = self._indices[index] = _StoredIndex.load(directory)
+        return target
+
+    def _create_index(self, index, body):
+        target = _StoredIndex(self._index_dir(index), body, self.dtype)
+        target.commit()
+        self._indices[index] = target
+        return target
+
+    def _drop_index(self, index):
+        if self._find_index(index) is None:
+            return False
+        shutil.rmtree(self._index_dir(index))
+        self._indices.pop(index, None)
+        return True
+
+    def _write_done(self, targets):
+        for target in targets:
+            target.commit()
+
+    def compact(self, index):
+        with self._lock:
+            self._get_index(index).compact()
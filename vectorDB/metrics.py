@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 📊 응답 파이프라인 단계별 지연 시간 수집 (Prometheus 텍스트 포맷 / JSON 로그)
+PREFIX = "commentator_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# 설정하면 측정값마다 한 줄씩 JSON으로 기록
+JSON_LOG_PATH = os.getenv("METRICS_JSON_LOG")
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_gauges = {}
+
+class Histogram:
+    def __init__(self, name, buckets):
+        self.name = name
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+# ---------------------- JSON 로그 (백그라운드 기록) ----------------------
+# 측정하는 스레드는 큐에 넣기만 하고, 파일은 기록 스레드 하나가 열어 둔 핸들로 씀 (지표 잠금 밖)
+_json_queue = queue.SimpleQueue()
+_json_writer = None
+_json_writer_lock = threading.Lock()
+
+def _json_writer_loop():
+    with open(JSON_LOG_PATH, "a", encoding="utf-8") as f:
+        while True:
+            line = _json_queue.get()
+            while line is not None:
+                f.write(line)
+                try:
+                    line = _json_queue.get_nowait()
+                except queue.Empty:
+                    break
+            # 큐가 빌 때마다 한 번만 flush
+            f.flush()
+            if line is None:
+                return
+
+def _close_json_log():
+    """남은 기록을 모두 쓰고 파일을 닫음 (프로세스 종료 시 자동 호출)"""
+    if _json_writer is not None and _json_writer.is_alive():
+        _json_queue.put(None)
+        _json_writer.join(timeout=5)
+
+def _log_json(kind, name, value, labels=None):
+    global _json_writer
+    if not JSON_LOG_PATH:
+        return
+    record = {"ts": time.time(), "type": kind, "metric": PREFIX + name, "value": value}
+    if labels:
+        record["labels"] = labels
+    if _json_writer is None:
+        with _json_writer_lock:
+            if _json_writer is None:
+                _json_writer = threading.Thread(target=_json_writer_loop, name="metrics-json-log", daemon=True)
+                _json_writer.start()
+                atexit.register(_close_json_log)
+    _json_queue.put(json.dumps(record, ensure_ascii=False) + "\n")
+
+def observe(name, value, buckets=LATENCY_BUCKETS):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(name, buckets)
+        histogram.observe(value)
+    _log_json("histogram", name, value)
+
+@contextmanager
+def timer(name):
+    """with timer("retrieval"): ... → commentator_retrieval_seconds 히스토그램에 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(f"{name}_seconds", time.perf_counter() - start)
+
+def inc(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    _log_json("counter", name, value)
+
+def register_gauge(name, fn):
+    """렌더링할 때마다 fn()을 호출해 현재 값을 보고 (예: 큐 길이)"""
+    _gauges[name] = fn
+
+def _format_bound(bound):
+    return f"{bound:g}"
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name, h in sorted(_histograms.items()):
+            metric = PREFIX + name
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in zip(h.buckets, h.counts):
+                lines.append(f'{metric}_bucket{{le="{_format_bound(bound)}"}} {count}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+            lines.append(f"{metric}_sum {h.sum}")
+            lines.append(f"{metric}_count {h.count}")
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{name} {value}")
+    for name, fn in sorted(_gauges.items()):
+        try:
+            value = fn()
+        except Exception:
+            continue
+        lines.append(f"# TYPE {PREFIX}{name} gauge")
+        lines.append(f"{PREFIX}{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def snapshot():
+    """현재 히스토그램 요약 {이름: {count, avg}} (로그/벤치마크용)"""
+    with _lock:
+        return {name: {"count": h.count, "avg": h.sum / h.count if h.count else 0.0} for name, h in _histograms.items()}
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """http://host:port/metrics 로 Prometheus 텍스트 포맷 노출 (데몬 스레드)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
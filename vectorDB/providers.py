@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+
+# 🔗 외부 서비스 / 모델 설정
+OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "http://localhost:9200")
+# 검색 백엔드: opensearch(기본) | local(memmap 로컬 저장소, 외부 서비스 없음) | fake(프로세스 내 메모리 구현, 벤치마크용)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "opensearch")
+# local 백엔드 저장 위치 / 임베딩 저장 형식 (float32 | float16)
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_store"))
+LOCAL_STORE_DTYPE = os.getenv("LOCAL_STORE_DTYPE", "float32")
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# 임베딩 워커 프로세스 수 (0: 이 프로세스에서 직접 encode, N: 워커 N개로 코어를 나눠 씀, -1: CPU 코어 수)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))         # 워커가 한 번에 encode할 최대 문장 수
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "2"))   # 동시 질의를 모으려고 기다리는 최대 시간
+# 재정렬(rerank)용 cross-encoder (CPU에서 도는 작은 다국어 모델)
+RERANKER_MODEL_NAME = os.getenv("RERANKER_MODEL_NAME", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+
+# ✅ 처음 사용할 때 한 번만 생성하는 스레드 안전 지연 초기화
+class Lazy:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_seconds = None
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    self.load_seconds = time.perf_counter() - start
+                    self._loaded = True
+        return self._value
+
+    def set(self, value):
+        """factory 대신 이미 만든 객체를 사용 (백엔드/모델 교체용)"""
+        with self._lock:
+            self._value = value
+            self.load_seconds = 0.0
+            self._loaded = True
+
+def _create_client():
+    if SEARCH_BACKEND == "local":
+        from local_store import LocalVectorStore
+        return LocalVectorStore(LOCAL_STORE_PATH, LOCAL_STORE_DTYPE)
+    if SEARCH_BACKEND == "fake":
+        from fake_opensearch import FakeOpenSearch
+        return FakeOpenSearch()
+    if SEARCH_BACKEND != "opensearch":
+        raise ValueError(f"지원하지 않는 SEARCH_BACKEND: {SEARCH_BACKEND}")
+    from opensearchpy import OpenSearch
+    return OpenSearch(OPENSEARCH_URL)
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+def _create_embedding_model():
+    if EMBEDDING_WORKERS == 0:
+        return _load_embedding_model()
+    # 모델은 워커 프로세스에서만 로드 (encode 호출 형식은 같음)
+    from embedding_pool import EmbeddingPool
+    workers = EMBEDDING_WORKERS if EMBEDDING_WORKERS > 0 else None
+    return EmbeddingPool(_load_embedding_model, workers, EMBEDDING_MAX_BATCH, EMBEDDING_MAX_WAIT_MS)
+
+def _create_reranker_model():
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(RERANKER_MODEL_NAME, device="cpu")
+
+opensearch_client = Lazy("opensearch_client", _create_client)
+embedding_model = Lazy("embedding_model", _create_embedding_model)
+reranker_model = Lazy("reranker_model", _create_reranker_model)
+
+def get_client():
+    return opensearch_client.get()
+
+def get_embedding_model():
+    return embedding_model.get()
+
+def get_reranker_model():
+    return reranker_model.get()
+
+def set_client(client):
+    """OpenSearch 클라이언트를 교체 (같은 API를 가진 객체면 됨, 예: FakeOpenSearch)"""
+    opensearch_client.set(client)
+
+def set_embedding_model(model):
+    """임베딩 모델을 교체 (encode(texts, batch_size=..., show_progress_bar=...)를 지원하면 됨)"""
+    embedding_model.set(model)
+
+def set_reranker_model(model):
+    """재정렬 모델을 교체 (predict([(질의, 본문), ...], batch_size=...)를 지원하면 됨)"""
+    reranker_model.set(model)
+
+def warm_up(*resources):
+    """
+    지정한 리소스(기본: OpenSearch 클라이언트, 임베딩 모델)를 미리 로드
+    반환값: {리소스 이름: 로드 시간(초)}
+    """
+    resources = resources or (opensearch_client, embedding_model)
+    timings = {}
+    for resource in resources:
+        resource.get()
+        timings[resource.name] = resource.load_seconds
+    if embedding_model in resources:
+        # 첫 encode의 초기화 비용도 미리 지불
+        start = time.perf_counter()
+        embedding_model.get().encode("warm up")
+        timings["embedding_first_encode"] = time.perf_counter() - start
+    if reranker_model in resources:
+        start = time.perf_counter()
+        reranker_model.get().predict([("warm up", "warm up")])
+        timings["reranker_first_predict"] = time.perf_counter() - start
+    return timings
+
+def format_timings(title, timings):
+    lines = [f"⏱️ {title}"]
+    lines += [f"  - {name}: {seconds:.2f}s" for name, seconds in timings.items()]
+    return "\n".join(lines)
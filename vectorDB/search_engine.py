@@ -0,0 +1,583 @@
+import re
+import json
+import math
+import time
+import copy
+import fnmatch
+import threading
+import numpy as np
+from opensearchpy.exceptions import NotFoundError, RequestError
+
+# 🔎 프로세스 안에서 도는 OpenSearch 호출 방식의 검색 엔진 (InProcessOpenSearch / LocalVectorStore 공통)
+# 이 레포에서 사용하는 호출만 구현: indices.exists/create/delete/refresh/get/get_mapping/put_mapping,
+# indices.get_settings/put_settings/forcemerge/get_alias/exists_alias/update_aliases(별칭 하나 = 인덱스 하나),
+# bulk(helpers.streaming_bulk/parallel_bulk), search(+scroll), msearch, count, delete, delete_by_query, tasks.get
+# - knn / knn_score는 항상 전체 스캔(정확 검색)이므로 recall@k는 동점 순서 차이를 빼면 1.0
+# - match / multi_match는 BM25를 단순화한 점수 (순위는 비슷하지만 값은 OpenSearch와 다름)
+# - 인덱스 저장 방식은 "인덱스 저장소" 메서드(_find_index / _create_index / _write_done ...)를 바꿔 정함
+#   (기본은 메모리, local_store.py는 디스크)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+class _Serializer:
+    # helpers가 bulk 본문을 만들 때 사용 (client.transport.serializer.dumps)
+    def dumps(self, data):
+        if isinstance(data, str):
+            return data
+        return json.dumps(data, ensure_ascii=False)
+
+class _Transport:
+    def __init__(self):
+        self.serializer = _Serializer()
+
+class MemoryIndex:
+    """인덱스 하나 (문서는 메모리 dict, 검색용 행렬/역색인은 문서가 바뀌면 다시 만듦)"""
+
+    def __init__(self, body):
+        body = body or {}
+        self.settings = copy.deepcopy(body.get("settings", {}))
+        self.mappings = copy.deepcopy(body.get("mappings", {}))
+        self.docs = {}
+        # 문서가 바뀌면 다시 만드는 검색용 구조
+        self._matrix = None    # (필드, id 목록, 정규화된 임베딩 행렬, id → 행 번호)
+        self._postings = {}    # 필드 → ({토큰: {문서 ID: 빈도}}, {문서 ID: 토큰 수})
+
+    def vector_rows(self, field):
+        """(행별 문서 ID, 정규화된 임베딩 행렬, 살아 있는 행 마스크 또는 None, 문서 ID → 행 번호)"""
+        if self._matrix is None or self._matrix[0] != field:
+            ids, vectors = [], []
+            for doc_id, source in self.docs.items():
+                vector = source.get(field)
+                if vector is not None:
+                    ids.append(doc_id)
+                    vectors.append(vector)
+            matrix = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+            self._matrix = (field, ids, matrix, {doc_id: row for row, doc_id in enumerate(ids)})
+        _, ids, matrix, row_of = self._matrix
+        return ids, matrix, None, row_of
+
+    def similarities(self, matrix, queries):
+        return queries @ matrix.T
+
+    def nearest(self, field, queries, k=None, allowed=None):
+        """
+        질의 벡터 배치에 대한 코사인 유사도 상위 k개 (행렬 곱 1번 + argpartition)
+        - allowed: 후보로 허용할 문서 ID 집합 (None이면 전체)
+        반환값: 질의마다 [(문서 ID, 코사인 유사도), ...] (유사도 내림차순)
+        """
+        ids, matrix, alive, row_of = self.vector_rows(field)
+        queries = np.asarray(queries, dtype=np.float32)
+        if not ids:
+            return [[] for _ in range(len(queries))]
+        mask = np.ones(len(ids), dtype=bool) if alive is None else alive.copy()
+        if allowed is not None:
+            allowed_mask = np.zeros(len(ids), dtype=bool)
+            allowed_mask[[row_of[doc_id] for doc_id in allowed if doc_id in row_of]] = True
+            mask &= allowed_mask
+        valid = int(mask.sum())
+        k = min(k, valid) if k else valid
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+        sims = self.similarities(matrix, normalize_rows(queries.reshape(len(queries), -1)))
+        sims[:, ~mask] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        results = []
+        for q, rows in enumerate(top):
+            rows = rows[np.argsort(-sims[q, rows])]
+            results.append([(ids[row], float(sims[q, row])) for row in rows])
+        return results
+
+    def postings(self, field):
+        if field not in self._postings:
+            index, lengths = {}, {}
+            for doc_id, source in self.docs.items():
+                tokens = tokenize(field_value(source, field) or "")
+                lengths[doc_id] = len(tokens)
+                for token in tokens:
+                    freqs = index.setdefault(token, {})
+                    freqs[doc_id] = freqs.get(doc_id, 0) + 1
+            self._postings[field] = (index, lengths)
+        return self._postings[field]
+
+    def _invalidate(self):
+        self._matrix = None
+        self._postings = {}
+
+    def put(self, doc_id, source):
+        created = doc_id not in self.docs
+        self.docs[doc_id] = source
+        self._invalidate()
+        return created
+
+    def remove(self, doc_id):
+        if self.docs.pop(doc_id, None) is None:
+            return False
+        self._invalidate()
+        return True
+
+class IndicesClient:
+    def __init__(self, client):
+        self._client = client
+
+    def exists(self, index, **kwargs):
+        return self._client._find_index(index) is not None
+
+    def create(self, index, body=None, **kwargs):
+        with self._client._lock:
+            if self._client._find_index(index) is not None:
+                raise RequestError(400, "resource_already_exists_exception", f"index [{index}] already exists")
+            self._client._create_index(index, body)
+        return {"acknowledged": True, "index": index}
+
+    def delete(self, index, ignore=None, **kwargs):
+        with self._client._lock:
+            if index in self._client._aliases:
+                raise RequestError(400, "illegal_argument_exception", f"The provided expression [{index}] matches an alias, specify the corresponding concrete indices instead.")
+            if not self._client._drop_index(index):
+                return self._client._not_found(ignore, f"no such index [{index}]")
+            self._client._forget_aliases(index)
+        return {"acknowledged": True}
+
+    def get(self, index, **kwargs):
+        """인덱스 이름 / 별칭 / 와일드카드(쉼표로 여러 개) → {인덱스: {aliases, mappings, settings}}"""
+        names = []
+        for pattern in index.split(","):
+            if any(c in pattern for c in "*?"):
+                names += sorted(fnmatch.filter(self._client._list_indices(), pattern))
+            elif self._client._find_index(pattern) is not None:
+                names.append(self._client._resolve(pattern))
+            else:
+                raise NotFoundError(404, "index_not_found_exception", f"no such index [{pattern}]")
+        result = {}
+        for name in dict.fromkeys(names):
+            target = self._client._get_index(name)
+            result[name] = {
+                "aliases": {alias: {} for alias, target_name in self._client._aliases.items() if target_name == name},
+                "mappings": copy.deepcopy(target.mappings),
+                "settings": copy.deepcopy(target.settings),
+            }
+        return result
+
+    def refresh(self, index=None, **kwargs):
+        # 메모리 구현은 쓰기 즉시 검색 가능
+        return {"_shards": {"failed": 0}}
+
+    def get_mapping(self, index, **kwargs):
+        return {self._client._resolve(index): {"mappings": copy.deepcopy(self._client._get_index(index).mappings)}}
+
+    def put_mapping(self, index, body, **kwargs):
+        with self._client._lock:
+            target = self._client._get_index(index)
+            for key, value in body.items():
+                if isinstance(value, dict):
+                    target.mappings.setdefault(key, {}).update(value)
+                else:
+                    target.mappings[key] = value
+            self._client._write_done([target])
+        return {"acknowledged": True}
+
+    def get_settings(self, index, **kwargs):
+        return {self._client._resolve(index): {"settings": copy.deepcopy(self._client._get_index(index).settings)}}
+
+    def put_settings(self, body, index=None, **kwargs):
+        # refresh_interval / number_of_replicas 등은 저장만 함 (메모리 구현은 항상 바로 검색 가능)
+        with self._client._lock:
+            target = self._client._get_index(index)
+            values = body.get("index", body)
+            settings = target.settings.setdefault("index", {})
+            for key, value in values.items():
+                if value is None:
+                    settings.pop(key, None)
+                else:
+                    settings[key] = value
+            self._client._write_done([target])
+        return {"acknowledged": True}
+
+    def forcemerge(self, index=None, **kwargs):
+        with self._client._lock:
+            self._client._force_merge(self._client._get_index(index))
+        return {"_shards": {"failed": 0}}
+
+    def exists_alias(self, name, index=None, **kwargs):
+        target = self._client._aliases.get(name)
+        return target is not None and (index is None or target == index)
+
+    def get_alias(self, index=None, name=None, **kwargs):
+        result = {}
+        for alias, target in self._client._aliases.items():
+            if (name is None or fnmatch.fnmatch(alias, name)) and (index is None or fnmatch.fnmatch(target, index)):
+                result.setdefault(target, {"aliases": {}})["aliases"][alias] = {}
+        if name and not result:
+            raise NotFoundError(404, "aliases_not_found_exception", f"alias [{name}] missing")
+        return result
+
+    def update_aliases(self, body, **kwargs):
+        """actions(add / remove / remove_index)을 한 번에 적용 (중간 상태가 보이지 않음)"""
+        client = self._client
+        with client._lock:
+            aliases = dict(client._aliases)
+            dropped = []
+            for action in body["actions"]:
+                (op, spec), = action.items()
+                if op == "add":
+                    if spec["alias"] in client._list_indices() and spec["alias"] not in dropped:
+                        raise RequestError(400, "invalid_alias_name_exception", f"an index exists with the same name as the alias [{spec['alias']}]")
+                    if spec["index"] in dropped or client._find_index(spec["index"]) is None:
+                        raise NotFoundError(404, "index_not_found_exception", f"no such index [{spec['index']}]")
+                    aliases[spec["alias"]] = spec["index"]
+                elif op == "remove":
+                    if aliases.get(spec["alias"]) == spec["index"]:
+                        del aliases[spec["alias"]]
+                elif op == "remove_index":
+                    if client._find_index(spec["index"]) is None or spec["index"] in client._aliases:
+                        raise NotFoundError(404, "index_not_found_exception", f"no such index [{spec['index']}]")
+                    dropped.append(spec["index"])
+                else:
+                    raise RequestError(400, "illegal_argument_exception", f"지원하지 않는 별칭 작업: {op}")
+            for index in dropped:
+                client._drop_index(index)
+            client._aliases = {alias: target for alias, target in aliases.items() if target not in dropped}
+            client._aliases_changed()
+        return {"acknowledged": True}
+
+class TasksClient:
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, task_id, **kwargs):
+        if task_id not in self._client._tasks:
+            raise NotFoundError(404, "resource_not_found_exception", f"task [{task_id}] isn't running and hasn't stored its results")
+        return copy.deepcopy(self._client._tasks[task_id])
+
+class InProcessOpenSearch:
+    """OpenSearch 클라이언트와 같은 호출 방식 (하위 클래스는 인덱스 저장소 메서드만 바꿈)"""
+
+    def __init__(self):
+        self._indices = {}
+        self._aliases = {}  # 별칭 → 인덱스 이름
+        self._lock = threading.RLock()
+        self._scrolls = {}  # scroll ID → (인덱스, 남은 [(문서 ID, 점수)], 페이지 크기, _source 포함 여부)
+        self._tasks = {}    # 작업 ID → 완료된 작업 결과 (비동기 delete_by_query)
+        self._next_id = 0
+        self.transport = _Transport()
+        self.indices = IndicesClient(self)
+        self.tasks = TasksClient(self)
+
+    # ---------------------- 인덱스 저장소 (하위 클래스에서 교체 가능) ----------------------
+    def _find_index(self, index):
+        return self._indices.get(self._resolve(index))
+
+    def _list_indices(self):
+        return list(self._indices)
+
+    def _aliases_changed(self):
+        # 별칭이 바뀐 뒤 호출 (메모리 구현은 할 일 없음)
+        pass
+
+    def _force_merge(self, target):
+        # 삭제 표시만 된 문서 정리 (메모리 구현은 할 일 없음)
+        pass
+
+    def _create_index(self, index, body):
+        self._indices[index] = MemoryIndex(body)
+        return self._indices[index]
+
+    def _drop_index(self, index):
+        return self._indices.pop(index, None) is not None
+
+    def _write_done(self, targets):
+        # 쓰기 요청이 끝날 때 호출 (메모리 구현은 할 일 없음)
+        pass
+
+    # ---------------------- 내부 도우미 ----------------------
+    def _resolve(self, index):
+        return self._aliases.get(index, index)
+
+    def _forget_aliases(self, index):
+        # 지운 인덱스를 가리키던 별칭 제거
+        if index in self._aliases.values():
+            self._aliases = {alias: target for alias, target in self._aliases.items() if target != index}
+            self._aliases_changed()
+
+    def _get_index(self, index):
+        target = self._find_index(index)
+        if target is None:
+            raise NotFoundError(404, "index_not_found_exception", f"no such index [{index}]")
+        return target
+
+    def _not_found(self, ignore, message):
+        if ignore and 404 in (ignore if isinstance(ignore, (list, tuple)) else [ignore]):
+            return {"result": "not_found", "status": 404}
+        raise NotFoundError(404, "not_found", message)
+
+    # ---------------------- 쓰기 ----------------------
+    def bulk(self, body, index=None, **kwargs):
+        start = time.perf_counter()
+        lines = body.splitlines() if isinstance(body, str) else list(body)
+        lines = [json.loads(line) if isinstance(line, str) else line for line in lines if line]
+        items, errors = [], False
+        touched = {}
+        i = 0
+        with self._lock:
+            while i < len(lines):
+                (op, meta), = lines[i].items()
+                i += 1
+                index_name = meta.get("_index", index)
+                doc_id = str(meta.get("_id"))
+                if op == "delete":
+                    target = self._find_index(index_name)
+                    found = target is not None and target.remove(doc_id)
+                    status, result = (200, "deleted") if found else (404, "not_found")
+                else:
+                    source = lines[i]
+                    i += 1
+                    target = self._find_index(index_name) or self._create_index(index_name, None)
+                    if op == "update":
+                        source = {**target.docs.get(doc_id, {}), **source.get("doc", {})}
+                    created = target.put(doc_id, source)
+                    status, result = (201, "created") if created else (200, "updated")
+                if target is not None:
+                    touched[id(target)] = target
+                items.append({op: {"_index": index_name, "_id": doc_id, "status": status, "result": result}})
+                errors = errors or (status >= 300 and op != "delete")
+            self._write_done(list(touched.values()))
+        return {"took": int((time.perf_counter() - start) * 1000), "errors": errors, "items": items}
+
+    def delete(self, index, id, ignore=None, **kwargs):
+        with self._lock:
+            target = self._find_index(index)
+            if target is None or not target.remove(str(id)):
+                return self._not_found(ignore, f"document [{id}] not found")
+            self._write_done([target])
+        return {"_index": index, "_id": str(id), "result": "deleted"}
+
+    def delete_by_query(self, index, body, wait_for_completion=True, **kwargs):
+        # slices / requests_per_second / conflicts는 받기만 함 (메모리에서 한 번에 삭제)
+        start = time.perf_counter()
+        with self._lock:
+            target = self._get_index(index)
+            doc_ids = list(self._evaluate(target, body.get("query", {"match_all": {}})))
+            for doc_id in doc_ids:
+                target.remove(doc_id)
+            self._write_done([target])
+        response = {
+            "took": int((time.perf_counter() - start) * 1000), "timed_out": False,
+            "total": len(doc_ids), "deleted": len(doc_ids), "batches": 1 if doc_ids else 0,
+            "version_conflicts": 0, "noops": 0, "failures": [], "throttled_millis": 0
+        }
+        if str(wait_for_completion).lower() != "false":
+            return response
+        task_id = f"task:{self._new_id()}"
+        status = {key: response[key] for key in ("total", "deleted", "batches", "version_conflicts", "noops")}
+        self._tasks[task_id] = {"completed": True, "task": {"id": task_id, "action": "indices:data/write/delete/byquery", "status": status}, "response": response}
+        return {"task": task_id}
+
+    # ---------------------- 읽기 ----------------------
+    def count(self, index, body=None, **kwargs):
+        target = self._get_index(index)
+        query = (body or {}).get("query")
+        if not query:
+            return {"count": len(target.docs)}
+        return {"count": len(self._evaluate(target, query))}
+
+    def search(self, index, body=None, scroll=None, size=None, **kwargs):
+        start = time.perf_counter()
+        body = body or {}
+        target = self._get_index(index)
+        size = size or body.get("size", 10)
+        with_source = body.get("_source", True) is not False
+        with self._lock:
+            scores = self._evaluate(target, body.get("query", {"match_all": {}}))
+            ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+            offset = body.get("from", 0)
+            hits = self._hits(index, target, ranked[offset:offset + size], with_source)
+        res = self._response(start, len(ranked), ranked[0][1] if ranked else None, hits)
+        if scroll:
+            # 검색 시점의 결과 목록을 고정해 두고 scroll()로 이어서 반환
+            scroll_id = f"scroll:{self._new_id()}"
+            self._scrolls[scroll_id] = (index, ranked[offset + size:], size, with_source)
+            res["_scroll_id"] = scroll_id
+        return res
+
+    def scroll(self, body=None, scroll_id=None, **kwargs):
+        start = time.perf_counter()
+        scroll_id = scroll_id or (body or {}).get("scroll_id")
+        if scroll_id not in self._scrolls:
+            raise NotFoundError(404, "search_context_missing_exception", f"No search context found for id [{scroll_id}]")
+        index, remaining, size, with_source = self._scrolls[scroll_id]
+        self._scrolls[scroll_id] = (index, remaining[size:], size, with_source)
+        with self._lock:
+            target = self._find_index(index) or MemoryIndex(None)
+            hits = self._hits(index, target, remaining[:size], with_source)
+        res = self._response(start, len(remaining), None, hits)
+        res["_scroll_id"] = scroll_id
+        return res
+
+    def clear_scroll(self, body=None, scroll_id=None, **kwargs):
+        scroll_ids = scroll_id or (body or {}).get("scroll_id", [])
+        for sid in [scroll_ids] if isinstance(scroll_ids, str) else scroll_ids:
+            self._scrolls.pop(sid, None)
+        return {"succeeded": True}
+
+    def msearch(self, body, index=None, **kwargs):
+        lines = body.splitlines() if isinstance(body, str) else list(body)
+        lines = [json.loads(line) if isinstance(line, str) else line for line in lines if line]
+        pairs = list(zip(lines[::2], lines[1::2]))
+        responses = [None] * len(pairs)
+
+        # 같은 인덱스/필드/필터의 knn 질의는 묶어서 한 번에 계산
+        groups = {}
+        for i, (header, search_body) in enumerate(pairs):
+            query = search_body.get("query", {})
+            if list(query) == ["knn"] and not search_body.get("from"):
+                (field, params), = query["knn"].items()
+                key = (header.get("index", index), field, json.dumps(params.get("filter"), sort_keys=True))
+                groups.setdefault(key, []).append(i)
+        for (index_name, field, _), positions in groups.items():
+            if self._find_index(index_name) is None:
+                continue
+            for i, res in zip(positions, self._knn_batch(index_name, field, [pairs[i][1] for i in positions])):
+                responses[i] = res
+
+        for i, (header, search_body) in enumerate(pairs):
+            if responses[i] is None:
+                try:
+                    responses[i] = self.search(index=header.get("index", index), body=search_body)
+                except NotFoundError as e:
+                    responses[i] = {"error": {"type": e.error, "reason": str(e.info)}, "status": 404}
+                    continue
+            responses[i]["status"] = 200
+        return {"took": sum(r.get("took", 0) for r in responses), "responses": responses}
+
+    def _new_id(self):
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def _hits(self, index, target, ranked, with_source):
+        hits = []
+        for doc_id, score in ranked:
+            hit = {"_index": index, "_id": doc_id, "_score": score}
+            if with_source and doc_id in target.docs:
+                hit["_source"] = copy.deepcopy(target.docs[doc_id])
+            hits.append(hit)
+        return hits
+
+    def _response(self, start, total, max_score, hits):
+        return {
+            "took": int((time.perf_counter() - start) * 1000),
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {"total": {"value": total, "relation": "eq"}, "max_score": max_score, "hits": hits}
+        }
+
+    # ---------------------- 쿼리 평가 → {문서 ID: 점수} ----------------------
+    def _evaluate(self, target, query):
+        (kind, spec), = query.items()
+        docs = target.docs
+        if kind == "match_all":
+            return {doc_id: 1.0 for doc_id in docs}
+        if kind == "term":
+            (field, value), = spec.items()
+            value = value.get("value") if isinstance(value, dict) else value
+            return {doc_id: 1.0 for doc_id, src in docs.items() if field_value(src, field) == value}
+        if kind == "terms":
+            (field, values), = spec.items()
+            values = set(values)
+            return {doc_id: 1.0 for doc_id, src in docs.items() if field_value(src, field) in values}
+        if kind == "match":
+            (field, value), = spec.items()
+            value = value.get("query") if isinstance(value, dict) else value
+            return self._text_scores(target, tokenize(value), [(field, 1.0)])
+        if kind == "multi_match":
+            fields = []
+            for field in spec.get("fields", ["*"]):
+                name, _, boost = field.partition("^")
+                fields.append((name, float(boost or 1.0)))
+            return self._text_scores(target, tokenize(spec["query"]), fields)
+        if kind == "bool":
+            return self._bool_scores(target, spec)
+        if kind == "knn":
+            (field, params), = spec.items()
+            allowed = self._evaluate(target, params["filter"]) if params.get("filter") else None
+            # OpenSearch cosinesimil 점수: (1 + cos) / 2
+            return {doc_id: (1 + cos) / 2 for doc_id, cos in self._cosine_top(target, field, params["vector"], params["k"], allowed)}
+        if kind == "script_score":
+            allowed = self._evaluate(target, spec.get("query", {"match_all": {}}))
+            params = spec["script"]["params"]
+            # knn_score(cosinesimil) 점수: 1 + cos
+            return {doc_id: 1 + cos for doc_id, cos in self._cosine_top(target, params["field"], params["query_value"], None, allowed)}
+        raise RequestError(400, "parsing_exception", f"unsupported query [{kind}]")
+
+    def _bool_scores(self, target, spec):
+        def clauses(key):
+            value = spec.get(key, [])
+            return value if isinstance(value, list) else [value]
+
+        candidates = None
+        scores = {}
+        for clause in clauses("must"):
+            result = self._evaluate(target, clause)
+            candidates = set(result) if candidates is None else candidates & set(result)
+            for doc_id, score in result.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        for clause in clauses("filter"):
+            result = self._evaluate(target, clause)
+            candidates = set(result) if candidates is None else candidates & set(result)
+        should = [self._evaluate(target, clause) for clause in clauses("should")]
+        if candidates is None:
+            candidates = set().union(*should) if should else set(target.docs)
+        for clause in clauses("must_not"):
+            candidates -= set(self._evaluate(target, clause))
+        for result in should:
+            for doc_id, score in result.items():
+                if doc_id in candidates:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        return {doc_id: scores.get(doc_id, 0.0) for doc_id in candidates}
+
+    def _text_scores(self, target, query_tokens, fields):
+        n_docs = len(target.docs) or 1
+        scores = {}
+        for field, boost in fields:
+            index, lengths = target.postings(field)
+            avg_length = (sum(lengths.values()) / len(lengths) if lengths else 0) or 1
+            for token in set(query_tokens):
+                freqs = index.get(token)
+                if not freqs:
+                    continue
+                idf = math.log(1 + n_docs / len(freqs))
+                for doc_id, tf in freqs.items():
+                    norm = 1.2 * (0.25 + 0.75 * lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + boost * idf * tf / (tf + norm)
+        return scores
+
+    def _cosine_top(self, target, field, vector, k, allowed):
+        return target.nearest(field, [vector], k, allowed)[0]
+
+    def _knn_batch(self, index, field, bodies):
+        """필터가 같은 knn 질의 여러 개를 행렬 곱 한 번으로 처리 → 질의별 search 응답"""
+        start = time.perf_counter()
+        target = self._get_index(index)
+        params = [body["query"]["knn"][field] for body in bodies]
+        with self._lock:
+            allowed = self._evaluate(target, params[0]["filter"]) if params[0].get("filter") else None
+            neighbors = target.nearest(field, [p["vector"] for p in params], max(p["k"] for p in params), allowed)
+            responses = []
+            for body, p, ranked in zip(bodies, params, neighbors):
+                ranked = [(doc_id, (1 + cos) / 2) for doc_id, cos in ranked[:p["k"]]]
+                hits = self._hits(index, target, ranked[:body.get("size", 10)], body.get("_source", True) is not False)
+                responses.append(self._response(start, len(ranked), ranked[0][1] if ranked else None, hits))
+        return responses
+
+def field_value(source, field):
+    # "datetime.keyword" 같은 keyword 하위 필드는 원본 값으로 비교
+    if field.endswith(".keyword"):
+        field = field[:-len(".keyword")]
+    return source.get(field)
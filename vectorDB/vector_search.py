@@ -1,8 +1,15 @@
 import os
+import re
+import time
+import unicodedata
 import yaml
 import json
-from opensearchpy import OpenSearch
-from sentence_transformers import SentenceTransformer
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from cache_utils import LRUCache, TTLCache
+import metrics
+import providers
+from providers import get_client, get_embedding_model, get_reranker_model
 
 # 설정 경로 및 기본값
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), '../config/upload_config.yaml')
@@ -11,24 +18,144 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
     config = yaml.safe_load(f)
 
 INDEX_NAME = config.get("index_name", "default_index")
+# HNSW 탐색 후보 수 (lucene 엔진에서는 knn 쿼리의 k가 탐색 후보 수 역할)
+EF_SEARCH = config.get("ef_search", 100)
+# Reciprocal Rank Fusion 상수 (클수록 하위 순위 문서의 기여가 커짐)
+RRF_K = 60
+# 재정렬: 후보 수 / 시간 예산(ms)
+RERANK_CANDIDATES = config.get("rerank_candidates", 30)
+RERANK_BUDGET_MS = config.get("rerank_budget_ms", 150)
+# 동시에 대기/실행 중일 수 있는 재정렬 작업 수 (넘치면 재정렬 없이 검색 순서 사용)
+RERANK_MAX_INFLIGHT = config.get("rerank_max_inflight", 2)
 
-# OpenSearch 클라이언트
-client = OpenSearch("http://localhost:9200")
+# OpenSearch 클라이언트 / 임베딩 모델은 처음 검색할 때 로드 (미리 로드하려면 warm_up())
 
-# 임베딩 모델
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+# 캐시: 질의 임베딩(LRU) / 검색 결과(TTL, 인덱스 재업로드 시 무효화)
+_embedding_cache = LRUCache(config.get("embedding_cache_size", 4096))
+_result_cache = TTLCache(config.get("result_cache_size", 1024), config.get("result_cache_ttl", 60))
+# (정규화된 질의, passage ID) → cross-encoder 점수 (인덱스 재업로드 시 무효화)
+_rerank_cache = LRUCache(config.get("rerank_cache_size", 8192))
+# cross-encoder는 전용 스레드 1개에서 실행
+# - 이미 시작한 계산은 시간 예산을 넘겨도 끝까지 하고 점수는 캐시에 남김, 시작 전인 작업은 취소
+# - 대기열이 쌓이지 않도록 작업 수를 RERANK_MAX_INFLIGHT로 제한
+_rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+_rerank_slots = threading.BoundedSemaphore(RERANK_MAX_INFLIGHT)
+# 인덱스 generation(재업로드 여부)을 확인하는 최소 간격(초)
+GENERATION_CHECK_INTERVAL = config.get("generation_check_interval", 5)
+_generation = {"value": None, "checked_at": float("-inf")}
 
-def search_by_vector(query_text, top_k=5):
-    """
-    입력 텍스트(query_text)와 유사한 문서를 벡터DB에서 top_k개 반환
-    반환값: [{title, content, url, datetime, score}, ...]
-    """
-    if not client.indices.exists(index=INDEX_NAME):
-        return []
-    embedding = embedding_model.encode(query_text).tolist()
-    script_query = {
+# 캐시 적중/미스 수를 /metrics에 노출
+metrics.register_gauge("embedding_cache_hits", lambda: _embedding_cache.hits)
+metrics.register_gauge("embedding_cache_misses", lambda: _embedding_cache.misses)
+metrics.register_gauge("result_cache_hits", lambda: _result_cache.hits)
+metrics.register_gauge("result_cache_misses", lambda: _result_cache.misses)
+metrics.register_gauge("rerank_cache_hits", lambda: _rerank_cache.hits)
+metrics.register_gauge("rerank_cache_misses", lambda: _rerank_cache.misses)
+
+def normalize_query(query_text):
+    """캐시 키용 질의 정규화 (유니코드 NFKC, 소문자, 공백 정리, 끝 문장부호 제거)"""
+    text = unicodedata.normalize("NFKC", query_text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.~ ")
+
+def embed_query(query_text):
+    """질의 임베딩 (정규화된 질의 기준 LRU 캐시)"""
+    key = normalize_query(query_text)
+    embedding = _embedding_cache.get(key)
+    if embedding is None:
+        with metrics.timer("query_embed"):
+            embedding = tuple(get_embedding_model().encode(key).tolist())
+        _embedding_cache.put(key, embedding)
+    return list(embedding)
+
+def embed_queries(query_texts):
+    """여러 질의 임베딩 (캐시에 없는 질의만 모아서 encode 1번)"""
+    keys = [normalize_query(q) for q in query_texts]
+    embeddings = {key: _embedding_cache.get(key) for key in dict.fromkeys(keys)}
+    missing = [key for key, embedding in embeddings.items() if embedding is None]
+    if missing:
+        with metrics.timer("query_embed"):
+            encoded = get_embedding_model().encode(missing, show_progress_bar=False)
+        for key, embedding in zip(missing, encoded):
+            embeddings[key] = tuple(embedding.tolist())
+            _embedding_cache.put(key, embeddings[key])
+    return [list(embeddings[key]) for key in keys]
+
+def _index_generation():
+    """업로드 시 인덱스 매핑 _meta에 기록되는 generation 값 (GENERATION_CHECK_INTERVAL마다 확인)"""
+    now = time.monotonic()
+    if now - _generation["checked_at"] < GENERATION_CHECK_INTERVAL:
+        return _generation["value"]
+    try:
+        mapping = get_client().indices.get_mapping(index=INDEX_NAME)
+        value = next(iter(mapping.values()))["mappings"].get("_meta", {}).get("generation")
+    except Exception:
+        value = None
+    if value != _generation["value"]:
+        _result_cache.clear()
+        _rerank_cache.clear()
+    _generation.update(value=value, checked_at=now)
+    return value
+
+def index_generation():
+    """현재 인덱스 generation (재업로드하면 바뀜, 검색 결과를 재사용하는 캐시의 무효화 기준)"""
+    return _index_generation()
+
+def _freeze(value):
+    return tuple(_as_list(value)) if value else None
+
+def _cached_results(key):
+    _index_generation()
+    results = _result_cache.get(key)
+    return [dict(r) for r in results] if results is not None else None
+
+def _store_results(key, results):
+    _result_cache.put(key, [dict(r) for r in results])
+    return results
+
+def invalidate_cache():
+    """검색 결과 / 재정렬 점수 캐시 전체 삭제 (임베딩 캐시는 인덱스와 무관하므로 유지)"""
+    _result_cache.clear()
+    _rerank_cache.clear()
+    _generation["checked_at"] = float("-inf")
+
+def cache_stats():
+    return {"embedding": _embedding_cache.stats(), "result": _result_cache.stats(), "rerank": _rerank_cache.stats()}
+
+def warm_up():
+    """OpenSearch 클라이언트 + 임베딩 모델 로드 → {단계: 소요 시간(초)}"""
+    return providers.warm_up()
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+def _build_filter(datetime=None, project_name=None):
+    """datetime / project_name 사전 필터 (값 하나 또는 리스트)"""
+    filters = []
+    if datetime:
+        filters.append({"terms": {"datetime.keyword": _as_list(datetime)}})
+    if project_name:
+        filters.append({"terms": {"project_name": _as_list(project_name)}})
+    return {"bool": {"filter": filters}} if filters else None
+
+def _hit_to_result(hit):
+    source = hit["_source"]
+    return {
+        "id": source.get("id", hit.get("_id")),
+        "title": source.get("title", ""),
+        "content": source.get("content", ""),
+        "url": source.get("url", ""),
+        "datetime": source.get("datetime", ""),
+        "doc_id": source.get("doc_id", source.get("id", hit.get("_id"))),
+        "page": source.get("page", 1),
+        "score": hit.get("_score", 0)
+    }
+
+def _exact_query(embedding, doc_filter):
+    # 전체(또는 필터된) 문서에 대한 brute-force 코사인 스캔
+    return {
         "script_score": {
-            "query": {"match_all": {}},
+            "query": doc_filter or {"match_all": {}},
             "script": {
                 "source": "knn_score",
                 "lang": "knn",
@@ -40,16 +167,256 @@ def search_by_vector(query_text, top_k=5):
             }
         }
     }
-    res = client.search(index=INDEX_NAME, body={"size": top_k, "query": script_query})
-    hits = res["hits"]["hits"]
+
+def _knn_query(embedding, top_k, ef_search, doc_filter):
+    # HNSW 근사 검색: 후보 ef_search개를 탐색한 뒤 상위 top_k만 반환
+    knn = {"vector": embedding, "k": max(top_k, ef_search or EF_SEARCH)}
+    if doc_filter:
+        knn["filter"] = doc_filter
+    return {"knn": {"embedding": knn}}
+
+def search_by_vector(query_text, top_k=5, ef_search=None, datetime=None, project_name=None, exact=False):
+    """
+    입력 텍스트(query_text)와 유사한 문서를 벡터DB에서 top_k개 반환
+    - 기본은 HNSW 근사 k-NN 검색, exact=True면 전체 스캔(recall 확인용)
+    - datetime / project_name: 검색 전에 적용할 필터
+    반환값: [{id, title, content, url, datetime, doc_id, page, score}, ...] (content는 passage 본문)
+    """
+    with metrics.timer("search_by_vector"):
+        key = ("vector", normalize_query(query_text), top_k, ef_search, _freeze(datetime), _freeze(project_name), exact)
+        results = _cached_results(key)
+        if results is not None:
+            return results
+        if not get_client().indices.exists(index=INDEX_NAME):
+            return []
+        embedding = embed_query(query_text)
+        doc_filter = _build_filter(datetime, project_name)
+        if exact:
+            query = _exact_query(embedding, doc_filter)
+        else:
+            query = _knn_query(embedding, top_k, ef_search, doc_filter)
+        with metrics.timer("opensearch_search"):
+            res = get_client().search(index=INDEX_NAME, body={"size": top_k, "query": query})
+        return _store_results(key, [_hit_to_result(hit) for hit in res["hits"]["hits"]])
+
+def search_by_vectors(query_texts, top_k=5, ef_search=None, datetime=None, project_name=None):
+    """
+    여러 질의를 한 번에 근사 k-NN 검색 (임베딩 배치 1번 + msearch 1번)
+    - local / fake 백엔드는 필터가 같은 질의들을 행렬 곱 한 번으로 처리
+    반환값: 질의마다 search_by_vector()와 같은 형식의 결과 목록
+    """
+    keys = [("vector", normalize_query(q), top_k, ef_search, _freeze(datetime), _freeze(project_name), False) for q in query_texts]
+    results = [_cached_results(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing or not get_client().indices.exists(index=INDEX_NAME):
+        return [r or [] for r in results]
+
+    doc_filter = _build_filter(datetime, project_name)
+    body = []
+    for embedding in embed_queries([query_texts[i] for i in missing]):
+        body += [{"index": INDEX_NAME}, {"size": top_k, "query": _knn_query(embedding, top_k, ef_search, doc_filter)}]
+    with metrics.timer("opensearch_msearch"):
+        responses = get_client().msearch(body=body)["responses"]
+    for i, res in zip(missing, responses):
+        if "error" in res:
+            print(f"⚠️ 검색 실패: {res['error']}")
+            results[i] = []
+            continue
+        results[i] = _store_results(keys[i], [_hit_to_result(hit) for hit in res["hits"]["hits"]])
+    return results
+
+def _lexical_query(query_text, doc_filter):
+    query = {"multi_match": {"query": query_text, "fields": ["title^2", "content"]}}
+    if doc_filter:
+        query = {"bool": {"must": query, "filter": doc_filter["bool"]["filter"]}}
+    return query
+
+def _rrf_fuse(ranked_lists, weights):
+    """순위만 사용: score = Σ weight / (RRF_K + rank)"""
+    scores, docs = {}, {}
+    for hits, weight in zip(ranked_lists, weights):
+        for rank, hit in enumerate(hits, 1):
+            scores[hit["_id"]] = scores.get(hit["_id"], 0.0) + weight / (RRF_K + rank)
+            docs.setdefault(hit["_id"], hit)
+    return scores, docs
+
+def _weighted_fuse(ranked_lists, weights):
+    """검색별 점수를 0~1로 정규화(min-max)한 뒤 가중합"""
+    scores, docs = {}, {}
+    for hits, weight in zip(ranked_lists, weights):
+        if not hits:
+            continue
+        values = [hit["_score"] for hit in hits]
+        low, high = min(values), max(values)
+        for hit in hits:
+            norm = (hit["_score"] - low) / (high - low) if high > low else 1.0
+            scores[hit["_id"]] = scores.get(hit["_id"], 0.0) + weight * norm
+            docs.setdefault(hit["_id"], hit)
+    return scores, docs
+
+def hybrid_search(query_text, top_k=5, candidates=None, fusion="rrf", vector_weight=0.5,
+                  ef_search=None, datetime=None, project_name=None, return_timings=False):
+    """
+    BM25(title/content) + 벡터 k-NN 검색을 msearch 한 번으로 실행하고 결과를 합쳐 top_k개 반환
+    - fusion: "rrf"(Reciprocal Rank Fusion) 또는 "weighted"(정규화 점수 가중합)
+    - vector_weight: 벡터 검색 가중치 (BM25는 1 - vector_weight)
+    - candidates: 각 검색에서 가져올 후보 수 (기본: top_k * 4)
+    - return_timings=True면 (결과, 단계별 소요시간 ms) 반환
+    반환값: [{id, title, content, url, datetime, doc_id, page, score}, ...] (content는 passage 본문)
+    """
+    timings = {}
+    start = time.perf_counter()
+    key = ("hybrid", normalize_query(query_text), top_k, candidates, fusion, vector_weight,
+           ef_search, _freeze(datetime), _freeze(project_name))
+    results = _cached_results(key)
+    if results is not None:
+        timings["cache_hit"] = 1
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+        metrics.observe("hybrid_search_seconds", timings["total_ms"] / 1000)
+        return (results, timings) if return_timings else results
+    if not get_client().indices.exists(index=INDEX_NAME):
+        return ([], timings) if return_timings else []
+    candidates = candidates or top_k * 4
+
+    t_start_embed = time.perf_counter()
+    embedding = embed_query(query_text)
+    t_embed = time.perf_counter()
+    timings["embed_ms"] = (t_embed - t_start_embed) * 1000
+
+    doc_filter = _build_filter(datetime, project_name)
+    body = [
+        {"index": INDEX_NAME}, {"size": candidates, "query": _lexical_query(query_text, doc_filter)},
+        {"index": INDEX_NAME}, {"size": candidates, "query": _knn_query(embedding, candidates, ef_search, doc_filter)},
+    ]
+    with metrics.timer("opensearch_msearch"):
+        responses = get_client().msearch(body=body)["responses"]
+    t_search = time.perf_counter()
+    timings["search_ms"] = (t_search - t_embed) * 1000
+
+    ranked_lists = []
+    for name, res in zip(("lexical", "vector"), responses):
+        if "error" in res:
+            print(f"⚠️ {name} 검색 실패: {res['error']}")
+            ranked_lists.append([])
+            continue
+        timings[f"{name}_took_ms"] = res.get("took", 0)
+        ranked_lists.append(res["hits"]["hits"])
+
+    weights = (1.0 - vector_weight, vector_weight)
+    if fusion == "rrf":
+        scores, docs = _rrf_fuse(ranked_lists, weights)
+    elif fusion == "weighted":
+        scores, docs = _weighted_fuse(ranked_lists, weights)
+    else:
+        raise ValueError(f"지원하지 않는 fusion 방식: {fusion}")
+
     results = []
-    for hit in hits:
-        source = hit["_source"]
-        results.append({
-            "title": source.get("title", ""),
-            "content": source.get("content", ""),
-            "url": source.get("url", ""),
-            "datetime": source.get("datetime", ""),
-            "score": hit.get("_score", 0)
-        })
-    return results 
\ No newline at end of file
+    for doc_id in sorted(scores, key=scores.get, reverse=True)[:top_k]:
+        result = _hit_to_result(docs[doc_id])
+        result["score"] = scores[doc_id]
+        results.append(result)
+    end = time.perf_counter()
+    timings["fusion_ms"] = (end - t_search) * 1000
+    timings["total_ms"] = (end - start) * 1000
+    metrics.observe("hybrid_search_seconds", timings["total_ms"] / 1000)
+    _store_results(key, results)
+    return (results, timings) if return_timings else results
+
+def _score_pairs(query_key, query_text, docs):
+    # 캐시에 없는 (질의, passage) 쌍만 모아 cross-encoder 한 번에 계산 → {passage ID: 점수}
+    scores, missing = {}, []
+    for doc in docs:
+        score = _rerank_cache.get((query_key, doc["id"]))
+        if score is None:
+            missing.append(doc)
+        else:
+            scores[doc["id"]] = score
+    if missing:
+        with metrics.timer("rerank_predict"):
+            predicted = get_reranker_model().predict(
+                [(query_text, f"{doc['title']}\n{doc['content']}") for doc in missing], batch_size=len(missing)
+            )
+        for doc, score in zip(missing, predicted):
+            scores[doc["id"]] = float(score)
+            _rerank_cache.put((query_key, doc["id"]), float(score))
+    return scores
+
+def rerank(query_text, results, top_k=3, budget_ms=None):
+    """
+    검색 결과(후보)를 cross-encoder 점수로 다시 정렬해 top_k개 반환
+    - (질의, passage) 점수는 캐시 → 같은 질의의 재정렬은 모델을 다시 돌리지 않음
+    - budget_ms(기본: rerank_budget_ms) 안에 끝나지 않거나, 재정렬 작업이 이미 RERANK_MAX_INFLIGHT개이거나,
+      모델 오류가 나면 원래 검색 순서의 top_k 반환
+    반환값: 검색 결과와 같은 형식 (score는 재정렬 점수, 원래 점수는 retrieval_score)
+    """
+    if not results:
+        return []
+    budget = (RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    fallback = [dict(r) for r in results[:top_k]]
+    if not _rerank_slots.acquire(blocking=False):
+        metrics.inc("rerank_shed_total")
+        return fallback
+    with metrics.timer("rerank"):
+        future = _rerank_executor.submit(_score_pairs, normalize_query(query_text), query_text, results)
+        # 작업이 끝나거나 취소되면 자리 반납
+        future.add_done_callback(lambda _: _rerank_slots.release())
+        try:
+            scores = future.result(timeout=budget)
+        except FutureTimeoutError:
+            future.cancel()
+            metrics.inc("rerank_timeouts_total")
+            return fallback
+        except Exception as e:
+            print(f"⚠️ 재정렬 실패 → 검색 순서 사용: {e}")
+            metrics.inc("rerank_errors_total")
+            return fallback
+    reranked = []
+    for result in sorted(results, key=lambda r: scores[r["id"]], reverse=True)[:top_k]:
+        result = dict(result)
+        result["retrieval_score"] = result["score"]
+        result["score"] = scores[result["id"]]
+        reranked.append(result)
+    return reranked
+
+def check_recall(query_texts, top_k=5, ef_search=None, **filters):
+    """
+    근사 검색 결과가 전체 스캔 결과를 얼마나 포함하는지 (recall@k) 확인
+    반환값: 질의들의 평균 recall (0 ~ 1)
+    """
+    recalls = []
+    for query_text in query_texts:
+        exact_ids = {r["id"] for r in search_by_vector(query_text, top_k, exact=True, **filters)}
+        if not exact_ids:
+            continue
+        ann_ids = {r["id"] for r in search_by_vector(query_text, top_k, ef_search=ef_search, **filters)}
+        recalls.append(len(exact_ids & ann_ids) / len(exact_ids))
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query", help="검색할 문장")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, help=f"HNSW 탐색 후보 수 (기본: {EF_SEARCH})")
+    parser.add_argument("--exact", action="store_true", help="전체 스캔(정확 검색)")
+    parser.add_argument("--recall", action="store_true", help="근사 검색 recall@k 확인")
+    parser.add_argument("--hybrid", choices=["rrf", "weighted"], help="BM25 + 벡터 하이브리드 검색 (fusion 방식)")
+    parser.add_argument("--rerank", action="store_true", help=f"하이브리드 후보 {RERANK_CANDIDATES}개를 cross-encoder로 재정렬")
+    args = parser.parse_args()
+
+    if args.rerank:
+        candidates = hybrid_search(args.query, RERANK_CANDIDATES, fusion=args.hybrid or "rrf", ef_search=args.ef_search)
+        start = time.perf_counter()
+        for r in rerank(args.query, candidates, args.top_k, budget_ms=60000):
+            print(json.dumps({k: r[k] for k in ("id", "title", "url", "score", "retrieval_score")}, ensure_ascii=False))
+        print(f"rerank_ms: {(time.perf_counter() - start) * 1000:.1f}")
+    elif args.hybrid:
+        results, timings = hybrid_search(args.query, args.top_k, fusion=args.hybrid, ef_search=args.ef_search, return_timings=True)
+        for r in results:
+            print(json.dumps({k: r[k] for k in ("id", "title", "url", "score")}, ensure_ascii=False))
+        print(json.dumps({k: round(v, 1) for k, v in timings.items()}))
+    elif args.recall:
+        print(f"recall@{args.top_k}: {check_recall([args.query], args.top_k, args.ef_search):.3f}")
+    else:
+        for r in search_by_vector(args.query, args.top_k, ef_search=args.ef_search, exact=args.exact):
+            print(json.dumps({k: r[k] for k in ("id", "title", "url", "score")}, ensure_ascii=False))